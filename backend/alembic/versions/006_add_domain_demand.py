@@ -0,0 +1,43 @@
+"""add domain demand
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create domain_demand table for searched domains we have no listing for
+    op.create_table('domain_demand',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('root_domain', sa.String(length=255), nullable=False),
+        sa.Column('search_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('first_searched_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_searched_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    
+    # Create indexes for performance
+    op.create_index(op.f('ix_domain_demand_id'), 'domain_demand', ['id'], unique=False)
+    op.create_index(op.f('ix_domain_demand_root_domain'), 'domain_demand', ['root_domain'], unique=True)
+    op.create_index('idx_domain_demand_search_count', 'domain_demand', ['search_count'])
+
+
+def downgrade() -> None:
+    # Drop indexes
+    op.drop_index('idx_domain_demand_search_count', table_name='domain_demand')
+    op.drop_index(op.f('ix_domain_demand_root_domain'), table_name='domain_demand')
+    op.drop_index(op.f('ix_domain_demand_id'), table_name='domain_demand')
+    
+    # Drop domain_demand table
+    op.drop_table('domain_demand')
@@ -0,0 +1,36 @@
+"""unique offer per domain and marketplace
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keep only the newest offer of each domain/marketplace pair
+    op.execute("""
+        DELETE FROM offers
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM offers GROUP BY domain_id, marketplace_id
+        )
+    """)
+    
+    # The unique index replaces the plain composite index and backs
+    # INSERT ... ON CONFLICT (domain_id, marketplace_id)
+    op.drop_index('idx_offers_domain_marketplace', table_name='offers')
+    op.create_index('uq_offers_domain_marketplace', 'offers', ['domain_id', 'marketplace_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_offers_domain_marketplace', table_name='offers')
+    op.create_index('idx_offers_domain_marketplace', 'offers', ['domain_id', 'marketplace_id'], unique=False)
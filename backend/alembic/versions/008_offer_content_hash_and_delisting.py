@@ -0,0 +1,28 @@
+"""offer content hash and delisting
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Hash of the feed fields of an offer; unchanged rows are only marked as seen
+    op.add_column('offers', sa.Column('content_hash', sa.BigInteger(), nullable=True))
+    # Set when a full upload of the marketplace no longer lists the offer
+    op.add_column('offers', sa.Column('delisted_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('offers', 'delisted_at')
+    op.drop_column('offers', 'content_hash')
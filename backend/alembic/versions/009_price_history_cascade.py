@@ -0,0 +1,29 @@
+"""price history follows its offer on delete
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Ingest now records price changes; deleting an offer deletes its history
+    op.drop_constraint('price_history_offer_id_fkey', 'price_history', type_='foreignkey')
+    op.create_foreign_key(
+        'price_history_offer_id_fkey', 'price_history', 'offers', ['offer_id'], ['id'], ondelete='CASCADE'
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('price_history_offer_id_fkey', 'price_history', type_='foreignkey')
+    op.create_foreign_key('price_history_offer_id_fkey', 'price_history', 'offers', ['offer_id'], ['id'])
@@ -0,0 +1,57 @@
+"""add ingest checkpoints
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create ingest_checkpoints table: progress of file ingests, so interrupted ones resume
+    op.create_table('ingest_checkpoints',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('file_hash', sa.String(length=64), nullable=False),
+        sa.Column('request_hash', sa.String(length=64), nullable=False),
+        sa.Column('request', sa.Text(), nullable=False),
+        sa.Column('path', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('job_id', sa.String(length=32), nullable=True),
+        sa.Column('owner_id', sa.Integer(), nullable=True),
+        sa.Column('worker', sa.String(length=255), nullable=True),
+        sa.Column('marketplace_id', sa.Integer(), nullable=True),
+        sa.Column('chunk_size', sa.Integer(), nullable=False),
+        sa.Column('chunks_committed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('rows_committed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('results', sa.JSON(), nullable=True),
+        sa.Column('seen_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    
+    # Create indexes for performance
+    op.create_index(op.f('ix_ingest_checkpoints_id'), 'ingest_checkpoints', ['id'], unique=False)
+    op.create_index('uq_ingest_checkpoints_file_request', 'ingest_checkpoints', ['file_hash', 'request_hash'], unique=True)
+    op.create_index('idx_ingest_checkpoints_status', 'ingest_checkpoints', ['status'])
+
+
+def downgrade() -> None:
+    # Drop indexes
+    op.drop_index('idx_ingest_checkpoints_status', table_name='ingest_checkpoints')
+    op.drop_index('uq_ingest_checkpoints_file_request', table_name='ingest_checkpoints')
+    op.drop_index(op.f('ix_ingest_checkpoints_id'), table_name='ingest_checkpoints')
+    
+    # Drop ingest_checkpoints table
+    op.drop_table('ingest_checkpoints')
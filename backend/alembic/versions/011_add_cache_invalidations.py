@@ -0,0 +1,42 @@
+"""add cache invalidations
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create cache_invalidations table: offer and domain changes, so every process refreshes its lookup caches
+    op.create_table('cache_invalidations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('worker', sa.String(length=32), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('domain_ids', sa.JSON(), nullable=True),
+        sa.Column('marketplace_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    
+    # Create indexes for performance
+    op.create_index(op.f('ix_cache_invalidations_id'), 'cache_invalidations', ['id'], unique=False)
+    op.create_index('idx_cache_invalidations_created_at', 'cache_invalidations', ['created_at'])
+
+
+def downgrade() -> None:
+    # Drop indexes
+    op.drop_index('idx_cache_invalidations_created_at', table_name='cache_invalidations')
+    op.drop_index(op.f('ix_cache_invalidations_id'), table_name='cache_invalidations')
+    
+    # Drop cache_invalidations table
+    op.drop_table('cache_invalidations')
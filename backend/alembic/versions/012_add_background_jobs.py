@@ -0,0 +1,51 @@
+"""add background jobs
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create background_jobs table: state of ingest and lookup jobs, so any worker process can report it
+    op.create_table('background_jobs',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('processed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('result_path', sa.Text(), nullable=True),
+        sa.Column('cancel_requested', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('worker', sa.String(length=255), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    
+    # Create indexes for performance
+    op.create_index('idx_background_jobs_status', 'background_jobs', ['status'])
+    op.create_index('idx_background_jobs_updated_at', 'background_jobs', ['updated_at'])
+
+
+def downgrade() -> None:
+    # Drop indexes
+    op.drop_index('idx_background_jobs_updated_at', table_name='background_jobs')
+    op.drop_index('idx_background_jobs_status', table_name='background_jobs')
+    
+    # Drop background_jobs table
+    op.drop_table('background_jobs')
@@ -16,6 +16,12 @@ from app.services.marketplace_service import MarketplaceService
 from app.services.domain_service import DomainService
 from app.services.offer_service import OfferService
 from app.services.fx_service import FXService
+from app.services.offer_index import offer_index
+from app.services.lookup_cache import lookup_cache
+from app.services.ingest_metrics import ingest_metrics
+from app.services.domain_demand_service import domain_demand_recorder
+from app.services.domain_bloom_filter import known_domain_filter
+from app.services.cache_sync import cache_sync
 from app.api.v1.endpoints.auth import get_current_admin_user
 
 router = APIRouter()
@@ -120,8 +126,11 @@ async def admin_update_marketplace(
     marketplace.region = marketplace_data.region
     marketplace.notes = marketplace_data.notes
     
+    cache_sync.record_marketplace(db, marketplace_id)
     db.commit()
     db.refresh(marketplace)
+    offer_index.refresh_marketplace(db, marketplace_id)
+    lookup_cache.invalidate_marketplace(marketplace_id)
     
     return MarketplaceResponse(
         id=marketplace.id,
@@ -153,7 +162,9 @@ async def admin_get_domains(
     
     # Apply search filter
     if search:
-        search_term = f"%{search.lower()}%"
+        # Pasted URLs and subdomains are matched by their root domain
+        normalized = DomainService.normalize_domain(search.strip())
+        search_term = f"%{(normalized or search).lower()}%"
         query = query.filter(
             or_(
                 Domain.root_domain.ilike(search_term),
@@ -216,10 +227,35 @@ async def admin_delete_domain(
     # Delete all offers for this domain first
     db.query(Offer).filter(Offer.domain_id == domain_id).delete()
     db.delete(domain)
+    cache_sync.record_domains(db, [domain_id])
     db.commit()
+    offer_index.refresh_domains(db, [domain_id])
+    lookup_cache.invalidate_domains([domain_id])
     
     return {"message": f"Domain {domain_id} and all its offers deleted successfully"}
 
+@router.get("/domains/demand")
+async def admin_get_domain_demand(
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(get_current_admin_user)
+):
+    """Admin: Get the most searched domains that have no listing"""
+    demand = domain_demand_recorder.get_top_domains(db, limit)
+    
+    return {
+        "domains": [
+            {
+                "root_domain": d.root_domain,
+                "search_count": d.search_count,
+                "first_searched_at": d.first_searched_at,
+                "last_searched_at": d.last_searched_at
+            }
+            for d in demand
+        ],
+        "limit": limit
+    }
+
 # Offer Admin Endpoints
 @router.get("/offers")
 async def admin_get_offers(
@@ -356,7 +392,12 @@ async def admin_delete_zero_price_offers(
         }
     
     offer_service = OfferService(db)
+    # Committed with the deletion
+    cache_sync.record_rebuild(db)
     deleted_count = offer_service.delete_zero_price_offers()
+    if offer_index.ready:
+        offer_index.build(db)
+    lookup_cache.clear()
     
     return {
         "message": f"Successfully deleted {deleted_count} offers with zero or null USD prices",
@@ -374,8 +415,12 @@ async def admin_delete_offer(
     if not offer:
         raise HTTPException(status_code=404, detail="Offer not found")
     
+    domain_id = offer.domain_id
     db.delete(offer)
+    cache_sync.record_domains(db, [domain_id])
     db.commit()
+    offer_index.refresh_domains(db, [domain_id])
+    lookup_cache.invalidate_domains([domain_id])
     
     return {"message": f"Offer {offer_id} deleted successfully"}
 
@@ -398,9 +443,14 @@ async def admin_update_offer(
     for field, value in offer_data.items():
         if field in allowed_fields and hasattr(offer, field):
             setattr(offer, field, value)
+    # No longer matches the feed row it was hashed from; the next upload rewrites it
+    offer.content_hash = None
     
+    cache_sync.record_domains(db, [offer.domain_id])
     db.commit()
     db.refresh(offer)
+    offer_index.refresh_domains(db, [offer.domain_id])
+    lookup_cache.invalidate_domains([offer.domain_id])
     
     return {"message": f"Offer {offer_id} updated successfully"}
 
@@ -594,6 +644,72 @@ async def admin_delete_user(
     
     return {"message": f"User {user_id} and all related data deleted successfully"}
 
+# Lookup Index
+@router.get("/offer-index")
+async def admin_get_offer_index(
+    admin_user: User = Depends(get_current_admin_user)
+):
+    """Admin: Get in-memory offer index statistics"""
+    return offer_index.stats()
+
+@router.post("/offer-index/rebuild")
+async def admin_rebuild_offer_index(
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(get_current_admin_user)
+):
+    """Admin: Rebuild the in-memory offer index from the database"""
+    count = offer_index.build(db)
+    # Bundles cached from the old index may hold its drift
+    lookup_cache.clear()
+    return {"message": f"Offer index rebuilt with {count} offers", **offer_index.stats()}
+
+@router.get("/domain-filter")
+async def admin_get_domain_filter(
+    admin_user: User = Depends(get_current_admin_user)
+):
+    """Admin: Get known-domain bloom filter size, memory usage and accuracy"""
+    return known_domain_filter.stats()
+
+@router.post("/domain-filter/rebuild")
+async def admin_rebuild_domain_filter(
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(get_current_admin_user)
+):
+    """Admin: Rebuild the known-domain bloom filter from the database"""
+    count = known_domain_filter.load(db)
+    return {"message": f"Known-domain filter rebuilt with {count} domains", **known_domain_filter.stats()}
+
+@router.get("/lookup-cache")
+async def admin_get_lookup_cache(
+    admin_user: User = Depends(get_current_admin_user)
+):
+    """Admin: Get lookup result cache size and hit/miss/eviction counters"""
+    return lookup_cache.stats()
+
+@router.post("/lookup-cache/clear")
+async def admin_clear_lookup_cache(
+    admin_user: User = Depends(get_current_admin_user)
+):
+    """Admin: Drop every cached lookup result"""
+    lookup_cache.clear()
+    return {"message": "Lookup cache cleared", **lookup_cache.stats()}
+
+# Ingest Metrics
+@router.get("/ingest-metrics")
+async def admin_get_ingest_metrics(
+    admin_user: User = Depends(get_current_admin_user)
+):
+    """Admin: Get ingest counters and time spent per ingest stage since startup"""
+    return ingest_metrics.stats()
+
+@router.post("/ingest-metrics/reset")
+async def admin_reset_ingest_metrics(
+    admin_user: User = Depends(get_current_admin_user)
+):
+    """Admin: Zero the ingest counters"""
+    ingest_metrics.reset()
+    return {"message": "Ingest metrics reset", **ingest_metrics.stats()}
+
 # Database Statistics
 @router.get("/stats")
 async def admin_get_stats(
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from app.core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, select
+from app.core.database import get_db, get_async_db
 from app.services.auth_service import auth_service
 from app.schemas.auth import (
     UserCreate, UserLogin, GoogleAuthRequest, Token, UserResponse, PasswordReset, AdminLogin
@@ -58,11 +59,8 @@ def get_current_admin_user(
     return user
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user from JWT token"""
+def _get_user_id_from_token(credentials: HTTPAuthorizationCredentials) -> int:
+    """Validate a bearer token and return the user ID it was issued for"""
     token = credentials.credentials
     payload = auth_service.verify_token(token)
     if payload is None:
@@ -81,29 +79,50 @@ def get_current_user(
         )
     
     try:
-        user_id = int(user_id_str)
-        user = db.query(User).filter(User.id == user_id).first()
+        return int(user_id_str)
     except (ValueError, TypeError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid user ID in token",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+
+def _ensure_user_found(user: User) -> User:
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
     return user
 
 
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    """Get current authenticated user from JWT token"""
+    user_id = _get_user_id_from_token(credentials)
+    user = db.query(User).filter(User.id == user_id).first()
+    return _ensure_user_found(user)
+
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """Get current authenticated user from JWT token using the async session"""
+    user_id = _get_user_id_from_token(credentials)
+    result = await db.execute(select(User).where(User.id == user_id))
+    return _ensure_user_found(result.scalar_one_or_none())
+
+
 @router.post("/register", response_model=Token)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     # Check if user already exists
-    existing_user = auth_service.get_user_by_email(db, user_data.email)
+    existing_user = await db.run_sync(auth_service.get_user_by_email, user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -111,7 +130,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    user = auth_service.create_user(db, user_data)
+    user = await db.run_sync(auth_service.create_user, user_data)
     
     # Create access token
     access_token_expires = timedelta(minutes=auth_service.access_token_expire_minutes)
@@ -127,9 +146,9 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(user_credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """Login with email and password"""
-    user = auth_service.authenticate_user(db, user_credentials.email, user_credentials.password)
+    user = await db.run_sync(auth_service.authenticate_user, user_credentials.email, user_credentials.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -143,9 +162,6 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
             detail="Inactive user"
         )
     
-    # Update last login
-    user.last_login = db.query(User).filter(User.id == user.id).first().last_login
-    
     # Create access token
     access_token_expires = timedelta(minutes=auth_service.access_token_expire_minutes)
     access_token = auth_service.create_access_token(
@@ -160,7 +176,7 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
 
 
 @router.post("/google", response_model=Token)
-async def google_auth(google_auth: GoogleAuthRequest, db: Session = Depends(get_db)):
+async def google_auth(google_auth: GoogleAuthRequest, db: AsyncSession = Depends(get_async_db)):
     """Authenticate with Google OAuth"""
     
     try:
@@ -202,7 +218,7 @@ async def google_auth(google_auth: GoogleAuthRequest, db: Session = Depends(get_
             )
         
         # Create or update user
-        user = auth_service.create_or_update_google_user(db, google_user_info)
+        user = await db.run_sync(auth_service.create_or_update_google_user, google_user_info)
         
         # Create access token
         access_token_expires = timedelta(minutes=auth_service.access_token_expire_minutes)
@@ -239,15 +255,18 @@ async def check_google_config():
     }
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_current_user_info(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
     """Get current user information"""
     # Ensure admin users have unlimited plan
-    current_user = auth_service.ensure_admin_unlimited_plan(db, current_user)
+    current_user = await db.run_sync(auth_service.ensure_admin_unlimited_plan, current_user)
     return UserResponse.from_orm(current_user)
 
 
 @router.post("/refresh", response_model=Token)
-async def refresh_token(current_user: User = Depends(get_current_user)):
+async def refresh_token(current_user: User = Depends(get_current_user_async)):
     """Refresh access token"""
     # Create new access token
     access_token_expires = timedelta(minutes=auth_service.access_token_expire_minutes)
@@ -265,7 +284,7 @@ async def refresh_token(current_user: User = Depends(get_current_user)):
 @router.post("/admin-reset-password")
 async def admin_reset_password(
     reset_data: PasswordReset,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Admin endpoint to reset password using a simple token approach.
@@ -281,7 +300,8 @@ async def admin_reset_password(
     email = reset_data.token.replace("admin:", "")
     
     # Find user by email
-    user = db.query(User).filter(User.email == email).first()
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalar_one_or_none()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -291,13 +311,13 @@ async def admin_reset_password(
     # Hash new password and update
     hashed_password = auth_service.get_password_hash(reset_data.new_password)
     user.hashed_password = hashed_password
-    db.commit()
+    await db.commit()
     
     return {"message": f"Password successfully reset for {email}"}
 
 
 @router.post("/admin-login", response_model=Token)
-async def admin_login(admin_data: AdminLogin, db: Session = Depends(get_db)):
+async def admin_login(admin_data: AdminLogin, db: AsyncSession = Depends(get_async_db)):
     """
     Secure admin login endpoint that validates credentials and returns JWT token.
     
@@ -305,11 +325,12 @@ async def admin_login(admin_data: AdminLogin, db: Session = Depends(get_db)):
     """
     # Validate admin credentials - check for admin user in database
     # Look up by username OR email to handle both cases
-    admin_user = db.query(User).filter(
+    result = await db.execute(select(User).where(
         or_(User.username == admin_data.username, User.email == admin_data.username),
         User.is_admin == True,
         User.is_active == True
-    ).first()
+    ))
+    admin_user = result.scalars().first()
     
     if not admin_user:
         raise HTTPException(
@@ -327,7 +348,7 @@ async def admin_login(admin_data: AdminLogin, db: Session = Depends(get_db)):
     # Update last login
     from datetime import datetime
     admin_user.last_login = datetime.utcnow()
-    db.commit()
+    await db.commit()
     
     # Create JWT token with admin claims
     access_token = auth_service.create_access_token(
@@ -1,58 +1,224 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
-from typing import Optional
-from decimal import Decimal
+from fastapi.concurrency import run_in_threadpool
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from functools import partial
 import pandas as pd
+import hashlib
 import json
+import logging
+import os
+import shutil
 import time
 
-from app.core.database import get_db
+from app.core.database import SessionLocal
 from app.core.config import settings
-from app.schemas.csv_upload import CSVUploadRequest, CSVUploadResponse
-from app.services.csv_processing_service import CSVProcessingService
+from app.schemas.csv_upload import CSVUploadRequest
+from app.schemas.job import JobResponse
+from app.services.batch_ingest_service import BatchIngestService
+from app.services.csv_processing_service import CSVProcessingService, estimate_rows, read_upload, upload_response
+from app.services.ingest_checkpoint_service import IngestCheckpointService
+from app.services.job_manager import Job, JobCancelled, job_manager
 from app.api.v1.endpoints.auth import get_current_user
 from app.models.user import User
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+# Bytes copied per read while spooling an upload to disk
+SPOOL_CHUNK_SIZE = 1024 * 1024
+# Row errors included in job responses
+MAX_REPORTED_ERRORS = 10
+
+
+def _require_admin(current_user: User) -> None:
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+
+def _is_streamed(filename: str) -> bool:
+    """CSV and XLSX uploads are read in chunks; legacy XLS files are loaded whole."""
+    return filename.lower().endswith(('.csv', '.xlsx'))
+
+
+def _check_file_type(filename: str) -> None:
+    if not filename.lower().endswith(('.csv', '.xlsx', '.xls')):
+        raise HTTPException(status_code=400, detail="File must be CSV, XLS, or XLSX")
+
+
+async def _spool_upload(file: UploadFile, path: str) -> str:
+    """
+    Write an upload to disk in blocks, checking the size as it arrives.
+    
+    Returns:
+        SHA-256 of the file, which identifies its ingest checkpoint
+    """
+    max_size = settings.max_csv_file_size if _is_streamed(file.filename) else settings.max_file_size
+    
+    file_size = 0
+    file_hash = hashlib.sha256()
+    with open(path, "wb") as spool:
+        while chunk := await file.read(SPOOL_CHUNK_SIZE):
+            file_size += len(chunk)
+            if file_size > max_size:
+                spool.close()
+                os.remove(path)
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"{file.filename}: file size exceeds maximum allowed size ({max_size / 1024 / 1024:.0f}MB)"
+                )
+            spool.write(chunk)
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def _read_upload(
+    path: str,
+    upload_request: CSVUploadRequest,
+    job: Job,
+    chunk_size: Optional[int] = None
+) -> Iterable[pd.DataFrame]:
+    """Read a spooled upload and set the job's expected row count."""
+    frames = read_upload(path, upload_request.column_mapping, chunk_size)
+    # Estimates are corrected at the end; XLS files are already read whole
+    job.total = estimate_rows(path) if _is_streamed(path) else sum(len(df) for df in frames)
+    return frames
+
+
+def _run_ingest_job(job: Job, upload_request: CSVUploadRequest, path: str, file_hash: str) -> Dict[str, Any]:
+    """
+    Worker of an ingest job.
+    
+    Streams the spooled file through CSVProcessingService and returns the
+    upload summary. With checkpoints on, an interrupted earlier ingest of
+    the same file is resumed after its last committed chunk, and a file
+    that was already ingested is skipped. The spooled file is removed
+    afterwards, unless the process dies first: then it is kept for
+    resume_interrupted_ingests.
+    """
+    start_time = time.time()
+    db = SessionLocal()
+    try:
+        checkpoints = IngestCheckpointService(db)
+        checkpoint = checkpoints.start(file_hash, upload_request, path, job) if settings.ingest_checkpoints_enabled else None
+        if checkpoint and checkpoints.is_done(checkpoint):
+            logger.info(f"Skipping ingest: the file was already ingested by job {checkpoint.job_id}")
+            response = upload_response(checkpoint.marketplace_id, checkpoint.results, 0)
+            response.already_imported = True
+            return response.model_dump()
+        
+        try:
+            frames = _read_upload(path, upload_request, job, checkpoint.chunk_size if checkpoint else None)
+            csv_processor = CSVProcessingService(db, upload_request, frames)
+            # Share the running counts so polls see them before the job finishes
+            job.result = csv_processor.results
+            results = csv_processor.process(job, checkpoint)
+            marketplace_id = csv_processor.marketplace.id
+        except Exception as e:
+            if checkpoint:
+                db.rollback()
+                checkpoints.finish(checkpoint, "cancelled" if isinstance(e, JobCancelled) else "failed", error=str(e))
+            raise
+        if checkpoint:
+            checkpoints.finish(checkpoint, "completed", results, marketplace_id)
+    finally:
+        db.close()
+        if os.path.exists(path):
+            os.remove(path)
+    
+    return upload_response(marketplace_id, results, time.time() - start_time).model_dump()
+
+
+def resume_interrupted_ingests() -> List[Job]:
+    """
+    Resume the ingest jobs whose process died, from their checkpoints.
+    
+    Each resumed ingest is a new job of the same owner. Checkpoints whose
+    spooled file is gone are marked failed; uploading the file again
+    resumes them.
+    
+    Returns:
+        The resumed jobs
+    """
+    db = SessionLocal()
+    jobs = []
+    try:
+        checkpoints = IngestCheckpointService(db)
+        for checkpoint in checkpoints.interrupted():
+            if not checkpoint.path or not os.path.exists(checkpoint.path):
+                checkpoints.finish(checkpoint, "failed", error="Interrupted; upload the file again to resume")
+                continue
+            
+            job = _ingest_job(checkpoint.owner_id)
+            # Another process may have resumed it first
+            if not checkpoints.claim(checkpoint, job, checkpoint.path):
+                continue
+            
+            upload_request = CSVUploadRequest.model_validate_json(checkpoint.request)
+            job.result_path = checkpoint.path
+            job_manager.submit(job, partial(
+                _run_ingest_job, upload_request=upload_request, path=checkpoint.path, file_hash=checkpoint.file_hash
+            ))
+            logger.info(f"Resuming interrupted ingest {checkpoint.id} ({upload_request.marketplace_slug}, "
+                        f"{checkpoint.rows_committed} rows committed) as job {job.id}")
+            jobs.append(job)
+    finally:
+        db.close()
+    return jobs
+
 
-@router.post("/csv", response_model=CSVUploadResponse)
+def _run_batch_ingest_job(job: Job, files: List[Tuple[str, CSVUploadRequest]], spool_dir: str) -> Dict[str, Any]:
+    """Worker of a batch ingest job; the spooled files are removed afterwards."""
+    try:
+        return BatchIngestService(files).process(job)
+    finally:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+
+
+def _get_ingest_job(job_id: str) -> Job:
+    job = job_manager.get(job_id)
+    if not job or job.kind != "ingest":
+        raise HTTPException(status_code=404, detail="Ingest job not found")
+    return job
+
+
+def _summarize_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """An ingest job's result with the row errors cut down to the first few."""
+    errors = result.get('errors', [])
+    return {**result, 'errors': errors[:MAX_REPORTED_ERRORS], 'error_count': len(errors)}
+
+
+def _ingest_job(owner_id: int) -> Job:
+    """A new ingest job, whose result is reported and stored summarized."""
+    return Job("ingest", owner_id, summarize=_summarize_result)
+
+
+@router.post("/csv", response_model=JobResponse, status_code=202)
 async def upload_csv(
     file: UploadFile = File(...),
     data: str = Form(...),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ):
     """
-    Upload and process a CSV file containing marketplace data.
+    Upload a CSV file containing marketplace data for processing.
+    
+    The file is spooled to disk and processed by a background ingest job:
+    1. Maps columns according to the provided mapping
+    2. Creates or updates marketplace records
+    3. Processes domain and offer data
+    
+    Progress is checkpointed per chunk: uploading a file again resumes an
+    interrupted ingest of it, and skips it if it was already ingested.
     
-    This endpoint:
-    1. Validates the uploaded file
-    2. Maps columns according to the provided mapping
-    3. Creates or updates marketplace records
-    4. Processes domain and offer data
-    5. Returns processing statistics
+    Returns the job at once; poll GET /ingest/jobs/{id} for progress and
+    the processing statistics, or DELETE it to cancel.
     
     Requires admin privileges.
     """
-    # Check if user is admin
-    if not current_user.is_admin:
-        raise HTTPException(status_code=403, detail="Admin access required")
-    
-    start_time = time.time()
+    _require_admin(current_user)
     
     # Validate file type
-    if not file.filename.lower().endswith(('.csv', '.xlsx', '.xls')):
-        raise HTTPException(status_code=400, detail="File must be CSV, XLS, or XLSX")
-    
-    # Check file size
-    file_content = await file.read()
-    file_size = len(file_content)
-    if file_size > settings.max_file_size:
-        raise HTTPException(status_code=413, detail=f"File size ({file_size / 1024 / 1024:.1f}MB) exceeds maximum allowed size ({settings.max_file_size / 1024 / 1024:.0f}MB)")
-    
-    # Reset file pointer for processing
-    await file.seek(0)
+    _check_file_type(file.filename)
     
     # Parse request data
     try:
@@ -61,36 +227,105 @@ async def upload_csv(
     except Exception as e:
         raise HTTPException(status_code=422, detail=f"Invalid request data: {str(e)}")
     
+    job = _ingest_job(current_user.id)
+    path = job_manager.result_path(job, "upload" + os.path.splitext(file.filename)[1].lower())
+    # Removed by the worker, or with the job if it is cancelled before it starts
+    job.result_path = path
+    
+    file_hash = await _spool_upload(file, path)
+    
+    # The job manager stores the job with a synchronous session
+    await run_in_threadpool(job_manager.submit, job, lambda job: _run_ingest_job(job, upload_request, path, file_hash))
+    return job.to_dict()
+
+
+@router.post("/batch", response_model=JobResponse, status_code=202)
+async def upload_batch(
+    files: List[UploadFile] = File(...),
+    data: str = Form(...),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Upload many marketplace files in one background ingest job.
+    
+    `data` is a JSON array with one upload request (marketplace, column
+    mapping, defaults) per file, in the order of the files. Files are
+    parsed in parallel worker processes and written per marketplace: files
+    of the same marketplace are written one after the other, and delisting
+    runs once per marketplace after all of its files.
+    
+    Returns the job at once; poll GET /ingest/jobs/{id} for progress and
+    the batch summary (totals, throughput and one summary per marketplace).
+    
+    Requires admin privileges.
+    """
+    _require_admin(current_user)
+    
+    for file in files:
+        _check_file_type(file.filename)
+    
     try:
-        # Read file
-        if file.filename.lower().endswith('.csv'):
-            df = pd.read_csv(file.file)
-        else:
-            df = pd.read_excel(file.file)
-        
-        # Validate required columns exist
-        required_columns = [upload_request.column_mapping.domain_column, upload_request.column_mapping.price_column]
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        if missing_columns:
-            raise HTTPException(status_code=400, detail=f"Missing required columns: {missing_columns}")
-        
-        # Process CSV using the new service
-        csv_processor = CSVProcessingService(db, upload_request, df)
-        results = csv_processor.process()
-        
-        processing_time_ms = int((time.time() - start_time) * 1000)
-        
-        return CSVUploadResponse(
-            marketplace_id=csv_processor.marketplace.id,
-            total_rows_processed=len(df),
-            successful_imports=results['successful_imports'],
-            failed_imports=results['failed_imports'],
-            new_domains_added=results['new_domains'],
-            new_offers_added=results['new_offers'],
-            updated_offers=results['updated_offers'],
-            processing_time_ms=processing_time_ms,
-            errors=results['errors'][:10]  # Limit errors to first 10
-        )
-        
+        request_data = json.loads(data)
+        if not isinstance(request_data, list):
+            raise ValueError("expected a JSON array with one request per file")
+        upload_requests = [CSVUploadRequest(**item) for item in request_data]
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
+        raise HTTPException(status_code=422, detail=f"Invalid request data: {str(e)}")
+    if len(upload_requests) != len(files):
+        raise HTTPException(
+            status_code=422,
+            detail=f"Invalid request data: {len(upload_requests)} requests for {len(files)} files"
+        )
+    
+    job = _ingest_job(current_user.id)
+    spool_dir = job_manager.result_path(job, "batch")
+    # Removed by the worker, or with the job if it is cancelled before it starts
+    job.result_path = spool_dir
+    
+    paths = []
+    try:
+        for index, file in enumerate(files):
+            # One directory per file keeps the original names (used in error messages) apart
+            path = os.path.join(spool_dir, str(index), os.path.basename(file.filename))
+            os.makedirs(os.path.dirname(path))
+            await _spool_upload(file, path)
+            paths.append(path)
+    except HTTPException:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+        raise
+    
+    await run_in_threadpool(
+        job_manager.submit, job, lambda job: _run_batch_ingest_job(job, list(zip(paths, upload_requests)), spool_dir)
+    )
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+def get_ingest_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Progress of an ingest job: rows processed, rows per second and the
+    running import counts and errors. Once completed, `result` holds the
+    upload statistics.
+    """
+    _require_admin(current_user)
+    return _get_ingest_job(job_id).to_dict()
+
+
+@router.delete("/jobs/{job_id}", response_model=JobResponse, status_code=202)
+def cancel_ingest_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Cancel an ingest job.
+    
+    A queued job never starts; a running job stops before its next batch.
+    Batches that were already committed stay imported.
+    """
+    _require_admin(current_user)
+    job = _get_ingest_job(job_id)
+    job_manager.cancel(job)
+    return job.to_dict()
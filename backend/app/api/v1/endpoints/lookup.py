@@ -1,39 +1,152 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import csv
+import io
+import itertools
+import json
+import logging
+import os
 import time
 from decimal import Decimal
 
-from app.core.database import get_db
-from app.schemas.lookup import DomainLookupRequest, DomainLookupResponse, OfferResult
+from app.core.config import settings
+from app.core.database import SessionLocal, get_async_db
+from app.schemas.job import JobResponse
+from app.schemas.lookup import (
+    DomainLookupRequest, DomainLookupResponse, DomainLookupStreamLine, LookupFilters, LookupJobRequest, OfferResult
+)
 from app.services.domain_service import DomainService
 from app.services.offer_service import OfferService
-from app.services.fx_service import FXService
-from app.api.v1.endpoints.auth import get_current_user
+from app.services.offer_index import IndexedOffer, offer_index, to_indexed_offer
+from app.services.domain_demand_service import domain_demand_recorder
+from app.services.domain_bloom_filter import known_domain_filter
+from app.services.lookup_cache import FilterKey, LookupCache, OfferBundle, lookup_cache
+from app.api.v1.endpoints.auth import get_current_user_async
 from app.models.user import User
 from app.services.usage_service import usage_service
+from app.services.job_manager import Job, job_manager
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Number of domains fetched per query by the streaming endpoint
+STREAM_CHUNK_SIZE = 200
+# Rows pulled from the server-side cursor per round trip
+STREAM_FETCH_SIZE = 1000
+# Bytes copied per read while spooling an uploaded domain list to disk
+SPOOL_CHUNK_SIZE = 1024 * 1024
+# Arrays of the format=columnar response, one value per offer
+COLUMNAR_FIELDS = [
+    "domain", "marketplace", "price_amount", "price_currency", "price_usd",
+    "listing_url", "includes_content", "dofollow", "last_seen_at", "is_best_price"
+]
+# Columns of the CSV download of a lookup job
+JOB_CSV_COLUMNS = [
+    "domain", "marketplace", "marketplace_slug", "price_amount", "price_currency", "price_usd",
+    "listing_url", "includes_content", "dofollow", "last_seen_at", "is_best_price"
+]
 
-@router.post("/", response_model=DomainLookupResponse)
-async def lookup_domains(
-    request: DomainLookupRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+
+def _matches_filters(offer: IndexedOffer, request: LookupFilters) -> bool:
+    """Apply the request's marketplace and price filters to an offer."""
+    if request.marketplaces and offer.marketplace_slug not in request.marketplaces:
+        return False
+    if request.min_price_usd and (offer.price_usd is None or offer.price_usd < request.min_price_usd):
+        return False
+    if request.max_price_usd and (offer.price_usd is None or offer.price_usd > request.max_price_usd):
+        return False
+    return True
+
+
+def _rank_offers(offers: Sequence[IndexedOffer], request: LookupFilters) -> OfferBundle:
     """
-    Lookup domains to find backlink offers from various marketplaces.
+    Filter a domain's indexed offers and flag the best (lowest USD) prices.
     
-    This endpoint searches for domains across all marketplaces and returns:
-    - All offers found for each domain
-    - Normalized USD prices
-    - Best price flags
-    - Marketplace information
+    best_price_only is not applied (see _select_offers), so the bundle can
+    be cached for any request with the same filters.
     """
-    start_time = time.time()
+    offers = [o for o in offers if _matches_filters(o, request)]
     
-    # Check if user can perform this search
+    prices = [o.price_usd for o in offers if o.price_usd]
+    best_price_usd = min(prices) if prices else None
+    
+    return tuple(
+        (offer, offer.price_usd == best_price_usd if offer.price_usd else False)
+        for offer in offers
+    )
+
+
+def _select_offers(bundle: OfferBundle, request: LookupFilters) -> List[Tuple[IndexedOffer, bool]]:
+    """The offers of a bundle the request returns: only the best prices with best_price_only."""
+    return [
+        (offer, is_best_price) for offer, is_best_price in bundle
+        if is_best_price or not request.best_price_only
+    ]
+
+
+def _to_offer_result(domain: str, offer: IndexedOffer, is_best_price: bool) -> OfferResult:
+    """Convert an indexed offer into the response format."""
+    return OfferResult(
+        domain=domain,
+        marketplace=offer.marketplace,
+        marketplace_slug=offer.marketplace_slug,
+        price_amount=offer.price_amount,
+        price_currency=offer.price_currency,
+        price_usd=offer.price_usd,
+        listing_url=offer.listing_url,
+        includes_content=offer.includes_content,
+        dofollow=offer.dofollow,
+        last_seen_at=offer.last_seen_at,
+        is_best_price=is_best_price
+    )
+
+
+def _to_columns(domains: List[str], offers_by_domain: Dict[str, List[Tuple[IndexedOffer, bool]]]) -> Dict:
+    """
+    Lay offers out as parallel arrays for format=columnar.
+    
+    Marketplaces are dictionary-encoded: each offer stores an index into
+    the `marketplaces`/`marketplace_slugs` arrays instead of repeating
+    the name and slug.
+    """
+    marketplace_indexes: Dict[int, int] = {}
+    marketplaces, marketplace_slugs = [], []
+    rows = []
+    for domain in domains:
+        for offer, is_best_price in offers_by_domain.get(domain, ()):
+            index = marketplace_indexes.get(offer.marketplace_id)
+            if index is None:
+                index = marketplace_indexes[offer.marketplace_id] = len(marketplaces)
+                marketplaces.append(offer.marketplace)
+                marketplace_slugs.append(offer.marketplace_slug)
+            rows.append((
+                domain,
+                index,
+                offer.price_amount,
+                offer.price_currency,
+                offer.price_usd,
+                offer.listing_url,
+                offer.includes_content,
+                offer.dofollow,
+                offer.last_seen_at.isoformat() if offer.last_seen_at else None,
+                is_best_price,
+            ))
+    
+    columns = list(zip(*rows)) if rows else [()] * len(COLUMNAR_FIELDS)
+    return {
+        "marketplaces": marketplaces,
+        "marketplace_slugs": marketplace_slugs,
+        "offers": {field: list(values) for field, values in zip(COLUMNAR_FIELDS, columns)},
+    }
+
+
+def _check_search_allowed(db: Session, current_user: User) -> None:
+    """Raise 402 if the user has used up their searches."""
     can_search, message = usage_service.can_perform_search(db, current_user)
     if not can_search:
         raise HTTPException(
@@ -46,26 +159,20 @@ async def lookup_domains(
                 "searches_used": current_user.searches_used_this_month
             }
         )
-    
-    # Initialize services
-    domain_service = DomainService(db)
-    offer_service = OfferService(db)
-    fx_service = FXService(db)
-    
-    # Normalize domains (remove www, punycode, etc.)
-    normalized_domains = []
-    for domain in request.domains:
-        normalized = domain_service.normalize_domain(domain)
-        if normalized:
-            normalized_domains.append(normalized)
+
+
+def _normalize_domains(domains: List[str]) -> List[str]:
+    """Normalize domains (remove www, punycode, etc.), rejecting empty requests."""
+    normalized_domains = [d for d in DomainService.normalize_domains(domains) if d]
     
     if not normalized_domains:
         raise HTTPException(status_code=400, detail="No valid domains provided")
     
-    # Get or create domain records
-    domain_records = domain_service.get_or_create_domains(normalized_domains)
-    
-    # Build query filters
+    return normalized_domains
+
+
+def _build_filters(request: LookupFilters) -> Dict:
+    """Build OfferService query filters from the request."""
     filters = {}
     if request.marketplaces:
         filters['marketplace_slugs'] = request.marketplaces
@@ -73,92 +180,540 @@ async def lookup_domains(
         filters['min_price_usd'] = request.min_price_usd
     if request.max_price_usd:
         filters['max_price_usd'] = request.max_price_usd
+    return filters
+
+
+def _resolve_domain_ids(db: Session, domains: List[str]) -> Dict[str, int]:
+    """
+    Resolve existing domains without writing anything.
     
-    # Get offers for all domains
-    all_offers = offer_service.get_offers_for_domains(
-        domain_ids=[d.id for d in domain_records],
-        filters=filters
+    The bloom filter rules out most unknown domains without a DB probe, and
+    every miss is handed to the background demand recorder. Domains other
+    processes created reach the filter through the cache sync thread,
+    within cache_sync_interval seconds.
+    """
+    candidates = [d for d in domains if known_domain_filter.might_contain(d)]
+    domain_ids = DomainService(db).get_domain_ids(candidates)
+    
+    missing_domains = [d for d in domains if d not in domain_ids]
+    if missing_domains:
+        domain_demand_recorder.record(missing_domains)
+    
+    return domain_ids
+
+
+def _fetch_offer_bundles(
+    db: Session,
+    domains: List[str],
+    request: LookupFilters,
+    filter_key: FilterKey
+) -> Dict[str, OfferBundle]:
+    """
+    Database path of lookup_domains; best prices are ranked in SQL.
+    
+    Bundles hold every offer matching the filters (best_price_only is
+    applied by the caller) so they can be cached for any request with the
+    same filters. With the cache disabled nothing is reused, so
+    best_price_only is applied in SQL and only the winners are read.
+    """
+    generation = lookup_cache.generation
+    cacheable = lookup_cache.max_offers > 0
+    domain_ids = _resolve_domain_ids(db, domains)
+    if not domain_ids:
+        return {}
+    
+    rows = OfferService(db).get_offer_rows_for_domains(
+        domain_ids=list(domain_ids.values()),
+        filters=_build_filters(request),
+        best_price_only=request.best_price_only and not cacheable
     )
     
-    # Group offers by domain and identify best prices
-    results = []
-    domains_with_offers = set()
+    grouped: Dict[str, List[Tuple[IndexedOffer, bool]]] = {domain: [] for domain in domain_ids}
+    for row in rows:
+        grouped[row.root_domain].append((to_indexed_offer(row), row.is_best_price))
     
-    for domain_record in domain_records:
-        domain_offers = [o for o in all_offers if o.domain_id == domain_record.id]
-        
-        if domain_offers:
-            domains_with_offers.add(domain_record.root_domain)
-            
-            # Find best price (lowest USD price)
-            best_price_usd = min(o.price_usd for o in domain_offers if o.price_usd)
-            
-            # Convert to response format
-            for offer in domain_offers:
-                is_best_price = offer.price_usd == best_price_usd if offer.price_usd else False
-                
-                result = OfferResult(
-                    domain=domain_record.root_domain,
-                    marketplace=offer.marketplace.name,
-                    marketplace_slug=offer.marketplace.slug,
-                    price_amount=float(offer.price_amount) if offer.price_amount else 0.0,
-                    price_currency=offer.price_currency,
-                    price_usd=float(offer.price_usd) if offer.price_usd else None,
-                    listing_url=offer.listing_url,
-                    includes_content=offer.includes_content,
-                    dofollow=offer.dofollow,
-                    last_seen_at=offer.last_seen_at,
-                    is_best_price=is_best_price
-                )
-                results.append(result)
+    bundles = {}
+    for domain, offers in grouped.items():
+        bundles[domain] = tuple(offers)
+        if cacheable:
+            lookup_cache.put(domain, domain_ids[domain], filter_key, bundles[domain], generation)
     
-    # Filter to best price only if requested
-    if request.best_price_only:
-        best_price_results = []
-        domain_best_prices = {}
-        
-        for result in results:
-            if result.is_best_price:
-                best_price_results.append(result)
-                domain_best_prices[result.domain] = result
-        
-        results = best_price_results
+    return bundles
+
+
+def _index_offer_bundles(
+    domains: List[str],
+    request: LookupFilters,
+    filter_key: FilterKey
+) -> Dict[str, OfferBundle]:
+    """Index path of lookup_domains; domains the index doesn't list are left out."""
+    generation = lookup_cache.generation
+    bundles = {}
+    missing_domains = []
+    for domain in domains:
+        offers = offer_index.get_offers(domain)
+        if not offers:
+            missing_domains.append(domain)
+            continue
+        bundles[domain] = _rank_offers(offers, request)
+        lookup_cache.put(domain, offers[0].domain_id, filter_key, bundles[domain], generation)
+    
+    # Remember what people look for but we don't list, written in the background
+    if missing_domains:
+        domain_demand_recorder.record(missing_domains)
+    
+    return bundles
+
+
+def _get_cached_bundles(domains: List[str], filter_key: FilterKey) -> Tuple[Dict[str, OfferBundle], List[str]]:
+    """Cached bundles of the domains, and the domains missing from the cache."""
+    bundles = {}
+    uncached_domains = []
+    for domain in domains:
+        bundle = lookup_cache.get(domain, filter_key)
+        if bundle is None:
+            uncached_domains.append(domain)
+        else:
+            bundles[domain] = bundle
+    return bundles, uncached_domains
+
+
+def _find_offers(
+    db: Optional[Session],
+    domains: List[str],
+    request: LookupFilters
+) -> Dict[str, List[Tuple[IndexedOffer, bool]]]:
+    """
+    Ranked offers per domain; domains without offers are left out.
+    
+    Domains are answered from the lookup cache first. The rest come from
+    the in-memory index when it is loaded (db is not used then), or from
+    the database. Lookups are read-only: unknown domains are never
+    inserted here.
+    """
+    filter_key = LookupCache.filter_key(request.marketplaces, request.min_price_usd, request.max_price_usd)
+    bundles, uncached_domains = _get_cached_bundles(domains, filter_key)
+    
+    if uncached_domains:
+        if offer_index.ready:
+            bundles.update(_index_offer_bundles(uncached_domains, request, filter_key))
+        else:
+            bundles.update(_fetch_offer_bundles(db, uncached_domains, request, filter_key))
+    
+    offers_by_domain = {}
+    for domain, bundle in bundles.items():
+        ranked = _select_offers(bundle, request)
+        if ranked:
+            offers_by_domain[domain] = ranked
+    
+    return offers_by_domain
+
+
+def _describe_search(normalized_domains: List[str], count: Optional[int] = None) -> str:
+    """Summarize a search for the usage log; count defaults to the number of domains given."""
+    if count is None:
+        count = len(normalized_domains)
+    search_query = f"Searched {count} domains: {', '.join(normalized_domains[:3])}"
+    if count > 3:
+        search_query += f" and {count - 3} more"
+    return search_query
+
+
+@router.post("/", response_model=DomainLookupResponse)
+async def lookup_domains(
+    request: DomainLookupRequest,
+    format: str = Query("json", pattern="^(json|columnar)$"),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Lookup domains to find backlink offers from various marketplaces.
+    
+    This endpoint searches for domains across all marketplaces and returns:
+    - All offers found for each domain
+    - Normalized USD prices
+    - Best price flags
+    - Marketplace information
+    
+    With `format=columnar` the offers are returned as parallel arrays
+    (`offers.domain[i]`, `offers.price_usd[i]`, ...) and `offers.marketplace[i]`
+    indexes into the `marketplaces`/`marketplace_slugs` arrays. This skips
+    per-offer model validation and is much smaller for large result sets.
+    """
+    start_time = time.time()
+    
+    # Check if user can perform this search
+    await db.run_sync(_check_search_allowed, current_user)
+    
+    normalized_domains = _normalize_domains(request.domains)
+    unique_domains = list(dict.fromkeys(normalized_domains))
+    
+    if offer_index.ready:
+        # Serve from the lookup cache and the in-memory index, no ORM objects involved
+        offers_by_domain = _find_offers(None, unique_domains, request)
+    else:
+        offers_by_domain = await db.run_sync(_find_offers, unique_domains, request)
+    
+    if format == "columnar":
+        columns = _to_columns(unique_domains, offers_by_domain)
+        total_offers = len(columns["offers"]["domain"])
+    else:
+        results = []
+        for domain in unique_domains:
+            for offer, is_best_price in offers_by_domain.get(domain, ()):
+                results.append(_to_offer_result(domain, offer, is_best_price))
+        total_offers = len(results)
     
     processing_time_ms = int((time.time() - start_time) * 1000)
     
     # Record the search usage
-    search_query = f"Searched {len(normalized_domains)} domains: {', '.join(normalized_domains[:3])}"
-    if len(normalized_domains) > 3:
-        search_query += f" and {len(normalized_domains) - 3} more"
+    await db.run_sync(
+        usage_service.record_search, current_user, _describe_search(normalized_domains), total_offers
+    )
     
-    usage_service.record_search(db, current_user, search_query, len(results))
+    if format == "columnar":
+        return JSONResponse({
+            **columns,
+            "total_domains_searched": len(normalized_domains),
+            "domains_with_offers": len(offers_by_domain),
+            "total_offers_found": total_offers,
+            "processing_time_ms": processing_time_ms,
+        })
     
     return DomainLookupResponse(
         results=results,
         total_domains_searched=len(normalized_domains),
-        domains_with_offers=len(domains_with_offers),
-        total_offers_found=len(results),
+        domains_with_offers=len(offers_by_domain),
+        total_offers_found=total_offers,
         processing_time_ms=processing_time_ms
     )
 
 
-@router.get("/stats")
-async def get_lookup_stats(db: Session = Depends(get_db)):
+def _stream_line(domain: str, results: List[OfferResult]) -> str:
+    """Serialize one domain's offers as an NDJSON line."""
+    best_prices = [r.price_usd for r in results if r.is_best_price]
+    line = DomainLookupStreamLine(
+        domain=domain,
+        offers=results,
+        best_price_usd=best_prices[0] if best_prices else None
+    )
+    return line.model_dump_json() + "\n"
+
+
+@router.post("/stream")
+async def stream_lookup_domains(
+    request: DomainLookupRequest,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
-    Get statistics about the lookup system.
+    Lookup domains and stream the results as NDJSON.
+    
+    Emits one line per searched domain (with its offers, best-price flags
+    and best USD price): domains in the lookup cache first, then the rest
+    as soon as each chunk of domains has been read from a server-side
+    cursor, instead of building the whole response in memory. The chunks'
+    bundles are added to the cache. Usage is recorded once, after the last
+    line.
+    """
+    await db.run_sync(_check_search_allowed, current_user)
+    
+    normalized_domains = _normalize_domains(request.domains)
+    unique_domains = list(dict.fromkeys(normalized_domains))
+    filters = _build_filters(request)
+    filter_key = LookupCache.filter_key(request.marketplaces, request.min_price_usd, request.max_price_usd)
+    # Cached bundles hold every offer matching the filters, see _fetch_offer_bundles
+    cacheable = lookup_cache.max_offers > 0
+    
+    async def generate():
+        total_offers = 0
+        
+        def bundle_line(domain: str, bundle: OfferBundle) -> str:
+            nonlocal total_offers
+            results = [
+                _to_offer_result(domain, offer, is_best_price)
+                for offer, is_best_price in _select_offers(bundle, request)
+            ]
+            total_offers += len(results)
+            return _stream_line(domain, results)
+        
+        bundles, uncached_domains = _get_cached_bundles(unique_domains, filter_key)
+        for domain, bundle in bundles.items():
+            yield bundle_line(domain, bundle)
+        
+        generation = lookup_cache.generation
+        domain_ids = await db.run_sync(_resolve_domain_ids, uncached_domains) if uncached_domains else {}
+        
+        # Unknown domains have no offers, emit them right away
+        for domain in uncached_domains:
+            if domain not in domain_ids:
+                yield _stream_line(domain, [])
+        
+        def fetched_line(domain: str, offers: List[Tuple[IndexedOffer, bool]]) -> str:
+            bundle = tuple(offers)
+            lookup_cache.put(domain, domain_ids[domain], filter_key, bundle, generation)
+            return bundle_line(domain, bundle)
+        
+        known_domains = list(domain_ids)
+        for start in range(0, len(known_domains), STREAM_CHUNK_SIZE):
+            chunk = known_domains[start:start + STREAM_CHUNK_SIZE]
+            statement = await db.run_sync(
+                lambda session: OfferService(session).offer_rows_statement(
+                    domain_ids=[domain_ids[d] for d in chunk],
+                    filters=filters,
+                    best_price_only=request.best_price_only and not cacheable
+                )
+            )
+            rows = await db.stream(statement.execution_options(yield_per=STREAM_FETCH_SIZE))
+            
+            # Rows arrive ordered by domain, so each run of rows is one line
+            emitted = set()
+            current_domain, offers = None, []
+            async for row in rows:
+                if row.root_domain != current_domain:
+                    if offers:
+                        yield fetched_line(current_domain, offers)
+                    current_domain, offers = row.root_domain, []
+                    emitted.add(current_domain)
+                offers.append((to_indexed_offer(row), row.is_best_price))
+            if offers:
+                yield fetched_line(current_domain, offers)
+            
+            for domain in chunk:
+                if domain not in emitted:
+                    yield fetched_line(domain, [])
+        
+        await db.run_sync(
+            usage_service.record_search, current_user, _describe_search(normalized_domains), total_offers
+        )
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+async def _spool_domain_file(file: UploadFile, path: str) -> None:
+    """Write an uploaded domain list to disk in blocks, checking the size as it arrives."""
+    file_size = 0
+    with open(path, "wb") as spool:
+        while chunk := await file.read(SPOOL_CHUNK_SIZE):
+            file_size += len(chunk)
+            if file_size > settings.max_csv_file_size:
+                spool.close()
+                os.remove(path)
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"File size exceeds maximum allowed size ({settings.max_csv_file_size / 1024 / 1024:.0f}MB)"
+                )
+            spool.write(chunk)
+
+
+def _iter_domain_file(path: str) -> Iterator[str]:
+    """Domains from an uploaded list, one per line or the first column of a CSV, read row by row."""
+    with open(path, encoding="utf-8-sig", errors="replace", newline="") as f:
+        for row in csv.reader(f):
+            if row and row[0].strip():
+                yield row[0].strip()
+
+
+def _run_lookup_job(
+    job: Job,
+    user_id: int,
+    listed_domains: List[str],
+    domain_file: Optional[str],
+    request: LookupJobRequest
+) -> Dict:
     """
-    from app.services.offer_service import OfferService
-    from app.services.domain_service import DomainService
+    Worker of a bulk lookup job.
     
+    Domains are read chunk by chunk from the request's list and then the
+    spooled upload, which is removed afterwards. One NDJSON line per
+    unique domain (the /lookup/stream format) is written to the job's
+    result file, and a single usage entry is recorded once the whole list
+    is done.
+    """
+    try:
+        raw_domains = iter(listed_domains)
+        job.total = len(listed_domains)
+        if domain_file:
+            job.total += sum(1 for _ in _iter_domain_file(domain_file))
+            raw_domains = itertools.chain(raw_domains, _iter_domain_file(domain_file))
+        job.result_path = job_manager.result_path(job, "ndjson")
+        
+        seen = set()
+        first_domains: List[str] = []
+        domains_searched = 0
+        domains_with_offers = 0
+        total_offers = 0
+        chunk_size = settings.lookup_job_chunk_size
+        with open(job.result_path, "w") as out:
+            while raw_chunk := list(itertools.islice(raw_domains, chunk_size)):
+                normalized = [d for d in DomainService.normalize_domains(raw_chunk) if d]
+                domains_searched += len(normalized)
+                first_domains.extend(normalized[:3 - len(first_domains)])
+                chunk = [d for d in dict.fromkeys(normalized) if d not in seen]
+                seen.update(chunk)
+                
+                db = SessionLocal()
+                try:
+                    offers_by_domain = _find_offers(db, chunk, request) if chunk else {}
+                finally:
+                    db.close()
+                
+                for domain in chunk:
+                    results = [
+                        _to_offer_result(domain, offer, is_best_price)
+                        for offer, is_best_price in offers_by_domain.get(domain, ())
+                    ]
+                    out.write(_stream_line(domain, results))
+                    total_offers += len(results)
+                    domains_with_offers += bool(results)
+                job.advance(len(raw_chunk))
+    finally:
+        if domain_file and os.path.exists(domain_file):
+            os.remove(domain_file)
+    
+    if not domains_searched:
+        raise ValueError("No valid domains provided")
+    
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            logger.warning(f"Lookup job {job.id}: user {user_id} no longer exists, search not recorded")
+        else:
+            usage_service.record_search(
+                db, user, f"Bulk lookup: {_describe_search(first_domains, domains_searched)}", total_offers
+            )
+    finally:
+        db.close()
+    
+    return {
+        "total_domains_searched": domains_searched,
+        "domains_with_offers": domains_with_offers,
+        "total_offers_found": total_offers,
+    }
+
+
+def _get_lookup_job(job_id: str, current_user: User) -> Job:
+    """Get a lookup job owned by the user (admins can see every job)."""
+    job = job_manager.get(job_id)
+    if not job or job.kind != "lookup" or (job.owner_id != current_user.id and not current_user.is_admin):
+        raise HTTPException(status_code=404, detail="Lookup job not found")
+    return job
+
+
+def _iter_job_csv(path: str, batch_size: int = 1000) -> Iterator[str]:
+    """Convert a job's NDJSON result file to CSV, one row per offer."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(JOB_CSV_COLUMNS)
+    with open(path) as f:
+        for count, line in enumerate(f, 1):
+            item = json.loads(line)
+            # Domains without offers still get a row so every input is accounted for
+            for offer in item["offers"] or [{}]:
+                writer.writerow([item["domain"]] + [offer.get(column, "") for column in JOB_CSV_COLUMNS[1:]])
+            if count % batch_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+    yield buffer.getvalue()
+
+
+@router.post("/jobs", response_model=JobResponse, status_code=202)
+async def create_lookup_job(
+    data: str = Form("{}"),
+    file: Optional[UploadFile] = File(None),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Start a bulk lookup for any number of domains.
+    
+    Domains come from the `domains` list in the JSON `data` field, an
+    uploaded .csv/.txt file (first column, one domain per line), or both.
+    The list is processed in chunks on a background worker; poll
+    GET /lookup/jobs/{id} for progress and download the results from
+    GET /lookup/jobs/{id}/results. The whole job counts as one search.
+    """
+    try:
+        job_request = LookupJobRequest(**json.loads(data))
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Invalid request data: {str(e)}")
+    
+    listed_domains = list(job_request.domains)
+    if file is not None and not file.filename.lower().endswith(('.csv', '.txt')):
+        raise HTTPException(status_code=400, detail="Domain list must be a CSV or TXT file")
+    if not listed_domains and file is None:
+        raise HTTPException(status_code=400, detail="No domains provided")
+    
+    await db.run_sync(_check_search_allowed, current_user)
+    
+    job = Job("lookup", current_user.id, total=len(listed_domains))
+    domain_file = None
+    if file is not None:
+        domain_file = job_manager.result_path(job, "domains")
+        # Removed by the worker, or with the job if it is cancelled before it starts
+        job.result_path = domain_file
+        await _spool_domain_file(file, domain_file)
+    
+    # The job manager stores the job with a synchronous session
+    await run_in_threadpool(
+        job_manager.submit, job,
+        lambda job: _run_lookup_job(job, current_user.id, listed_domains, domain_file, job_request)
+    )
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+def get_lookup_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user_async)
+):
+    """
+    Get the status and progress of a bulk lookup job.
+    """
+    return _get_lookup_job(job_id, current_user).to_dict()
+
+
+@router.get("/jobs/{job_id}/results")
+def download_lookup_job_results(
+    job_id: str,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    current_user: User = Depends(get_current_user_async)
+):
+    """
+    Download the results of a completed bulk lookup job as CSV or NDJSON.
+    """
+    job = _get_lookup_job(job_id, current_user)
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Lookup job is {job.status}")
+    
+    if format == "ndjson":
+        return FileResponse(job.result_path, media_type="application/x-ndjson", filename=f"lookup-{job.id}.ndjson")
+    
+    return StreamingResponse(
+        _iter_job_csv(job.result_path),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="lookup-{job.id}.csv"'}
+    )
+
+
+def _get_stats(db: Session) -> Dict:
     offer_service = OfferService(db)
     domain_service = DomainService(db)
     
-    stats = {
+    return {
         "total_domains": domain_service.get_total_domains(),
         "total_offers": offer_service.get_total_offers(),
         "total_marketplaces": offer_service.get_total_marketplaces(),
         "avg_price_usd": offer_service.get_average_price_usd(),
         "price_range_usd": offer_service.get_price_range_usd()
     }
-    
-    return stats
+
+
+@router.get("/stats")
+async def get_lookup_stats(db: AsyncSession = Depends(get_async_db)):
+    """
+    Get statistics about the lookup system.
+    """
+    return await db.run_sync(_get_stats)
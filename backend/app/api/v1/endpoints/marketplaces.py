@@ -1,23 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.services.marketplace_service import MarketplaceService
 from app.schemas.marketplace import MarketplaceCreate, MarketplaceResponse, MarketplaceList
-from app.api.v1.endpoints.auth import get_current_user
+from app.api.v1.endpoints.auth import get_current_user_async
 from app.models.user import User
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[MarketplaceResponse])
-async def get_marketplaces(db: Session = Depends(get_db)):
+async def get_marketplaces(db: AsyncSession = Depends(get_async_db)):
     """
     Get all marketplaces.
     """
-    marketplace_service = MarketplaceService(db)
-    marketplaces = marketplace_service.get_all_marketplaces()
+    marketplaces = await db.run_sync(
+        lambda session: MarketplaceService(session).get_all_marketplaces()
+    )
     
     return [
         MarketplaceResponse(
@@ -36,8 +38,8 @@ async def get_marketplaces(db: Session = Depends(get_db)):
 @router.post("/", response_model=MarketplaceResponse)
 async def create_marketplace(
     marketplace: MarketplaceCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Create a new marketplace. Requires admin privileges.
@@ -46,19 +48,22 @@ async def create_marketplace(
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    marketplace_service = MarketplaceService(db)
+    def create(session: Session):
+        marketplace_service = MarketplaceService(session)
+        
+        # Check if marketplace with same slug already exists
+        existing = marketplace_service.get_marketplace_by_slug(marketplace.slug)
+        if existing:
+            raise HTTPException(status_code=400, detail="Marketplace with this slug already exists")
+        
+        # Create marketplace
+        return marketplace_service.get_or_create_marketplace(
+            name=marketplace.name,
+            slug=marketplace.slug,
+            region=marketplace.region
+        )
     
-    # Check if marketplace with same slug already exists
-    existing = marketplace_service.get_marketplace_by_slug(marketplace.slug)
-    if existing:
-        raise HTTPException(status_code=400, detail="Marketplace with this slug already exists")
-    
-    # Create marketplace
-    new_marketplace = marketplace_service.get_or_create_marketplace(
-        name=marketplace.name,
-        slug=marketplace.slug,
-        region=marketplace.region
-    )
+    new_marketplace = await db.run_sync(create)
     
     return MarketplaceResponse(
         id=new_marketplace.id,
@@ -72,12 +77,13 @@ async def create_marketplace(
 
 
 @router.get("/{marketplace_id}", response_model=MarketplaceResponse)
-async def get_marketplace(marketplace_id: int, db: Session = Depends(get_db)):
+async def get_marketplace(marketplace_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Get a specific marketplace by ID.
     """
-    marketplace_service = MarketplaceService(db)
-    marketplace = marketplace_service.get_marketplace_by_id(marketplace_id)
+    marketplace = await db.run_sync(
+        lambda session: MarketplaceService(session).get_marketplace_by_id(marketplace_id)
+    )
     
     if not marketplace:
         raise HTTPException(status_code=404, detail="Marketplace not found")
@@ -94,12 +100,13 @@ async def get_marketplace(marketplace_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/{marketplace_id}/stats")
-async def get_marketplace_stats(marketplace_id: int, db: Session = Depends(get_db)):
+async def get_marketplace_stats(marketplace_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Get statistics for a specific marketplace.
     """
-    marketplace_service = MarketplaceService(db)
-    stats = marketplace_service.get_marketplace_stats(marketplace_id)
+    stats = await db.run_sync(
+        lambda session: MarketplaceService(session).get_marketplace_stats(marketplace_id)
+    )
     
     if not stats:
         raise HTTPException(status_code=404, detail="Marketplace not found")
@@ -110,8 +117,8 @@ async def get_marketplace_stats(marketplace_id: int, db: Session = Depends(get_d
 @router.delete("/{marketplace_id}")
 async def delete_marketplace(
     marketplace_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a marketplace and all associated offers. Requires admin privileges.
@@ -120,8 +127,9 @@ async def delete_marketplace(
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    marketplace_service = MarketplaceService(db)
-    success = marketplace_service.delete_marketplace(marketplace_id)
+    success = await db.run_sync(
+        lambda session: MarketplaceService(session).delete_marketplace(marketplace_id)
+    )
     
     if not success:
         raise HTTPException(status_code=404, detail="Marketplace not found")
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.api.v1.endpoints.auth import get_current_user
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.api.v1.endpoints.auth import get_current_user_async
 from app.models.user import User
 from app.services.usage_service import usage_service
 from app.schemas.usage import UsageStats
@@ -12,11 +12,11 @@ router = APIRouter()
 
 @router.get("/stats", response_model=UsageStats)
 async def get_usage_stats(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current user's usage statistics"""
-    stats = usage_service.get_usage_stats(db, current_user)
+    stats = await db.run_sync(usage_service.get_usage_stats, current_user)
     return stats
 
 
@@ -26,11 +26,11 @@ async def get_usage_stats(
 
 @router.get("/check-limit")
 async def check_search_limit(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Check if user can perform a search"""
-    can_search, message = usage_service.can_perform_search(db, current_user)
+    can_search, message = await db.run_sync(usage_service.can_perform_search, current_user)
     
     return {
         "can_search": can_search,
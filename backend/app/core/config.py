@@ -2,6 +2,7 @@ from pydantic_settings import BaseSettings
 from typing import Optional
 import os
 import sys
+import tempfile
 
 
 class Settings(BaseSettings):
@@ -9,6 +10,7 @@ class Settings(BaseSettings):
     app_name: str = "Backlink Price Finder"
     version: str = "1.0.0"
     debug: bool = False
+    log_level: str = os.getenv("LOG_LEVEL", "INFO")
     
     # Database
     database_url: str = os.getenv("DATABASE_URL", "sqlite:///./backlink_checker.db")
@@ -34,7 +36,37 @@ class Settings(BaseSettings):
     
     # File upload
     max_file_size: int = 50 * 1024 * 1024  # 50MB
+    max_csv_file_size: int = int(os.getenv("MAX_CSV_FILE_SIZE", str(1024 * 1024 * 1024)))  # CSV and XLSX files are streamed, not loaded whole
     allowed_file_types: list = [".csv", ".xlsx", ".xls"]
+    ingest_batch_size: int = 5000  # rows per bulk upsert and commit
+    ingest_chunk_size: int = 50_000  # CSV rows read into memory at a time
+    ingest_copy_enabled: bool = os.getenv("INGEST_COPY_ENABLED", "true").lower() == "true"  # COPY + set-based merge on PostgreSQL
+    ingest_price_history: bool = os.getenv("INGEST_PRICE_HISTORY", "true").lower() == "true"  # record old prices of offers whose price changes
+    ingest_workers: int = int(os.getenv("INGEST_WORKERS", str(min(os.cpu_count() or 1, 4))))  # processes parsing the files of a batch ingest
+    ingest_writers: int = int(os.getenv("INGEST_WRITERS", "4"))  # marketplaces of a batch ingest written concurrently (1 on SQLite)
+    ingest_dedup_policy: str = os.getenv("INGEST_DEDUP_POLICY", "last_wins")  # row kept when a file repeats a domain: last_wins, first_wins or lowest_price
+    ingest_log_interval: float = float(os.getenv("INGEST_LOG_INTERVAL", "10"))  # seconds between ingest progress log lines
+    ingest_checkpoints_enabled: bool = os.getenv("INGEST_CHECKPOINTS", "true").lower() == "true"  # save upload progress per chunk to resume interrupted ingests
+    ingest_resume_on_startup: bool = os.getenv("INGEST_RESUME_ON_STARTUP", "true").lower() == "true"  # resume ingests interrupted by a restart (needs a persistent JOB_RESULTS_DIR)
+    ingest_checkpoint_stale_seconds: int = int(os.getenv("INGEST_CHECKPOINT_STALE_SECONDS", "300"))  # running ingest of another host without a saved chunk for this long is taken over
+    
+    # Lookup
+    offer_index_enabled: bool = os.getenv("OFFER_INDEX_ENABLED", "true").lower() == "true"
+    domain_demand_flush_interval: float = 30.0  # seconds
+    domain_demand_batch_size: int = 1000
+    domain_bloom_capacity: int = 1_000_000  # expected number of known domains
+    domain_bloom_fp_rate: float = float(os.getenv("DOMAIN_BLOOM_FP_RATE", "0.01"))
+    domain_normalize_cache_size: int = 100_000  # memoized raw domain -> eTLD+1 results
+    lookup_cache_max_offers: int = int(os.getenv("LOOKUP_CACHE_MAX_OFFERS", "100000"))  # 0 disables the cache
+    lookup_job_chunk_size: int = 1000  # domains per chunk of a bulk lookup job
+    cache_sync_interval: float = float(os.getenv("CACHE_SYNC_INTERVAL", "2"))  # seconds between applying other processes' offer changes to the lookup caches
+    cache_sync_window_seconds: int = 600  # offer changes are read again this long; must exceed the longest ingest transaction
+    
+    # Background jobs
+    job_max_workers: int = int(os.getenv("JOB_MAX_WORKERS", "2"))
+    job_retention_seconds: int = 24 * 60 * 60  # finished jobs and their result files
+    job_results_dir: str = os.getenv("JOB_RESULTS_DIR", os.path.join(tempfile.gettempdir(), "backlink-checker-jobs"))
+    job_sync_interval: float = 1.0  # seconds between saving a running job's progress and checking whether it was cancelled
     
     # External APIs
     exchange_rate_api_url: str = "https://api.exchangerate-api.com/v4/latest/USD"
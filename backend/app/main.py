@@ -2,6 +2,20 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.v1.api import api_router
+from app.api.v1.endpoints.ingest import resume_interrupted_ingests
+from app.core.database import SessionLocal
+from app.services.offer_index import offer_index
+from app.services.domain_demand_service import domain_demand_recorder
+from app.services.domain_bloom_filter import known_domain_filter
+from app.services.cache_sync import cache_sync
+from app.services.domain_service import DomainService
+from app.services.job_manager import job_manager
+import logging
+
+# Application loggers; uvicorn only configures its own
+logging.basicConfig(level=settings.log_level, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+logger = logging.getLogger(__name__)
 
 # Create FastAPI app
 app = FastAPI(
@@ -26,6 +40,109 @@ app.add_middleware(
 app.include_router(api_router, prefix=settings.api_v1_prefix)
 
 
+@app.on_event("startup")
+def prime_cache_sync():
+    """Skip the offer changes the index and filter built below already include."""
+    try:
+        cache_sync.prime()
+    except Exception as e:
+        logger.error(f"Failed to prime lookup cache sync: {e}")
+
+
+@app.on_event("startup")
+def build_offer_index():
+    """Load the in-memory offer index used by the lookup endpoint."""
+    if not settings.offer_index_enabled:
+        return
+    
+    db = SessionLocal()
+    try:
+        count = offer_index.build(db)
+        logger.info(f"Offer index built with {count} offers")
+    except Exception as e:
+        # Lookups fall back to the database until the index is available
+        logger.error(f"Failed to build offer index: {e}")
+    finally:
+        db.close()
+
+
+@app.on_event("startup")
+def warm_up_domain_normalization():
+    """Load the bundled public suffix list before the first request."""
+    DomainService.warm_up()
+
+
+@app.on_event("startup")
+def load_known_domain_filter():
+    """Load the bloom filter of known root domains."""
+    db = SessionLocal()
+    try:
+        count = known_domain_filter.load(db)
+        logger.info(f"Known-domain filter loaded with {count} domains")
+    except Exception as e:
+        # Every domain is treated as possibly known until the filter loads
+        logger.error(f"Failed to load known-domain filter: {e}")
+    finally:
+        db.close()
+
+
+@app.on_event("startup")
+def start_domain_demand_recorder():
+    """Start the background writer for searched-but-unknown domains."""
+    domain_demand_recorder.start()
+
+
+@app.on_event("startup")
+def start_cache_sync():
+    """Start applying the offer changes of other processes to the lookup caches."""
+    cache_sync.start()
+
+
+@app.on_event("startup")
+def fail_interrupted_jobs():
+    """Mark the jobs a restart interrupted as failed, before resuming their ingests."""
+    try:
+        count = job_manager.fail_interrupted()
+        logger.info(f"Marked {count} interrupted jobs failed")
+    except Exception as e:
+        logger.error(f"Failed to mark interrupted jobs: {e}")
+
+
+@app.on_event("startup")
+def resume_ingests():
+    """Resume the ingests a restart interrupted, from their last committed chunk."""
+    if not (settings.ingest_checkpoints_enabled and settings.ingest_resume_on_startup):
+        return
+    
+    try:
+        jobs = resume_interrupted_ingests()
+        logger.info(f"Resumed {len(jobs)} interrupted ingests")
+    except Exception as e:
+        # Uploading a file again resumes its ingest too
+        logger.error(f"Failed to resume interrupted ingests: {e}")
+
+
+@app.on_event("shutdown")
+def stop_domain_demand_recorder():
+    """Flush pending domain demand before the process exits."""
+    try:
+        domain_demand_recorder.stop()
+    except Exception as e:
+        logger.error(f"Failed to flush domain demand: {e}")
+
+
+@app.on_event("shutdown")
+def stop_cache_sync():
+    """Stop the lookup cache sync thread."""
+    cache_sync.stop()
+
+
+@app.on_event("shutdown")
+def stop_job_manager():
+    """Stop the background job workers."""
+    job_manager.shutdown()
+
+
 @app.get("/")
 async def root():
     return {
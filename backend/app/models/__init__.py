@@ -1,15 +1,23 @@
 from .marketplace import Marketplace
 from .domain import Domain
+from .domain_demand import DomainDemand
 from .offer import Offer
 from .price_history import PriceHistory
 from .user import User
 from .fx_rate import FXRate
+from .ingest_checkpoint import IngestCheckpoint
+from .cache_invalidation import CacheInvalidation
+from .background_job import BackgroundJob
 
 __all__ = [
     "Marketplace",
     "Domain", 
+    "DomainDemand",
     "Offer",
     "PriceHistory",
     "FXRate",
+    "IngestCheckpoint",
+    "CacheInvalidation",
+    "BackgroundJob",
     "User"
 ]
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, Boolean, Index
+from app.core.database import Base
+
+
+class BackgroundJob(Base):
+    __tablename__ = "background_jobs"
+    
+    id = Column(String(32), primary_key=True)  # Job.id
+    kind = Column(String(20), nullable=False)  # ingest or lookup
+    owner_id = Column(Integer, nullable=False)  # User who started the job
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, completed, failed, cancelled
+    total = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    result = Column(JSON, nullable=True)  # Result summary, or the running counts of an unfinished job
+    result_path = Column(Text, nullable=True)  # Output file (or directory) on the host of the worker
+    cancel_requested = Column(Boolean, nullable=False, default=False)  # Set by any process, read by the worker
+    worker = Column(String(255), nullable=True)  # host:pid:start of the process running it (see job_manager.worker_id)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)  # Last saved progress
+    
+    __table_args__ = (
+        Index('idx_background_jobs_status', 'status'),
+        Index('idx_background_jobs_updated_at', 'updated_at'),
+    )
+    
+    def __repr__(self):
+        return f"<BackgroundJob(id='{self.id}', kind='{self.kind}', status='{self.status}')>"
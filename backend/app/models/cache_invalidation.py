@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
+from app.core.database import Base
+
+
+class CacheInvalidation(Base):
+    __tablename__ = "cache_invalidations"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    worker = Column(String(32), nullable=False)  # Process that made the change (see CacheSync.process_id)
+    kind = Column(String(20), nullable=False)  # domains, marketplace or all
+    domain_ids = Column(JSON, nullable=True)  # Domains whose offers changed (kind domains)
+    marketplace_id = Column(Integer, nullable=True)  # Marketplace that changed (kind marketplace)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    
+    # Other processes read the recent changes they haven't applied yet
+    __table_args__ = (
+        Index('idx_cache_invalidations_created_at', 'created_at'),
+    )
+    
+    def __repr__(self):
+        return f"<CacheInvalidation(id={self.id}, kind='{self.kind}', worker='{self.worker}')>"
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class DomainDemand(Base):
+    __tablename__ = "domain_demand"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    root_domain = Column(String(255), nullable=False, unique=True)
+    search_count = Column(Integer, nullable=False, default=0)
+    first_searched_at = Column(DateTime(timezone=True), nullable=True)
+    last_searched_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Index for "most wanted" reports
+    __table_args__ = (
+        Index('idx_domain_demand_search_count', 'search_count'),
+    )
+    
+    def __repr__(self):
+        return f"<DomainDemand(id={self.id}, root_domain='{self.root_domain}', search_count={self.search_count})>"
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, Index
+from app.core.database import Base
+
+
+class IngestCheckpoint(Base):
+    __tablename__ = "ingest_checkpoints"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    file_hash = Column(String(64), nullable=False)  # SHA-256 of the uploaded file
+    request_hash = Column(String(64), nullable=False)  # SHA-256 of the upload request (marketplace, mapping, defaults)
+    request = Column(Text, nullable=False)  # The upload request as JSON, to resume without the client
+    path = Column(Text, nullable=True)  # Spooled upload file of the current or last run
+    status = Column(String(20), nullable=False, default="running")  # running, completed, failed, cancelled
+    job_id = Column(String(32), nullable=True)  # Ingest job of the current or last run
+    owner_id = Column(Integer, nullable=True)  # User who uploaded the file
+    worker = Column(String(255), nullable=True)  # host:pid:start of the process running it (see job_manager.worker_id)
+    marketplace_id = Column(Integer, nullable=True)
+    chunk_size = Column(Integer, nullable=False)  # Rows per chunk; a resumed run reads the same chunks
+    chunks_committed = Column(Integer, nullable=False, default=0)
+    rows_committed = Column(Integer, nullable=False, default=0)
+    results = Column(JSON, nullable=True)  # Running counts of CSVProcessingService as of the last committed chunk
+    seen_at = Column(DateTime(timezone=True), nullable=True)  # last_seen_at of the upload's offers, kept across runs
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)  # Also the heartbeat of a running ingest
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        # One checkpoint per file and request; uploading it again resumes or skips it
+        Index('uq_ingest_checkpoints_file_request', 'file_hash', 'request_hash', unique=True),
+        Index('idx_ingest_checkpoints_status', 'status'),
+    )
+    
+    def __repr__(self):
+        return (f"<IngestCheckpoint(id={self.id}, status='{self.status}', chunks_committed={self.chunks_committed}, "
+                f"rows_committed={self.rows_committed})>")
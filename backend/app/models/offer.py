@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Numeric, Text, Index
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, ForeignKey, Numeric, Text, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -18,6 +18,8 @@ class Offer(Base):
     dofollow = Column(Boolean, default=True)
     first_seen_at = Column(DateTime(timezone=True), nullable=True)
     last_seen_at = Column(DateTime(timezone=True), nullable=True)
+    content_hash = Column(BigInteger, nullable=True)  # Hash of the feed fields, see csv_processing_service
+    delisted_at = Column(DateTime(timezone=True), nullable=True)  # Missing from the marketplace's latest full upload
     
     # Relationships
     domain = relationship("Domain", backref="offers")
@@ -25,7 +27,8 @@ class Offer(Base):
     
     # Indexes for performance
     __table_args__ = (
-        Index('idx_offers_domain_marketplace', 'domain_id', 'marketplace_id'),
+        # One offer per domain and marketplace; target of the ingest upsert
+        Index('uq_offers_domain_marketplace', 'domain_id', 'marketplace_id', unique=True),
         Index('idx_offers_price_usd', 'price_usd'),
         Index('idx_offers_last_seen', 'last_seen_at'),
     )
@@ -1,6 +1,6 @@
 from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import backref, relationship
 from app.core.database import Base
 
 
@@ -8,14 +8,14 @@ class PriceHistory(Base):
     __tablename__ = "price_history"
     
     id = Column(Integer, primary_key=True, index=True)
-    offer_id = Column(Integer, ForeignKey("offers.id"), nullable=False, index=True)
+    offer_id = Column(Integer, ForeignKey("offers.id", ondelete="CASCADE"), nullable=False, index=True)
     price_amount = Column(Numeric(10, 2), nullable=False)
     price_currency = Column(String(3), nullable=False)
     price_usd = Column(Numeric(10, 2), nullable=True)
     seen_at = Column(DateTime(timezone=True), nullable=True)
     
-    # Relationships
-    offer = relationship("Offer", backref="price_history")
+    # Relationships; the database deletes the history of a deleted offer
+    offer = relationship("Offer", backref=backref("price_history", passive_deletes=True))
     
     # Indexes for performance
     __table_args__ = (
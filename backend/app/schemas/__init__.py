@@ -1,8 +1,9 @@
 from .marketplace import MarketplaceCreate, MarketplaceResponse, MarketplaceList
 from .domain import DomainCreate, DomainResponse, DomainList
 from .offer import OfferCreate, OfferResponse, OfferList, OfferLookupResponse
-from .lookup import DomainLookupRequest, DomainLookupResponse
+from .lookup import DomainLookupRequest, DomainLookupResponse, LookupJobRequest
 from .csv_upload import CSVUploadRequest, CSVUploadResponse
+from .job import JobResponse
 
 __all__ = [
     "MarketplaceCreate",
@@ -17,6 +18,8 @@ __all__ = [
     "OfferLookupResponse",
     "DomainLookupRequest",
     "DomainLookupResponse",
+    "LookupJobRequest",
     "CSVUploadRequest",
-    "CSVUploadResponse"
+    "CSVUploadResponse",
+    "JobResponse"
 ]
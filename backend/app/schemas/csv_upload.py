@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Dict, List, Optional
+from typing import Dict, List, Literal, Optional
 from datetime import datetime
 
 
@@ -21,6 +21,22 @@ class CSVUploadRequest(BaseModel):
     currency_default: str = Field("USD", description="Default currency if not specified in CSV")
     content_default: bool = Field(False, description="Default value for includes_content if not specified")
     dofollow_default: bool = Field(True, description="Default value for dofollow if not specified")
+    delist_missing: bool = Field(
+        False, description="Treat the upload as the marketplace's full feed and delist offers it doesn't contain"
+    )
+    delist_marketplaces: List[str] = Field(
+        [], description="Slugs of the marketplaces an upload grouped by its marketplace column is the full feed of; "
+                        "only these are delisted"
+    )
+    dedup_policy: Optional[Literal['last_wins', 'first_wins', 'lowest_price']] = Field(
+        None, description="Row kept when the file repeats a domain (default: INGEST_DEDUP_POLICY, last_wins)"
+    )
+
+
+class StageTiming(BaseModel):
+    time_ms: int
+    rows: int
+    rows_per_second: float
 
 
 class CSVUploadResponse(BaseModel):
@@ -31,8 +47,53 @@ class CSVUploadResponse(BaseModel):
     new_domains_added: int
     new_offers_added: int
     updated_offers: int
+    # Offers whose content was unchanged; only their last_seen_at was bumped
+    unchanged_offers: int = 0
+    # Offers of the marketplace missing from the upload, flagged as delisted
+    delisted_offers: int = 0
+    # Updated offers whose price changed; their old price went to price_history
+    price_changes: int = 0
+    # Rows collapsed because the file repeats their domain (see dedup_policy)
+    duplicate_rows: int = 0
     processing_time_ms: int
+    rows_per_second: float = 0.0
+    # Currencies without a USD rate, with the number of rows imported without a USD price
+    unresolved_currencies: Dict[str, int] = {}
+    # Rows committed by interrupted earlier runs of the same file, which this run skipped
+    resumed_rows: int = 0
+    # The same file was already ingested and nothing was written; the counts are those of that ingest
+    already_imported: bool = False
+    # Time and rows per ingest stage that ran (parse, normalize, fx, copy,
+    # domain_resolve, offer_upsert, commit, index_refresh, delist)
+    stages: Dict[str, StageTiming] = {}
+    # Summary per marketplace of an upload grouped by its marketplace column
+    marketplaces: List["CSVUploadResponse"] = []
     errors: List[str] = []
     
     class Config:
         from_attributes = True
+
+
+class BatchUploadResponse(BaseModel):
+    files: int
+    workers: int = Field(..., description="Processes that parsed the files")
+    writers: int = Field(..., description="Marketplaces written concurrently")
+    total_rows_processed: int
+    successful_imports: int
+    failed_imports: int
+    new_domains_added: int
+    new_offers_added: int
+    updated_offers: int
+    unchanged_offers: int
+    delisted_offers: int
+    price_changes: int
+    duplicate_rows: int
+    processing_time_ms: int
+    rows_per_second: float
+    # Stage times summed over the marketplaces; parse and normalize run in
+    # parallel worker processes, so they can add up to more than the batch took
+    stages: Dict[str, StageTiming] = {}
+    # One summary per marketplace; their row errors are in errors below
+    marketplaces: List[CSVUploadResponse] = []
+    # Row and file errors of all files, prefixed with the file name
+    errors: List[str] = []
@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+from datetime import datetime
+
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str
+    total: int
+    processed: int
+    progress: float
+    items_per_second: float = 0.0
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    error: Optional[str]
+    result: Dict[str, Any] = {}
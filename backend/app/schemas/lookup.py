@@ -4,14 +4,21 @@ from decimal import Decimal
 from datetime import datetime
 
 
-class DomainLookupRequest(BaseModel):
-    domains: List[str] = Field(..., description="List of domains to lookup", min_items=1, max_items=1000)
+class LookupFilters(BaseModel):
     marketplaces: Optional[List[str]] = Field(None, description="Filter by specific marketplaces")
     min_price_usd: Optional[float] = Field(None, description="Minimum price in USD")
     max_price_usd: Optional[float] = Field(None, description="Maximum price in USD")
     best_price_only: Optional[bool] = Field(False, description="Return only the best price per domain")
 
 
+class DomainLookupRequest(LookupFilters):
+    domains: List[str] = Field(..., description="List of domains to lookup", min_items=1, max_items=1000)
+
+
+class LookupJobRequest(LookupFilters):
+    domains: List[str] = Field(default_factory=list, description="Domains to lookup, in addition to any uploaded file")
+
+
 class OfferResult(BaseModel):
     domain: str
     marketplace: str
@@ -38,3 +45,10 @@ class DomainLookupResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class DomainLookupStreamLine(BaseModel):
+    """One NDJSON line of POST /lookup/stream."""
+    domain: str
+    offers: List[OfferResult]
+    best_price_usd: Optional[float]
@@ -0,0 +1,287 @@
+from sqlalchemy.orm import Session
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+from datetime import datetime
+import logging
+import multiprocessing
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.schemas.csv_upload import BatchUploadResponse, CSVUploadRequest, CSVUploadResponse
+from app.services.csv_processing_service import (
+    CSVProcessingService, estimate_rows, prepare_frame, read_upload, upload_response
+)
+from app.services.ingest_metrics import StageTimer
+from app.services.job_manager import Job
+
+logger = logging.getLogger(__name__)
+
+# Totals summed over the marketplaces of a batch, as (response field, results key)
+SUMMED_COUNTS = [
+    ('total_rows_processed', 'total_rows'),
+    ('successful_imports', 'successful_imports'),
+    ('failed_imports', 'failed_imports'),
+    ('new_domains_added', 'new_domains'),
+    ('new_offers_added', 'new_offers'),
+    ('updated_offers', 'updated_offers'),
+    ('unchanged_offers', 'unchanged_offers'),
+    ('delisted_offers', 'delisted_offers'),
+    ('price_changes', 'price_changes'),
+    ('duplicate_rows', 'duplicate_rows'),
+]
+
+
+def prepare_file(path: str, upload_request: CSVUploadRequest, spool_dir: str) -> Dict[str, Any]:
+    """
+    Read and validate one file of a batch; runs in a worker process.
+    
+    Each chunk's prepare_frame output is pickled to spool_dir instead of
+    being sent back, so neither process holds more than a chunk of the file.
+    
+    Args:
+        path: Upload file
+        upload_request: Marketplace, column mapping and defaults of the file
+        spool_dir: Directory for the prepared chunks
+    
+    Returns:
+        Dict with the chunk files as (path, rows read), the total rows and
+        the parse and normalize times (StageTimer.to_dict())
+    """
+    os.makedirs(spool_dir, exist_ok=True)
+    timer = StageTimer()
+    chunks = []
+    frames = timer.frames('parse', read_upload(path, upload_request.column_mapping))
+    for number, df in enumerate(frames):
+        with timer.stage('normalize', len(df)):
+            prepared = prepare_frame(df, upload_request)
+        chunk_path = os.path.join(spool_dir, f"{number}.pkl")
+        with open(chunk_path, "wb") as f:
+            pickle.dump(prepared, f, protocol=pickle.HIGHEST_PROTOCOL)
+        chunks.append((chunk_path, len(df)))
+    return {"chunks": chunks, "total_rows": sum(rows for _, rows in chunks), "stages": timer.to_dict()}
+
+
+class BatchIngestService:
+    """
+    Ingest many upload files at once.
+    
+    Files are read and validated in a process pool, since pandas parsing and
+    domain normalization are CPU-bound. Writes are partitioned by
+    marketplace: one writer thread per marketplace feeds that marketplace's
+    files, in the given order, through a single CSVProcessingService, so its
+    writes are serialized and a later file wins when a domain repeats.
+    Different marketplaces are written concurrently, except when a file
+    takes its marketplaces from a column: which marketplaces it writes is
+    only known once it is read, so the batch then has a single writer, and
+    the rows such a file routes to a marketplace go through the same
+    CSVProcessingService as that marketplace's other files.
+    """
+
+    def __init__(
+        self,
+        files: List[Tuple[str, CSVUploadRequest]],
+        workers: Optional[int] = None,
+        writers: Optional[int] = None
+    ):
+        self.files = files
+        self.workers = max(1, min(workers or settings.ingest_workers, len(files)))
+        # SQLite has a single writer; concurrent write transactions would only wait on each other
+        grouped = any(upload_request.column_mapping.marketplace_column for _, upload_request in files)
+        self.writers = 1 if engine.dialect.name == "sqlite" or grouped else max(1, writers or settings.ingest_writers)
+        # Stage times of every marketplace written
+        self.timer = StageTimer()
+        # last_seen_at of every offer of the batch
+        self.seen_at = datetime.utcnow()
+        self._lock = threading.Lock()
+
+    def process(self, job: Optional[Job] = None) -> Dict[str, Any]:
+        """
+        Ingest every file and return the batch summary.
+        
+        Args:
+            job: Background job to report progress to. Cancelling it stops
+                every writer before its next chunk; committed chunks are kept
+                and nothing is delisted.
+        
+        Returns:
+            BatchUploadResponse as a dict
+        """
+        start_time = time.time()
+        estimates = [estimate_rows(path) for path, _ in self.files]
+        if job:
+            job.total = sum(estimates)
+        
+        # File indexes by marketplace, in their given order; files grouped by
+        # a marketplace column can write to any marketplace, so then all files
+        # form one group
+        groups: Dict[str, List[int]] = {}
+        for index, (_, upload_request) in enumerate(self.files):
+            key = upload_request.marketplace_slug if self.writers > 1 else ""
+            groups.setdefault(key, []).append(index)
+        
+        logger.info(f"Ingesting {len(self.files)} files for {len(groups)} marketplace groups "
+                    f"with {self.workers} workers and {self.writers} writers...")
+        
+        spool_dir = tempfile.mkdtemp(prefix="ingest-batch-")
+        # Spawned, not forked: the server process has threads a fork would copy mid-state
+        pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            prepared = [
+                pool.submit(prepare_file, path, upload_request, os.path.join(spool_dir, str(index)))
+                for index, (path, upload_request) in enumerate(self.files)
+            ]
+            with ThreadPoolExecutor(max_workers=self.writers, thread_name_prefix="ingest-writer") as writers:
+                written = list(writers.map(
+                    lambda indexes: self._write_files(indexes, prepared, estimates, job),
+                    groups.values()
+                ))
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            shutil.rmtree(spool_dir, ignore_errors=True)
+        
+        elapsed = time.time() - start_time
+        summaries = [summary for group_summaries, _ in written for summary in group_summaries]
+        totals = {
+            field: sum(getattr(summary, field) for summary in summaries)
+            for field, _ in SUMMED_COUNTS
+        }
+        if job:
+            job.total = totals['total_rows_processed']
+        
+        response = BatchUploadResponse(
+            files=len(self.files),
+            workers=self.workers,
+            writers=self.writers,
+            processing_time_ms=int(elapsed * 1000),
+            rows_per_second=round(totals['total_rows_processed'] / elapsed, 1) if elapsed > 0 else 0.0,
+            stages=self.timer.summary(),
+            marketplaces=summaries,
+            errors=[error for _, errors in written for error in errors],
+            **totals
+        )
+        logger.info(f"Batch ingest complete: {response.total_rows_processed} rows in {elapsed:.1f}s "
+                    f"({response.rows_per_second} rows/s)")
+        return response.model_dump()
+
+    def _write_files(
+        self,
+        indexes: List[int],
+        prepared: List[Future],
+        estimates: List[int],
+        job: Optional[Job]
+    ) -> Tuple[List[CSVUploadResponse], List[str]]:
+        """
+        Writer of a group of files: write their prepared chunks in order.
+        
+        Each marketplace has one CSVProcessingService for the whole group,
+        whether its rows come from its own files or from files grouped by a
+        marketplace column. Its rows thus share one dedup state and one
+        seen_at, and it is delisted once, after all of them: when any file
+        asks for it (delist_missing, or delist_marketplaces for a grouped
+        file) and every file of the group was read. A marketplace is only
+        created once one of its files has been read.
+        
+        Returns:
+            Tuple of (upload summary of each marketplace written, and the
+            errors prefixed with their file name)
+        """
+        start_time = time.time()
+        errors: List[str] = []
+        # Writer of each marketplace, by ID, shared with the grouped files' writers
+        writers: Dict[int, CSVProcessingService] = {}
+        delisted: Set[int] = set()
+        # A file that couldn't be read would make all its offers look delisted
+        all_files_read = True
+        db = SessionLocal()
+        try:
+            for index in indexes:
+                path, upload_request = self.files[index]
+                name = os.path.basename(path)
+                try:
+                    prepared_file = prepared[index].result()
+                    service = self._file_writer(db, upload_request, writers)
+                except Exception as e:
+                    logger.error(f"Error reading {name}: {e}")
+                    errors.append(f"{name}: {str(e)}")
+                    all_files_read = False
+                    self._correct_total(job, estimates[index], 0)
+                    continue
+                
+                self._correct_total(job, estimates[index], prepared_file['total_rows'])
+                if service.grouped:
+                    # Its writers count the rows they are given
+                    with self._lock:
+                        self.timer.merge(prepared_file['stages'])
+                else:
+                    service.results['total_rows'] += prepared_file['total_rows']
+                    service.timer.merge(prepared_file['stages'])
+                for chunk_path, rows in prepared_file['chunks']:
+                    if job:
+                        job.check_cancelled()
+                    with open(chunk_path, "rb") as f:
+                        clean, row_errors = pickle.load(f)
+                    os.remove(chunk_path)
+                    
+                    service.write_prepared(clean, row_errors, job)
+                    self._move_errors(service, errors, name)
+                    if job:
+                        # Skipped and invalid rows; write_prepared counts the valid ones
+                        job.advance(rows - len(clean))
+                
+                if not upload_request.delist_missing:
+                    continue
+                if service.grouped:
+                    delisted.update(writer.marketplace.id for writer in service.delisted_writers())
+                else:
+                    delisted.add(service.marketplace.id)
+            
+            summaries = []
+            for marketplace_id, writer in writers.items():
+                if all_files_read and marketplace_id in delisted:
+                    writer.delist_missing_offers()
+                writer.complete(delist=False)
+                self._move_errors(writer, errors, writer.marketplace.slug)
+                with self._lock:
+                    self.timer.merge(writer.timer.to_dict())
+                summaries.append(upload_response(marketplace_id, writer.results, time.time() - start_time))
+            return summaries, errors
+        finally:
+            db.close()
+
+    def _file_writer(
+        self,
+        db: Session,
+        upload_request: CSVUploadRequest,
+        writers: Dict[int, CSVProcessingService]
+    ) -> CSVProcessingService:
+        """
+        CSVProcessingService to write a file through.
+        
+        A file grouped by a marketplace column gets its own, which routes its
+        rows to the writers in writers (adding the ones it lacks); any other
+        file gets its marketplace's writer.
+        """
+        service = CSVProcessingService(db, upload_request, [])
+        service.seen_at = self.seen_at
+        if service.grouped:
+            service.marketplace_writers = writers
+            return service
+        return writers.setdefault(service.marketplace.id, service)
+
+    @staticmethod
+    def _move_errors(service: CSVProcessingService, errors: List[str], prefix: str) -> None:
+        """Move the service's new errors to errors, prefixed; they are reported once for the batch."""
+        errors.extend(f"{prefix}: {error}" for error in service.results['errors'])
+        service.results['errors'].clear()
+
+    def _correct_total(self, job: Optional[Job], estimate: int, rows: int) -> None:
+        """Replace a file's estimated row count in the job total with the rows actually read."""
+        if job:
+            with self._lock:
+                job.total += rows - estimate
@@ -0,0 +1,185 @@
+from sqlalchemy.orm import Session
+from typing import Callable, Dict, Iterable, Optional
+from datetime import datetime, timedelta
+import logging
+import threading
+import uuid
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.cache_invalidation import CacheInvalidation
+from app.models.domain import Domain
+from app.services.domain_bloom_filter import known_domain_filter
+from app.services.lookup_cache import lookup_cache
+from app.services.offer_index import offer_index
+
+logger = logging.getLogger(__name__)
+
+# Domains refreshed per query when applying a change
+APPLY_BATCH_SIZE = 5000
+
+
+class CacheSync:
+    """
+    Keeps this process's lookup structures (offer index, known-domain
+    filter, lookup cache) in step with the writes of other processes:
+    the other API workers and ingest_files.py.
+
+    A write that refreshes the local structures also records the change in
+    cache_invalidations, in the transaction that makes it, so the change
+    and its record become visible together. A background thread applies
+    the other processes' changes every interval seconds; lookups never
+    wait for it, so they may miss a change for that long. Changes are read
+    again for window seconds after they were made, so a change whose
+    transaction commits late is still applied.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        interval: float = settings.cache_sync_interval,
+        window: int = settings.cache_sync_window_seconds
+    ):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.window = timedelta(seconds=window)
+        # Unlike host:pid, never reused by a later process
+        self.process_id = uuid.uuid4().hex
+        # Changes applied here, with the time they were, until they leave the window
+        self._applied: Dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._pruned_at = datetime.utcnow()
+
+    def record_domains(self, db: Session, domain_ids: Iterable[int]) -> None:
+        """Record, in the session's transaction, that the offers of these domains changed."""
+        domain_ids = sorted({int(domain_id) for domain_id in domain_ids})
+        if domain_ids:
+            self._record(db, "domains", domain_ids=domain_ids)
+
+    def record_marketplace(self, db: Session, marketplace_id: int) -> None:
+        """Record, in the session's transaction, that a marketplace or its offers changed."""
+        self._record(db, "marketplace", marketplace_id=marketplace_id)
+
+    def record_rebuild(self, db: Session) -> None:
+        """Record, in the session's transaction, a change that needs every structure rebuilt."""
+        self._record(db, "all")
+
+    def _record(self, db: Session, kind: str, **values) -> None:
+        db.add(CacheInvalidation(worker=self.process_id, kind=kind, created_at=datetime.utcnow(), **values))
+
+    def prime(self) -> None:
+        """
+        Mark the changes committed so far as applied.
+
+        Call before building the offer index and the known-domain filter,
+        which include them.
+        """
+        db = self.session_factory()
+        try:
+            with self._lock:
+                now = datetime.utcnow()
+                for change_id, _ in self._recent(db):
+                    self._applied[change_id] = now
+        finally:
+            db.close()
+
+    def sync(self, db: Session) -> int:
+        """
+        Apply the changes other processes committed since the last sync.
+
+        Returns:
+            Number of changes applied
+        """
+        with self._lock:
+            new_ids = [change_id for change_id, _ in self._recent(db) if change_id not in self._applied]
+            if new_ids:
+                changes = (
+                    db.query(CacheInvalidation)
+                    .filter(CacheInvalidation.id.in_(new_ids))
+                    .order_by(CacheInvalidation.id)
+                    .all()
+                )
+                for change in changes:
+                    self._apply(db, change)
+                    self._applied[change.id] = datetime.utcnow()
+
+            # Applied after they were made, so these are out of the window too
+            cutoff = datetime.utcnow() - self.window
+            self._applied = {
+                change_id: applied_at for change_id, applied_at in self._applied.items() if applied_at >= cutoff
+            }
+            return len(new_ids)
+
+    def start(self) -> None:
+        """Start the background sync thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="cache-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background sync thread."""
+        self._stopping = True
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 5)
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wake.wait(self.interval)
+            if self._stopping:
+                return
+            db = self.session_factory()
+            try:
+                applied = self.sync(db)
+                if applied:
+                    logger.debug(f"Applied {applied} offer changes of other processes")
+                self._prune(db)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Failed to sync lookup caches: {e}")
+            finally:
+                db.close()
+
+    def _recent(self, db: Session):
+        """IDs and times of the changes of other processes still in the window."""
+        return db.query(CacheInvalidation.id, CacheInvalidation.created_at).filter(
+            CacheInvalidation.created_at >= datetime.utcnow() - self.window,
+            CacheInvalidation.worker != self.process_id
+        ).all()
+
+    def _apply(self, db: Session, change: CacheInvalidation) -> None:
+        if change.kind == "all":
+            if offer_index.ready:
+                offer_index.build(db)
+            if known_domain_filter.ready:
+                known_domain_filter.load(db)
+            lookup_cache.clear()
+        elif change.kind == "marketplace":
+            offer_index.refresh_marketplace(db, change.marketplace_id)
+            lookup_cache.invalidate_marketplace(change.marketplace_id)
+        else:
+            domain_ids = change.domain_ids or []
+            for start_idx in range(0, len(domain_ids), APPLY_BATCH_SIZE):
+                batch = domain_ids[start_idx:start_idx + APPLY_BATCH_SIZE]
+                offer_index.refresh_domains(db, batch)
+                # New domains must pass the filter from now on
+                names = [name for (name,) in db.query(Domain.root_domain).filter(Domain.id.in_(batch))]
+                known_domain_filter.add(name for name in names if not known_domain_filter.might_contain(name))
+            lookup_cache.invalidate_domains(domain_ids)
+
+    def _prune(self, db: Session) -> None:
+        """Delete changes every process has had the time to apply, at most once per window."""
+        now = datetime.utcnow()
+        if now - self._pruned_at < self.window:
+            return
+        self._pruned_at = now
+        db.query(CacheInvalidation).filter(CacheInvalidation.created_at < now - 2 * self.window).delete()
+        db.commit()
+
+
+cache_sync = CacheSync()
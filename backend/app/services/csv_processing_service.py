@@ -1,253 +1,994 @@
+import numpy as np
 import pandas as pd
+from openpyxl import load_workbook
 from sqlalchemy.orm import Session
-from decimal import Decimal
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple, Union
 from datetime import datetime
+import itertools
+import logging
+import time
 
-from app.schemas.csv_upload import CSVUploadRequest
+from app.core.config import settings
+from app.models.ingest_checkpoint import IngestCheckpoint
+from app.models.marketplace import Marketplace
+from app.schemas.csv_upload import ColumnMapping, CSVUploadRequest, CSVUploadResponse
 from app.services.marketplace_service import MarketplaceService
 from app.services.domain_service import DomainService
 from app.services.offer_service import OfferService
+from app.services.offer_staging_service import OfferStagingService
 from app.services.fx_service import FXService
+from app.services.cache_sync import cache_sync
+from app.services.ingest_checkpoint_service import IngestCheckpointService
+from app.services.ingest_metrics import StageTimer, ingest_metrics
+from app.services.offer_index import offer_index
+from app.services.lookup_cache import lookup_cache
+from app.services.job_manager import Job, naive_utc
+
+logger = logging.getLogger(__name__)
+
+# Price cells that mean "no price" and are skipped without an error
+EMPTY_PRICES = ['', '0', '0.0', '0.00']
+
+# Columns of the clean frame built by prepare_frame
+CLEAN_COLUMNS = [
+    'row', 'domain', 'price_amount', 'price_currency', 'listing_url', 'includes_content', 'dofollow'
+]
+
+# Offer values written by the bulk upsert
+OFFER_COLUMNS = [
+    'domain_id', 'listing_url', 'price_amount', 'price_currency', 'price_usd', 'includes_content', 'dofollow',
+    'content_hash'
+]
+
+# Counts of a grouped upload that are summed over its marketplaces
+SUMMED_RESULTS = [
+    'successful_imports', 'failed_imports', 'new_domains', 'new_offers', 'updated_offers', 'unchanged_offers',
+    'delisted_offers', 'price_changes', 'duplicate_rows'
+]
+
+# Row kept when an upload repeats a domain (see CSVProcessingService._dedup)
+DEDUP_POLICIES = ['last_wins', 'first_wins', 'lowest_price']
+
+# Feed fields an offer's content hash covers. price_usd is derived from the
+# day's FX rate, so a rate move alone doesn't count as a change.
+HASH_COLUMNS = ['listing_url', 'price_amount', 'price_currency', 'includes_content', 'dofollow']
+
+
+def _optional_column(df: pd.DataFrame, column_name: Optional[str]) -> Optional[pd.Series]:
+    """A mapped column, or None if it is not mapped or not in the file."""
+    if column_name and column_name in df.columns:
+        return df[column_name]
+    return None
+
+
+def _text_column(df: pd.DataFrame, column_name: Optional[str]) -> pd.Series:
+    """Stripped text of a mapped column, with None for missing or blank cells."""
+    column = _optional_column(df, column_name)
+    if column is None:
+        return pd.Series(None, index=df.index, dtype=object)
+    text = column.astype(str).str.strip()
+    return text.where(column.notna() & (text != ''), None)
+
+
+def _slug_column(names: pd.Series) -> pd.Series:
+    """Marketplace slugs of names (lowercase, runs of other characters as '-'), None where there is none."""
+    slugs = names.str.lower().str.replace(r'[^a-z0-9]+', '-', regex=True).str.strip('-').str.slice(0, 100)
+    return slugs.where(names.notna() & (slugs != ''), None)
+
+
+def _boolean_column(df: pd.DataFrame, column_name: Optional[str], default_value: bool) -> np.ndarray:
+    """Truthiness of a mapped column, with the default for missing or empty cells."""
+    column = _optional_column(df, column_name)
+    if column is None:
+        return np.full(len(df), default_value)
+    return np.where(column.notna(), column.astype(bool), default_value).astype(bool)
+
+
+def _row_errors(row_numbers: pd.Series, mask: pd.Series, message: str, values: pd.Series) -> pd.DataFrame:
+    """Error frame entries for the rows selected by mask."""
+    return pd.DataFrame({
+        'row': row_numbers[mask],
+        'error': "Row " + row_numbers[mask].astype(str) + f": {message} '" + values[mask].astype(str) + "'",
+    })
+
+
+def read_csv_chunks(path: str, mapping: ColumnMapping, chunk_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Read a CSV upload in chunks of rows, keeping only the mapped columns.
+    
+    Text columns are read as strings so every chunk gets the same types;
+    the content and dofollow columns keep pandas' inference.
+    
+    Args:
+        path: CSV file
+        mapping: Column mapping of the upload
+        chunk_size: Rows per chunk (default: settings.ingest_chunk_size)
+    
+    Returns:
+        Iterator of frames indexed by their position in the file
+    
+    Raises:
+        ValueError: If the domain or price column is missing
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    missing_columns = [col for col in (mapping.domain_column, mapping.price_column) if col not in header]
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {missing_columns}")
+    
+    text_columns = [
+        mapping.domain_column, mapping.price_column, mapping.currency_column, mapping.url_column, mapping.marketplace_column
+    ]
+    usecols = [
+        col for col in dict.fromkeys(text_columns + [mapping.content_column, mapping.dofollow_column])
+        if col and col in header
+    ]
+    return pd.read_csv(
+        path,
+        usecols=usecols,
+        dtype={col: str for col in text_columns if col in usecols},
+        chunksize=chunk_size or settings.ingest_chunk_size,
+    )
+
+
+def read_xlsx_chunks(path: str, mapping: ColumnMapping, chunk_size: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Stream the first sheet of an XLSX upload in chunks of rows, keeping only the mapped columns.
+    
+    Uses openpyxl's read-only mode, which parses the sheet row by row
+    instead of building the whole workbook in memory. Columns come back as
+    read_csv_chunks returns them: text columns as strings, the content and
+    dofollow columns as the cell values. Empty rows are left out.
+    
+    Args:
+        path: XLSX file
+        mapping: Column mapping of the upload
+        chunk_size: Rows per chunk (default: settings.ingest_chunk_size)
+    
+    Returns:
+        Iterator of frames indexed by their position in the sheet
+    
+    Raises:
+        ValueError: If the domain or price column is missing
+    """
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    rows = workbook.worksheets[0].iter_rows(values_only=True)
+    header = [str(value) if value is not None else '' for value in next(rows, ())]
+    
+    missing_columns = [col for col in (mapping.domain_column, mapping.price_column) if col not in header]
+    if missing_columns:
+        workbook.close()
+        raise ValueError(f"Missing required columns: {missing_columns}")
+    
+    text_columns = [
+        mapping.domain_column, mapping.price_column, mapping.currency_column, mapping.url_column, mapping.marketplace_column
+    ]
+    usecols = [
+        col for col in dict.fromkeys(text_columns + [mapping.content_column, mapping.dofollow_column])
+        if col and col in header
+    ]
+    return _xlsx_chunks(
+        workbook, rows, usecols, [header.index(col) for col in usecols],
+        [col for col in text_columns if col in usecols], chunk_size or settings.ingest_chunk_size
+    )
+
+
+def _xlsx_chunks(workbook, rows, usecols: List[str], positions: List[int], text_columns: List[str], chunk_size: int):
+    """Frames of read_xlsx_chunks; closes the workbook once the sheet is read."""
+    try:
+        values, index = [], []
+        for position, row in enumerate(rows):
+            row_values = tuple(row[i] if i < len(row) else None for i in positions)
+            if all(value is None for value in row_values):
+                continue
+            values.append(row_values)
+            index.append(position)
+            if len(values) == chunk_size:
+                yield _xlsx_frame(values, index, usecols, text_columns)
+                values, index = [], []
+        if values:
+            yield _xlsx_frame(values, index, usecols, text_columns)
+    finally:
+        workbook.close()
+
+
+def _xlsx_frame(values: List[tuple], index: List[int], usecols: List[str], text_columns: List[str]) -> pd.DataFrame:
+    """Frame of sheet rows, with the text columns as strings like read_csv gives them."""
+    df = pd.DataFrame(values, columns=usecols, index=index)
+    for col in text_columns:
+        df[col] = df[col].astype(str).where(df[col].notna())
+    return df
+
+
+def read_upload(path: str, mapping: ColumnMapping, chunk_size: Optional[int] = None) -> Iterable[pd.DataFrame]:
+    """
+    Read an upload file: CSV and XLSX files in chunks (see read_csv_chunks
+    and read_xlsx_chunks), legacy XLS files whole.
+    
+    Raises:
+        ValueError: If the domain or price column is missing
+    """
+    if path.lower().endswith('.csv'):
+        return read_csv_chunks(path, mapping, chunk_size)
+    if path.lower().endswith('.xlsx'):
+        return read_xlsx_chunks(path, mapping, chunk_size)
+    
+    df = pd.read_excel(path)
+    
+    # Validate required columns exist
+    required_columns = [mapping.domain_column, mapping.price_column]
+    missing_columns = [col for col in required_columns if col not in df.columns]
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {missing_columns}")
+    
+    return [df]
+
+
+def estimate_rows(path: str) -> int:
+    """
+    Cheap row count of an upload file, for progress reporting.
+    
+    Counts the lines of a CSV in blocks; quoted line breaks make it an
+    overestimate. XLSX files give the row count their sheet declares (it
+    includes empty rows), XLS files 0.
+    """
+    if path.lower().endswith('.xlsx'):
+        workbook = load_workbook(path, read_only=True)
+        try:
+            max_row = workbook.worksheets[0].max_row
+        finally:
+            workbook.close()
+        return max((max_row or 0) - 1, 0)
+    if not path.lower().endswith('.csv'):
+        return 0
+    
+    lines = 0
+    last_block = b""
+    with open(path, "rb") as f:
+        while block := f.read(1024 * 1024):
+            lines += block.count(b"\n")
+            last_block = block
+    # The last line may not end with a line break; the header is no row
+    return max(lines + (not last_block.endswith(b"\n")) - 1, 0)
+
+
+def prepare_frame(df: pd.DataFrame, request: CSVUploadRequest) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Extract and validate every row of an upload with whole-column operations.
+    
+    Rows without a domain or with an empty/zero/negative price are skipped
+    silently. Rows with an invalid domain or an unparseable price end up in
+    the error frame. The function has no database access, so it can run in
+    a worker process.
+    
+    Args:
+        df: Uploaded rows
+        request: Upload request with the column mapping and defaults
+    
+    Returns:
+        Tuple of (clean frame with CLEAN_COLUMNS, error frame with row and
+        error columns); `row` is the 1-based row number in the file,
+        taken from the frame's index. If the mapping has a marketplace
+        column, the clean frame also has the `marketplace` name and
+        `marketplace_slug` of every row (None where the cell is empty).
+    """
+    mapping = request.column_mapping
+    # Frames read in chunks keep counting their index from the previous chunk
+    row_numbers = pd.Series(df.index + 1, index=df.index)
+    
+    domain_raw = df[mapping.domain_column].astype(str).str.strip()
+    price_raw = df[mapping.price_column]
+    price_str = price_raw.astype(str).str.strip()
+    
+    # Skip empty rows or rows with zero/empty prices
+    candidate = (domain_raw != '') & price_raw.notna() & ~price_str.isin(EMPTY_PRICES)
+    
+    # Normalize domain (each distinct value once, only rows that are still candidates)
+    codes, uniques = pd.factorize(domain_raw[candidate])
+    domain = pd.Series(None, index=df.index, dtype=object)
+    domain[candidate] = np.array(DomainService.normalize_domains(uniques), dtype=object)[codes]
+    invalid_domain = candidate & domain.isna()
+    
+    # Parse price
+    price_amount = pd.to_numeric(price_raw.where(candidate & ~invalid_domain), errors='coerce')
+    invalid_price = candidate & ~invalid_domain & price_amount.isna()
+    valid = candidate & ~invalid_domain & (price_amount > 0)
+    
+    errors = pd.concat([
+        _row_errors(row_numbers, invalid_domain, "Invalid domain", domain_raw),
+        _row_errors(row_numbers, invalid_price, "Invalid price", price_raw),
+    ], ignore_index=True).sort_values('row', kind='stable', ignore_index=True)
+    
+    # Get currency
+    currency = _text_column(df, mapping.currency_column)
+    currency = currency.str.upper().where(currency.notna(), request.currency_default)
+    
+    # Get optional fields
+    listing_url = _text_column(df, mapping.url_column)
+    
+    clean = pd.DataFrame({
+        'row': row_numbers,
+        'domain': domain,
+        'price_amount': price_amount,
+        'price_currency': currency,
+        'listing_url': listing_url,
+        'includes_content': _boolean_column(df, mapping.content_column, request.content_default),
+        'dofollow': _boolean_column(df, mapping.dofollow_column, request.dofollow_default),
+    }, index=df.index)
+    columns = CLEAN_COLUMNS
+    
+    if mapping.marketplace_column:
+        # Vendor of each row in a multi-marketplace file
+        marketplace = _text_column(df, mapping.marketplace_column).str.slice(0, 255)
+        clean['marketplace'] = marketplace
+        clean['marketplace_slug'] = _slug_column(marketplace)
+        columns = CLEAN_COLUMNS + ['marketplace', 'marketplace_slug']
+    
+    return clean[valid][columns].reset_index(drop=True), errors
+
+
+def content_hashes(clean: pd.DataFrame) -> pd.Series:
+    """
+    64-bit hash of each prepared row's offer content.
+    
+    Stable across processes and uploads, and signed so it fits a BIGINT
+    column.
+    """
+    # A chunk's prices parse as integers when none has decimals; hash them as floats either way
+    values = clean[HASH_COLUMNS].astype({'price_amount': float})
+    hashes = pd.util.hash_pandas_object(values, index=False)
+    return pd.Series(hashes.to_numpy().view(np.int64), index=clean.index)
+
+
+def upload_response(marketplace_id: int, results: Dict[str, Any], elapsed: float) -> CSVUploadResponse:
+    """
+    Upload summary from CSVProcessingService results.
+    
+    Args:
+        marketplace_id: Marketplace the rows were imported into
+        results: CSVProcessingService.results
+        elapsed: Processing time in seconds
+    """
+    total_rows = results['total_rows']
+    return CSVUploadResponse(
+        marketplace_id=marketplace_id,
+        total_rows_processed=total_rows,
+        successful_imports=results['successful_imports'],
+        failed_imports=results['failed_imports'],
+        new_domains_added=results['new_domains'],
+        new_offers_added=results['new_offers'],
+        updated_offers=results['updated_offers'],
+        unchanged_offers=results['unchanged_offers'],
+        delisted_offers=results['delisted_offers'],
+        price_changes=results['price_changes'],
+        duplicate_rows=results['duplicate_rows'],
+        processing_time_ms=int(elapsed * 1000),
+        rows_per_second=round(total_rows / elapsed, 1) if elapsed > 0 else 0.0,
+        unresolved_currencies=results['unresolved_currencies'],
+        resumed_rows=results.get('resumed_rows', 0),
+        stages=results.get('stages', {}),
+        marketplaces=results.get('marketplaces', []),
+        errors=results['errors']
+    )
 
 
 class CSVProcessingService:
-    def __init__(self, db: Session, request: CSVUploadRequest, df: pd.DataFrame):
+    def __init__(
+        self,
+        db: Session,
+        request: CSVUploadRequest,
+        df: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+        marketplace: Optional[Marketplace] = None
+    ):
+        """
+        Args:
+            db: Database session
+            request: Upload request
+            df: The upload, or its chunks as they are read
+            marketplace: Marketplace to write every row to (default: the
+                request's, created if needed). Without one, an upload whose
+                mapping has a marketplace column is grouped: each row goes to
+                the marketplace it names, or to the request's if it names none.
+        """
         self.db = db
         self.request = request
-        self.df = df
+        # A whole upload, or its chunks as they are read
+        self.frames = [df] if isinstance(df, pd.DataFrame) else df
         
         # Initialize services
         self.marketplace_service = MarketplaceService(db)
         self.domain_service = DomainService(db)
         self.offer_service = OfferService(db)
         self.fx_service = FXService(db)
+        self.checkpoint_service = IngestCheckpointService(db)
+        # COPY + set-based merge on PostgreSQL, batched upserts elsewhere
+        self.staging_service = OfferStagingService(db) if OfferStagingService.is_supported(db) else None
         
         # Initialize results tracking
         self.results = {
+            "total_rows": 0,
             "successful_imports": 0,
             "failed_imports": 0,
             "new_domains": 0,
             "new_offers": 0,
             "updated_offers": 0,
+            "unchanged_offers": 0,
+            "delisted_offers": 0,
+            "price_changes": 0,
+            # Rows dropped because an earlier or later row of the upload has their domain
+            "duplicate_rows": 0,
+            "unresolved_currencies": {},
+            # Rows committed by interrupted earlier runs of the upload, see process()
+            "resumed_rows": 0,
+            # Counts per marketplace of a grouped upload, added when it is complete
+            "marketplaces": [],
             "errors": []
         }
         
+        self.dedup_policy = request.dedup_policy or settings.ingest_dedup_policy
+        if self.dedup_policy not in DEDUP_POLICIES:
+            raise ValueError(f"Unknown dedup policy {self.dedup_policy!r}, expected one of {DEDUP_POLICIES}")
+        # Domains written so far under first_wins and lowest_price, with their
+        # price under lowest_price; later frames' rows are compared against them
+        # (see _dedup)
+        self.kept: Dict[str, Optional[float]] = {}
+        
+        # USD rate per currency, resolved once per upload (None if unavailable)
+        self.usd_rates: Dict[str, Optional[float]] = {}
+        
+        # last_seen_at of every offer in the upload; older offers are delisted at the end
+        self.seen_at = datetime.utcnow()
+        
+        # Time spent per ingest stage, returned in results['stages'] when complete
+        self.timer = StageTimer()
+        self.started_at = time.perf_counter()
+        self._progress_logged_at = self.started_at
+        
         # Get or create marketplace once
-        self.marketplace = self._get_or_create_marketplace()
+        self.marketplace = marketplace or self._get_or_create_marketplace()
+        
+        # Writer of each marketplace of a grouped upload, by slug; slugs
+        # resolving to the same marketplace share its writer
+        self.grouped = marketplace is None and bool(request.column_mapping.marketplace_column)
+        self.writers: Dict[str, CSVProcessingService] = {}
+        # The same writers by marketplace ID; a batch shares one dict between its files
+        self.marketplace_writers: Dict[int, CSVProcessingService] = {}
+        # Counts restored from a checkpoint; a grouped upload's writers count the rest
+        self.resumed: Dict[str, Any] = {}
+
+    def process(self, job: Optional[Job] = None, checkpoint: Optional[IngestCheckpoint] = None) -> Dict[str, Any]:
+        """
+        Main processing method with batch processing for better performance.
+        
+        Chunks are processed one at a time, so only one chunk of the upload
+        is in memory however large the file is. Offers whose content is
+        unchanged are only marked as seen. Once the whole upload is written,
+        if request.delist_missing marks it as the full feed, the
+        marketplace's offers it didn't contain are delisted. In a grouped
+        upload, that is only done for the marketplaces named in
+        request.delist_marketplaces: an aggregator's file is rarely the full
+        feed of every marketplace it lists.
+        
+        With a checkpoint, the counts and seen_at of the interrupted runs
+        are restored, the chunks they committed are read but not written
+        again, and the checkpoint is saved after every chunk. Under
+        first_wins and lowest_price, the domains those chunks kept are
+        restored from them too (see _restore_kept). Batches of a chunk that was only partly committed are written
+        again; their offers count as unchanged then.
+        
+        Args:
+            job: Background job to report progress to. Cancelling it stops
+                the upload before the next batch; committed batches are kept
+                and nothing is delisted.
+            checkpoint: Checkpoint of the upload (see IngestCheckpointService),
+                read in chunks of checkpoint.chunk_size rows
+        """
+        frames = self.frames
+        chunks = 0
+        if checkpoint:
+            self._resume(checkpoint, job)
+            chunks = checkpoint.chunks_committed
+            frames = iter(frames)
+            self._restore_kept(itertools.islice(frames, chunks))
+        
+        for df in self.timer.frames('parse', frames):
+            logger.debug(f"Processing {len(df)} rows...")
+            self.results['total_rows'] += len(df)
+            # Parse and validate all rows at once
+            with self.timer.stage('normalize', len(df)):
+                clean, errors = prepare_frame(df, self.request)
+            self.write_prepared(clean, errors, job)
+            
+            if job:
+                # Skipped and invalid rows; write_prepared counts the valid ones
+                job.advance(len(df) - len(clean))
+            if checkpoint:
+                chunks += 1
+                self.checkpoint_service.save(checkpoint, chunks, self.marketplace.id, self.results)
+        
+        if job:
+            job.total = self.results['total_rows']
+        
+        return self.complete()
 
-    def process(self) -> Dict[str, Any]:
-        """Main processing method with batch processing for better performance."""
-        total_rows = len(self.df)
-        print(f"Processing {total_rows} rows...")
+    def write_prepared(self, clean: pd.DataFrame, errors: pd.DataFrame, job: Optional[Job] = None) -> None:
+        """
+        Write one frame of the upload that went through prepare_frame.
+        
+        The frame is written in batches (or merged through the staging
+        table) and its row errors are added to the results. A grouped
+        upload's frame is first split by marketplace (see _write_grouped).
         
-        # Process in batches for better performance and memory management
-        batch_size = 100
-        processed_count = 0
+        Args:
+            clean: Valid rows from prepare_frame
+            errors: Row errors from prepare_frame
+            job: Background job to check for cancellation between batches and
+                to advance by the number of valid rows
+        """
+        if self.grouped:
+            self._write_grouped(clean, errors, job)
+            return
         
-        for start_idx in range(0, total_rows, batch_size):
-            end_idx = min(start_idx + batch_size, total_rows)
-            batch_df = self.df.iloc[start_idx:end_idx]
+        self.results['errors'].extend(errors['error'])
+        with self.timer.stage('fx', len(clean)):
+            clean['price_usd'] = self._convert_to_usd(clean)
+        with self.timer.stage('normalize'):
+            clean['content_hash'] = content_hashes(clean)
+        with self.timer.stage('dedup', len(clean)):
+            unique = self._dedup(clean)
+        duplicates = len(clean) - len(unique)
+        self.results['duplicate_rows'] += duplicates
+        if job:
+            job.advance(duplicates)
+        clean = unique
+        
+        if self.staging_service:
+            self._merge_frame(clean, job)
+            self._log_progress()
+            return
+        
+        # Process in batches: one domain resolve, one offer upsert and one commit per batch
+        batch_size = settings.ingest_batch_size
+        
+        for start_idx in range(0, len(clean), batch_size):
+            if job:
+                job.check_cancelled()
             
-            print(f"Processing batch {start_idx + 1}-{end_idx} of {total_rows}...")
+            # Domains are unique in the frame after _dedup
+            batch = clean.iloc[start_idx:start_idx + batch_size]
+            first_row, last_row = batch['row'].min(), batch['row'].max()
             
-            for index, row in batch_df.iterrows():
-                try:
-                    self._process_row(index, row)
-                    processed_count += 1
-                    
-                    # Log progress every 1000 rows
-                    if processed_count % 1000 == 0:
-                        print(f"Processed {processed_count}/{total_rows} rows...")
-                        
-                except Exception as e:
-                    error_msg = f"Row {index + 1}: {str(e)}"
-                    print(f"Error processing row {index + 1}: {e}")
-                    self.results['errors'].append(error_msg)
-                    self.results['failed_imports'] += 1
+            logger.debug(f"Processing rows {first_row}-{last_row}...")
             
-            # Commit batch to database
             try:
-                self.db.commit()
-                print(f"Committed batch {start_idx + 1}-{end_idx}")
+                domain_ids = self._write_batch(batch)
+                logger.debug(f"Committed rows {first_row}-{last_row}")
             except Exception as e:
-                print(f"Error committing batch: {e}")
+                logger.error(f"Error writing rows {first_row}-{last_row}: {e}")
                 self.db.rollback()
-                raise
+                self.results['errors'].append(f"Rows {first_row}-{last_row}: {str(e)}")
+                self.results['failed_imports'] += len(batch)
+            else:
+                # Counted once committed, so a failed batch is only counted as failed
+                self._count_imported(batch)
+                self._count_unresolved(batch)
+                with self.timer.stage('index_refresh', len(domain_ids)):
+                    offer_index.refresh_domains(self.db, domain_ids)
+                    lookup_cache.invalidate_domains(domain_ids)
+            
+            if job:
+                job.advance(len(batch))
+            self._log_progress()
+
+    def complete(self, delist: bool = True) -> Dict[str, Any]:
+        """
+        Finish the upload once every frame is written.
+        
+        Args:
+            delist: Whether the marketplace's offers missing from the upload
+                may be delisted (still subject to request.delist_missing)
+        
+        Returns:
+            The upload results
+        """
+        if self.grouped:
+            self._complete_writers(delist)
+        else:
+            self._count_replaced(self.marketplace.id)
+            if delist and self.request.delist_missing:
+                self.delist_missing_offers()
         
-        print(f"Processing complete. Results: {self.results}")
+        elapsed = time.perf_counter() - self.started_at
+        self.results['stages'] = self.timer.summary()
+        ingest_metrics.record(self.marketplace.id, self.results, self.timer, elapsed)
+        
+        results = self.results
+        stages = " ".join(f"{stage}={summary['time_ms']}ms" for stage, summary in results['stages'].items())
+        logger.info(
+            f"Ingest complete marketplace={self.marketplace.slug} rows={results['total_rows']} "
+            f"imported={results['successful_imports']} failed={results['failed_imports']} "
+            f"new_offers={results['new_offers']} updated={results['updated_offers']} "
+            f"unchanged={results['unchanged_offers']} delisted={results['delisted_offers']} "
+            f"duplicates={results['duplicate_rows']} errors={len(results['errors'])} time={elapsed:.1f}s {stages}"
+        )
         return self.results
 
-    def _get_or_create_marketplace(self):
-        """Get or create the marketplace for this upload."""
+    def _write_grouped(self, clean: pd.DataFrame, errors: pd.DataFrame, job: Optional[Job]) -> None:
+        """
+        Split a prepared frame of a grouped upload by marketplace and write
+        each group through that marketplace's writer.
+        
+        Rows without a marketplace go to the request's. Marketplaces not
+        seen earlier in the upload are resolved together, in one batched
+        query per frame.
+        """
+        self.results['errors'].extend(errors['error'])
+        slugs = clean['marketplace_slug'].fillna(self.request.marketplace_slug)
+        self._resolve_marketplaces(clean, slugs)
+        
+        for slug, group in clean.groupby(slugs, sort=False):
+            writer = self.writers[slug]
+            writer.results['total_rows'] += len(group)
+            writer.write_prepared(group.reset_index(drop=True), errors.iloc[:0], job)
+        
+        # Keep the running counts current for job polls
+        self._sum_writer_results()
+
+    def _resolve_marketplaces(self, clean: pd.DataFrame, slugs: pd.Series) -> None:
+        """Get or create the marketplaces of a frame that have no writer yet, and their writers."""
+        new = pd.DataFrame({'slug': slugs, 'name': clean['marketplace']})[~slugs.isin(list(self.writers))]
+        if new.empty:
+            return
+        new = new.drop_duplicates('slug')
+        
+        names = {slug: name for slug, name in zip(new['slug'], new['name']) if slug != self.request.marketplace_slug}
+        marketplaces = self.marketplace_service.get_or_create_marketplaces(names)
+        unresolved = set(names) - set(marketplaces)
+        if unresolved:
+            raise ValueError(f"Could not find or create marketplaces: {sorted(unresolved)}")
+        if len(names) < len(new):
+            marketplaces[self.request.marketplace_slug] = self.marketplace
+        
+        writers = self.marketplace_writers
+        for slug, marketplace in marketplaces.items():
+            if marketplace.id not in writers:
+                writer = CSVProcessingService(self.db, self.request, [], marketplace)
+                # Rates are resolved once for the whole upload, and a resumed upload keeps its seen_at
+                writer.usd_rates = self.usd_rates
+                writer.seen_at = self.seen_at
+                writers[marketplace.id] = writer
+            self.writers[slug] = writers[marketplace.id]
+        logger.info(f"Upload now has {len(writers)} marketplaces: {', '.join(sorted(marketplaces))} added")
+
+    def _unique_writers(self) -> List["CSVProcessingService"]:
+        return list({writer.marketplace.id: writer for writer in self.writers.values()}.values())
+
+    def delisted_writers(self) -> List["CSVProcessingService"]:
+        """Writers of a grouped upload's marketplaces the request names in delist_marketplaces."""
+        slugs = set(self.request.delist_marketplaces)
+        return [writer for writer in self._unique_writers() if writer.marketplace.slug in slugs]
+
+    def _sum_writer_results(self) -> None:
+        """Add up the counts of a grouped upload's writers; their errors move to the upload's, prefixed."""
+        writers = self._unique_writers()
+        for key in SUMMED_RESULTS:
+            self.results[key] = self.resumed.get(key, 0) + sum(writer.results[key] for writer in writers)
+        
+        unresolved: Dict[str, int] = dict(self.resumed.get('unresolved_currencies', {}))
+        for writer in writers:
+            for currency, count in writer.results['unresolved_currencies'].items():
+                unresolved[currency] = unresolved.get(currency, 0) + count
+            self.results['errors'].extend(f"{writer.marketplace.slug}: {error}" for error in writer.results['errors'])
+            writer.results['errors'].clear()
+        self.results['unresolved_currencies'] = unresolved
+
+    def _complete_writers(self, delist: bool) -> None:
+        """Finish every marketplace of a grouped upload and add their summaries to the results."""
+        writers = self._unique_writers()
+        if not self.resumed:
+            for writer in writers:
+                writer._count_replaced(writer.marketplace.id)
+        if delist and self.request.delist_missing:
+            for writer in self.delisted_writers():
+                writer.delist_missing_offers()
+        self._sum_writer_results()
+        if self.resumed:
+            # The writers only count this run's rows; the interrupted runs wrote to any marketplace
+            self._count_replaced()
+        
+        for writer in writers:
+            writer.results['stages'] = writer.timer.summary()
+            self.timer.merge(writer.timer.to_dict())
+            self.results['marketplaces'].append(upload_response(
+                writer.marketplace.id, writer.results, time.perf_counter() - writer.started_at
+            ).model_dump())
+
+    def _resume(self, checkpoint: IngestCheckpoint, job: Optional[Job]) -> None:
+        """Restore the counts, errors and seen_at of the interrupted runs of the upload."""
+        # Also on a first run: a completed upload is recognised by its offers' last_seen_at.
+        # Read back from a timezone-aware column; offer timestamps are naive UTC
+        self.seen_at = naive_utc(checkpoint.seen_at)
+        if not checkpoint.chunks_committed:
+            return
+        
+        saved = checkpoint.results
+        # Checkpoints saved before a count was added don't have it
+        self.resumed = {key: saved.get(key, 0) for key in SUMMED_RESULTS}
+        self.resumed['unresolved_currencies'] = saved['unresolved_currencies']
+        self.results.update(self.resumed)
+        self.results['unresolved_currencies'] = dict(saved['unresolved_currencies'])
+        self.results['total_rows'] = saved['total_rows']
+        self.results['resumed_rows'] = saved['total_rows']
+        self.results['errors'].extend(saved['errors'])
+        if job:
+            job.advance(saved['total_rows'])
+
+    def _restore_kept(self, frames: Iterable[pd.DataFrame]) -> None:
+        """
+        Read the chunks committed by interrupted runs of the upload, without
+        writing them.
+        
+        first_wins and lowest_price check every later row against the
+        domains kept so far (self.kept, per writer in a grouped upload), so
+        a resumed upload rebuilds them from those chunks; its later rows
+        would otherwise overwrite the rows that won. Under last_wins the
+        chunks are only skipped (see _count_replaced).
+        """
+        if self.dedup_policy == 'last_wins':
+            for _ in frames:
+                pass
+            return
+        
+        for df in frames:
+            clean, _ = prepare_frame(df, self.request)
+            if self.grouped:
+                slugs = clean['marketplace_slug'].fillna(self.request.marketplace_slug)
+                self._resolve_marketplaces(clean, slugs)
+                groups = [(self.writers[slug], group) for slug, group in clean.groupby(slugs, sort=False)]
+            else:
+                groups = [(self, clean)]
+            
+            for writer, group in groups:
+                group = group.reset_index(drop=True)
+                group['price_usd'] = writer._convert_to_usd(group)
+                writer._dedup(group)
+        logger.info(f"Restored the {self.dedup_policy} dedup state of the resumed upload")
+
+    def _log_progress(self) -> None:
+        """Log the running counts, at most once per settings.ingest_log_interval seconds."""
+        now = time.perf_counter()
+        if now - self._progress_logged_at < settings.ingest_log_interval:
+            return
+        self._progress_logged_at = now
+        
+        rows = self.results['total_rows']
+        logger.info(
+            f"Ingest progress marketplace={self.marketplace.slug} rows={rows} "
+            f"imported={self.results['successful_imports']} failed={self.results['failed_imports']} "
+            f"rows_per_second={rows / (now - self.started_at):.0f}"
+        )
+
+    def _merge_frame(self, clean: pd.DataFrame, job: Optional[Job]) -> None:
+        """Write a whole frame through the staging table in one transaction."""
+        if clean.empty:
+            return
+        if job:
+            job.check_cancelled()
+        
+        first_row, last_row = clean['row'].min(), clean['row'].max()
+        logger.debug(f"Merging rows {first_row}-{last_row} through the staging table...")
+        
         try:
-            marketplace = self.marketplace_service.get_or_create_marketplace(
-                name=self.request.marketplace_name,
-                slug=self.request.marketplace_slug,
-                region=self.request.region
+            (
+                domain_ids, new_domains, new_offers, updated_offers, unchanged_offers, price_changes
+            ) = self.staging_service.merge_offers(
+                self.marketplace.id, clean, self.seen_at, self.timer, settings.ingest_price_history
             )
-            print(f"Marketplace: ID={marketplace.id}, Name='{marketplace.name}', Slug='{marketplace.slug}'")
-            return marketplace
+            with self.timer.stage('commit', len(clean)):
+                cache_sync.record_domains(self.db, domain_ids)
+                self.db.commit()
+            logger.debug(f"Committed rows {first_row}-{last_row}")
         except Exception as e:
-            print(f"Error creating/finding marketplace: {e}")
-            raise Exception(f"Failed to create/find marketplace: {str(e)}")
-
-    def _process_row(self, index: int, row: pd.Series):
-        """Handle individual row processing."""
-        # 1. Extract and validate row data
-        data = self._extract_row_data(index, row)
-        if not data['is_valid']:
-            return  # Skip invalid rows
+            logger.error(f"Error writing rows {first_row}-{last_row}: {e}")
+            self.db.rollback()
+            self.results['errors'].append(f"Rows {first_row}-{last_row}: {str(e)}")
+            self.results['failed_imports'] += len(clean)
+        else:
+            self._count_imported(clean)
+            self._count_unresolved(clean)
+            self.results['new_domains'] += new_domains
+            self.results['new_offers'] += new_offers
+            self.results['updated_offers'] += updated_offers
+            self.results['unchanged_offers'] += unchanged_offers
+            self.results['price_changes'] += price_changes
+            with self.timer.stage('index_refresh', len(domain_ids)):
+                offer_index.refresh_domains(self.db, domain_ids)
+                lookup_cache.invalidate_domains(domain_ids)
+        
+        if job:
+            job.advance(len(clean))
 
-        # 2. Get or create domain
-        domain_record = self.domain_service.get_or_create_domains([data['domain']])[0]
-        if domain_record.id is None:  # New domain
-            self.results['new_domains'] += 1
+    def _convert_to_usd(self, clean: pd.DataFrame) -> pd.Series:
+        """
+        USD price per row.
+        
+        Rates of currencies not seen earlier in the upload are resolved in
+        one FXService call; rows whose currency has no rate get no USD price
+        (see _count_unresolved).
+        """
+        currencies = clean['price_currency'].unique()
+        new_currencies = [c for c in currencies if c not in self.usd_rates]
+        if new_currencies:
+            for currency, rate in self.fx_service.get_usd_rates(new_currencies).items():
+                self.usd_rates[currency] = float(rate) if rate is not None else None
+        
+        rates = clean['price_currency'].map(self.usd_rates).astype(float)
+        return clean['price_amount'] * rates
 
-        # 3. Handle offer creation/update logic
-        self._process_offer(domain_record, data)
-        self.results['successful_imports'] += 1
+    def _count_imported(self, clean: pd.DataFrame) -> None:
+        """
+        Count committed rows as imported.
+        
+        Under lowest_price, a row that replaced the offer an earlier frame
+        wrote for its domain (see _dedup) turns that frame's row into a
+        duplicate, so imports count the distinct offers kept.
+        """
+        replaced = int(clean['replaces'].sum())
+        self.results['successful_imports'] += len(clean) - replaced
+        self.results['duplicate_rows'] += replaced
 
-    def _extract_row_data(self, index: int, row: pd.Series) -> Dict[str, Any]:
-        """Extract and validate data from a single CSV row."""
+    def _count_replaced(self, marketplace_id: Optional[int] = None) -> None:
+        """
+        Under last_wins, count the imports a later frame's row replaced as
+        duplicates.
+        
+        Later frames are not checked against the domains written before,
+        which would hold every domain of the upload in memory, so a domain
+        repeated across frames is imported by each of them. Every offer
+        written or touched gets the upload's seen_at, so once the upload is
+        written, the imports are cut down to the distinct offers kept.
+        
+        Args:
+            marketplace_id: Marketplace whose offers this writer counted
+                (default: every marketplace, for a resumed grouped upload)
+        """
+        if self.dedup_policy != 'last_wins' or not self.results['successful_imports']:
+            return
         try:
-            # Extract domain
-            domain_raw = str(row[self.request.column_mapping.domain_column]).strip()
-            price_raw = row[self.request.column_mapping.price_column]
-            
-            # Skip empty rows or rows with zero/empty prices
-            if not domain_raw or pd.isna(price_raw):
-                return {"is_valid": False}
-            
-            # Check for empty string or zero price values
-            price_str = str(price_raw).strip()
-            if price_str == '' or price_str == '0' or price_str == '0.0' or price_str == '0.00':
-                return {"is_valid": False}
-            
-            # Normalize domain
-            domain = self.domain_service.normalize_domain(domain_raw)
-            if not domain:
-                self.results['errors'].append(f"Row {index + 1}: Invalid domain '{domain_raw}'")
-                return {"is_valid": False}
-            
-            # Parse price
-            try:
-                price_amount = float(price_raw)
-                price_amount_decimal = Decimal(str(price_amount))
-                
-                # Skip rows with zero or negative prices
-                if price_amount <= 0:
-                    return {"is_valid": False}
-                    
-            except (ValueError, TypeError):
-                self.results['errors'].append(f"Row {index + 1}: Invalid price '{price_raw}'")
-                return {"is_valid": False}
-            
-            # Get currency
-            currency = self._validate_currency(row)
-            
-            # Convert to USD
-            price_usd = self.fx_service.convert_to_usd(price_amount_decimal, currency)
-            if price_usd is None:
-                if currency.upper() == 'USD':
-                    price_usd = price_amount
-                else:
-                    price_usd = None
-            
-            # Debug logging
-            print(f"Row {index + 1}: Amount={price_amount}, Currency={currency}, USD={price_usd}")
-            
-            # Get optional fields
-            listing_url = self._extract_optional_field(row, self.request.column_mapping.url_column)
-            includes_content = self._extract_boolean_field(row, self.request.column_mapping.content_column, self.request.content_default)
-            dofollow = self._extract_boolean_field(row, self.request.column_mapping.dofollow_column, self.request.dofollow_default)
-            
-            return {
-                "is_valid": True,
-                "domain": domain,
-                "price_amount": price_amount_decimal,
-                "currency": currency,
-                "price_usd": price_usd,
-                "listing_url": listing_url,
-                "includes_content": includes_content,
-                "dofollow": dofollow
-            }
+            kept = self.offer_service.count_seen_offers(self.seen_at, marketplace_id)
+        except Exception as e:
+            logger.error(f"Error counting the offers of the upload: {e}")
+            self.db.rollback()
+            return
+        replaced = max(0, self.results['successful_imports'] - kept)
+        self.results['successful_imports'] -= replaced
+        self.results['duplicate_rows'] += replaced
+
+    def _count_unresolved(self, clean: pd.DataFrame) -> None:
+        """Count the rows imported without a USD price in results['unresolved_currencies']."""
+        unresolved = self.results['unresolved_currencies']
+        for currency, count in clean.loc[clean['price_usd'].isna(), 'price_currency'].value_counts().items():
+            unresolved[currency] = unresolved.get(currency, 0) + int(count)
+
+    def _dedup(self, clean: pd.DataFrame) -> pd.DataFrame:
+        """
+        Collapse the rows of a frame that repeat a domain, by self.dedup_policy.
+        
+        last_wins keeps a domain's last row, first_wins its first and
+        lowest_price its cheapest (in USD, or as listed when the currency
+        has no rate; the first of equal prices). The frame is deduplicated
+        with pandas. Under first_wins and lowest_price, later frames of the
+        upload are then checked against self.kept; a cheaper row replaces
+        the offer written before and is flagged in the `replaces` column
+        (see _count_imported). Under last_wins they need not be: their rows
+        overwrite the offers written before, and are counted once the
+        upload is written (see _count_replaced). A grouped upload
+        deduplicates per marketplace, each writer on its own rows.
+        
+        Args:
+            clean: Valid rows with their USD price
+        
+        Returns:
+            The rows kept, in file order
+        """
+        if self.dedup_policy == 'last_wins':
+            return clean.drop_duplicates('domain', keep='last').assign(replaces=False)
+        
+        prices = clean['price_usd'].fillna(clean['price_amount'])
+        if self.dedup_policy == 'lowest_price':
+            unique = clean.loc[prices.sort_values(kind='stable').index].drop_duplicates('domain').sort_index()
+        else:
+            unique = clean.drop_duplicates('domain', keep='first')
+        prices = prices.loc[unique.index]
+        
+        # Only this frame's rows are looked up, not the domains kept so far
+        written = np.array([domain in self.kept for domain in unique['domain']], dtype=bool)
+        if self.dedup_policy == 'lowest_price' and written.any():
+            kept_prices = np.array([self.kept.get(domain, np.inf) for domain in unique['domain']], dtype=float)
+            keep = prices.to_numpy() < kept_prices
+            unique, prices, written = unique[keep], prices[keep], written[keep]
+        elif self.dedup_policy == 'first_wins' and written.any():
+            unique, prices, written = unique[~written], prices[~written], written[~written]
+        
+        self.kept.update(zip(unique['domain'], prices.tolist()))
+        return unique.assign(replaces=written)
+
+    def _write_batch(self, batch: pd.DataFrame) -> List[int]:
+        """
+        Resolve the batch's domains, write its offers and commit.
+        
+        Unchanged offers only get last_seen_at bumped; the rest are upserted,
+        recording the old price of offers whose price changed (unless
+        settings.ingest_price_history is off).
+        
+        Returns:
+            IDs of the domains written or touched
+        """
+        with self.timer.stage('domain_resolve', len(batch)):
+            domain_ids, new_domains = self.domain_service.get_or_create_domain_ids(batch['domain'].tolist())
+            batch = batch.assign(domain_id=batch['domain'].map(domain_ids))
+        
+        with self.timer.stage('offer_upsert', len(batch)):
+            unchanged = self.offer_service.touch_unchanged_offers(
+                self.marketplace.id, dict(zip(batch['domain_id'], batch['content_hash'])), self.seen_at
+            )
             
+            offers = batch.loc[~batch['domain_id'].isin(unchanged), OFFER_COLUMNS]
+            # Missing values (e.g. no FX rate) are stored as NULL
+            offers = offers.astype(object).where(offers.notna(), None).to_dict('records')
+            new_offers, updated_offers, price_changes = self.offer_service.bulk_upsert_offers(
+                self.marketplace.id, offers, self.seen_at, settings.ingest_price_history
+            )
+        
+        domain_ids = unchanged + [offer['domain_id'] for offer in offers]
+        with self.timer.stage('commit', len(batch)):
+            cache_sync.record_domains(self.db, domain_ids)
+            self.db.commit()
+        
+        self.results['new_domains'] += new_domains
+        self.results['new_offers'] += new_offers
+        self.results['updated_offers'] += updated_offers
+        self.results['unchanged_offers'] += len(unchanged)
+        self.results['price_changes'] += price_changes
+        return domain_ids
+
+    def delist_missing_offers(self) -> None:
+        """Delist the marketplace's offers this upload didn't contain."""
+        # After failed batches, offers that are still listed would look missing
+        if self.results['failed_imports'] or not self.results['successful_imports']:
+            logger.info("Skipping delisting: the upload wasn't fully imported")
+            return
+        
+        try:
+            with self.timer.stage('delist'):
+                domain_ids = self.offer_service.delist_missing_offers(self.marketplace.id, self.seen_at)
+                cache_sync.record_marketplace(self.db, self.marketplace.id)
+                self.db.commit()
         except Exception as e:
-            self.results['errors'].append(f"Row {index + 1}: Error extracting data: {str(e)}")
-            return {"is_valid": False}
-
-    def _validate_currency(self, row: pd.Series) -> str:
-        """Validate and determine the currency for the row."""
-        currency = self.request.currency_default
-        
-        if self.request.column_mapping.currency_column and self.request.column_mapping.currency_column in self.df.columns:
-            currency_raw = row[self.request.column_mapping.currency_column]
-            if pd.notna(currency_raw) and str(currency_raw).strip():
-                currency = str(currency_raw).strip().upper()
-        
-        return currency
-
-    def _extract_optional_field(self, row: pd.Series, column_name: Optional[str]) -> Optional[str]:
-        """Extract an optional string field from the row."""
-        if column_name and column_name in self.df.columns:
-            value = row[column_name]
-            if pd.notna(value) and str(value).strip():
-                return str(value).strip()
-        return None
-
-    def _extract_boolean_field(self, row: pd.Series, column_name: Optional[str], default_value: bool) -> bool:
-        """Extract a boolean field from the row."""
-        if column_name and column_name in self.df.columns:
-            value = row[column_name]
-            if pd.notna(value):
-                return bool(value)
-        return default_value
-
-    def _process_offer(self, domain_record, data: Dict[str, Any]):
-        """Handle the creation or update of an offer."""
+            logger.error(f"Error delisting missing offers: {e}")
+            self.db.rollback()
+            self.results['errors'].append(f"Delisting missing offers: {str(e)}")
+            return
+        
+        logger.info(f"Delisted {len(domain_ids)} offers missing from the upload")
+        self.results['delisted_offers'] = len(domain_ids)
+        self.timer.add('delist', 0, len(domain_ids))
+        # A whole feed can vanish at once; keep the IN lists batch-sized
+        batch_size = settings.ingest_batch_size
+        with self.timer.stage('index_refresh', len(domain_ids)):
+            for start_idx in range(0, len(domain_ids), batch_size):
+                offer_index.refresh_domains(self.db, domain_ids[start_idx:start_idx + batch_size])
+            lookup_cache.invalidate_domains(domain_ids)
+
+    def _get_or_create_marketplace(self):
+        """Get or create the marketplace for this upload."""
         try:
-            existing_offer = self.offer_service.get_offer_by_domain_and_marketplace(
-                domain_record.id, self.marketplace.id
+            marketplace = self.marketplace_service.get_or_create_marketplace(
+                name=self.request.marketplace_name,
+                slug=self.request.marketplace_slug,
+                region=self.request.region
             )
-            
-            if existing_offer:
-                print(f"Updating existing offer ID {existing_offer.id} for domain {domain_record.root_domain}")
-                # Update existing offer
-                self.offer_service.update_offer(existing_offer.id, {
-                    'price_amount': data['price_amount'],
-                    'price_currency': data['currency'],
-                    'price_usd': data['price_usd'],
-                    'listing_url': data['listing_url'],
-                    'includes_content': data['includes_content'],
-                    'dofollow': data['dofollow'],
-                })
-                self.results['updated_offers'] += 1
-            else:
-                print(f"Creating new offer for domain {domain_record.root_domain}")
-                # Create new offer
-                offer_data = {
-                    'domain_id': domain_record.id,
-                    'marketplace_id': self.marketplace.id,
-                    'listing_url': data['listing_url'],
-                    'price_amount': data['price_amount'],
-                    'price_currency': data['currency'],
-                    'price_usd': data['price_usd'],
-                    'includes_content': data['includes_content'],
-                    'dofollow': data['dofollow'],
-                }
-                print(f"Creating offer with data: {offer_data}")
-                
-                try:
-                    offer = self.offer_service.create_offer(offer_data)
-                    print(f"Created offer ID: {offer.id}")
-                    self.results['new_offers'] += 1
-                except Exception as e:
-                    print(f"Error creating offer: {e}")
-                    self.results['errors'].append(f"Failed to create offer: {str(e)}")
-                    raise
-                    
+            logger.info(f"Marketplace: ID={marketplace.id}, Name='{marketplace.name}', Slug='{marketplace.slug}'")
+            return marketplace
         except Exception as e:
-            print(f"Error in offer lookup/creation: {e}")
-            self.results['errors'].append(f"Error in offer processing: {str(e)}")
-            raise
+            logger.error(f"Error creating/finding marketplace: {e}")
+            raise Exception(f"Failed to create/find marketplace: {str(e)}")
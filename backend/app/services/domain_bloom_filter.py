@@ -0,0 +1,143 @@
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional
+from datetime import datetime
+import hashlib
+import math
+import threading
+
+from app.core.config import settings
+from app.models.domain import Domain
+
+
+class BloomFilter:
+    """
+    Fixed-size bloom filter over strings.
+
+    Bit positions come from double hashing a single blake2b digest, so each
+    add/check costs one hash regardless of the number of hash functions.
+    """
+
+    def __init__(self, capacity: int, fp_rate: float):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def estimated_fp_rate(self) -> float:
+        """False-positive rate expected at the current fill level."""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+
+class KnownDomainFilter:
+    """
+    Negative cache of every Domain.root_domain.
+
+    A miss means the domain is definitely not in the database, so lookups
+    can skip the index probe on domains.root_domain. Until the filter is
+    loaded every domain is reported as possibly known.
+    """
+
+    def __init__(
+        self,
+        capacity: int = settings.domain_bloom_capacity,
+        fp_rate: float = settings.domain_bloom_fp_rate
+    ):
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self._filter: Optional[BloomFilter] = None
+        self._lock = threading.Lock()
+        self._loading = False
+        self._added_while_loading: List[str] = []
+        self.loaded_at: Optional[datetime] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._filter is not None
+
+    def load(self, db: Session, batch_size: int = 10000) -> int:
+        """
+        (Re)build the filter from the domains table.
+
+        The filter is sized for twice the current number of domains (at
+        least the configured capacity) to leave room for growth.
+
+        Returns:
+            Number of domains loaded
+        """
+        total = db.query(Domain.id).count()
+        bloom = BloomFilter(max(self.capacity, total * 2), self.fp_rate)
+
+        with self._lock:
+            self._loading = True
+            self._added_while_loading = []
+
+        try:
+            for (root_domain,) in db.query(Domain.root_domain).yield_per(batch_size):
+                bloom.add(root_domain)
+        finally:
+            with self._lock:
+                # Domains created while we were scanning must not be lost
+                for root_domain in self._added_while_loading:
+                    bloom.add(root_domain)
+                self._added_while_loading = []
+                self._loading = False
+
+        with self._lock:
+            self._filter = bloom
+            self.loaded_at = datetime.utcnow()
+
+        return bloom.count
+
+    def add(self, domains: Iterable[str]) -> None:
+        """Register newly created domains."""
+        with self._lock:
+            for root_domain in domains:
+                if self._filter is not None:
+                    self._filter.add(root_domain)
+                if self._loading:
+                    self._added_while_loading.append(root_domain)
+
+    def might_contain(self, root_domain: str) -> bool:
+        """False only if the domain is definitely not in the database."""
+        bloom = self._filter
+        return bloom is None or root_domain in bloom
+
+    def stats(self) -> Dict:
+        """Get size and accuracy information for the admin dashboard."""
+        bloom = self._filter
+        if bloom is None:
+            return {"ready": False, "target_fp_rate": self.fp_rate}
+
+        return {
+            "ready": True,
+            "loaded_at": self.loaded_at,
+            "domains": bloom.count,
+            "capacity": bloom.capacity,
+            "target_fp_rate": bloom.fp_rate,
+            "estimated_fp_rate": round(bloom.estimated_fp_rate(), 6),
+            "num_bits": bloom.num_bits,
+            "num_hashes": bloom.num_hashes,
+            "memory_bytes": len(bloom.bits),
+            "over_capacity": bloom.count > bloom.capacity,
+        }
+
+
+known_domain_filter = KnownDomainFilter()
@@ -0,0 +1,138 @@
+from sqlalchemy.orm import Session
+from collections import Counter
+from typing import Callable, Iterable, List
+from datetime import datetime
+import logging
+import threading
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.domain import Domain
+from app.models.domain_demand import DomainDemand
+
+logger = logging.getLogger(__name__)
+
+
+class DomainDemandRecorder:
+    """
+    Batches searched-but-unknown domains and writes them off the request path.
+
+    Lookups call record(), which only updates an in-memory counter. A
+    background thread flushes the pending counts every flush_interval
+    seconds, or sooner once batch_size distinct domains are waiting.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        flush_interval: float = settings.domain_demand_flush_interval,
+        batch_size: int = settings.domain_demand_batch_size
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending: Counter = Counter()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    def record(self, domains: Iterable[str]) -> None:
+        """Queue normalized domains that a lookup could not resolve."""
+        with self._lock:
+            self._pending.update(domains)
+            if len(self._pending) >= self.batch_size:
+                self._wake.set()
+
+    def start(self) -> None:
+        """Start the background flush thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="domain-demand-recorder", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and flush whatever is still pending."""
+        self._stopping = True
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stopping:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush domain demand: {e}")
+
+    def flush(self) -> int:
+        """
+        Write all pending counts in a single transaction.
+
+        Returns:
+            Number of distinct domains written
+        """
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return 0
+
+        db = self.session_factory()
+        try:
+            return self._write(db, pending)
+        except Exception:
+            db.rollback()
+            # Put the counts back so they are retried on the next flush
+            with self._lock:
+                self._pending.update(pending)
+            raise
+        finally:
+            db.close()
+
+    def _write(self, db: Session, pending: Counter) -> int:
+        names = list(pending)
+
+        # Domains that exist by now (e.g. ingested meanwhile) are not demand
+        known = {
+            name for (name,) in db.query(Domain.root_domain).filter(Domain.root_domain.in_(names))
+        }
+        names = [name for name in names if name not in known]
+        if not names:
+            return 0
+
+        now = datetime.utcnow()
+        existing = {
+            d.root_domain: d
+            for d in db.query(DomainDemand).filter(DomainDemand.root_domain.in_(names))
+        }
+
+        new_rows = []
+        for name in names:
+            demand = existing.get(name)
+            if demand:
+                demand.search_count += pending[name]
+                demand.last_searched_at = now
+            else:
+                new_rows.append(DomainDemand(
+                    root_domain=name,
+                    search_count=pending[name],
+                    first_searched_at=now,
+                    last_searched_at=now
+                ))
+
+        db.add_all(new_rows)
+        db.commit()
+        return len(names)
+
+    def get_top_domains(self, db: Session, limit: int = 100) -> List[DomainDemand]:
+        """Get the most searched domains we have no listing for."""
+        return db.query(DomainDemand).order_by(
+            DomainDemand.search_count.desc()
+        ).limit(limit).all()
+
+
+domain_demand_recorder = DomainDemandRecorder()
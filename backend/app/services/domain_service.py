@@ -1,51 +1,148 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 import re
 from urllib.parse import urlparse
+from functools import lru_cache
 import tldextract
 from datetime import datetime
 
+from app.core.config import settings
+from app.core.database import dialect_insert
 from app.models.domain import Domain
+from app.services.domain_bloom_filter import known_domain_filter
+
+
+# Public suffix list bundled with tldextract. Never fetched over the network
+# or cached on disk, so normalization behaves the same in every environment.
+_suffix_extractor = tldextract.TLDExtract(cache_dir=None, suffix_list_urls=())
+
+
+@lru_cache(maxsize=settings.domain_normalize_cache_size)
+def _normalize_domain(domain: str) -> Optional[str]:
+    if not domain:
+        return None
+    
+    # Remove protocol if present
+    if domain.startswith(('http://', 'https://')):
+        domain = domain.replace('http://', '').replace('https://', '')
+    
+    # Remove path, query params, etc.
+    domain = domain.split('/')[0]
+    
+    # Remove port if present
+    domain = domain.split(':')[0]
+    
+    # Extract eTLD+1 using the bundled suffix list
+    try:
+        extracted = _suffix_extractor(domain)
+        if extracted.domain and extracted.suffix:
+            normalized = f"{extracted.domain}.{extracted.suffix}"
+            return normalized.lower()
+    except Exception:
+        pass
+    
+    return None
 
 
 class DomainService:
     def __init__(self, db: Session):
         self.db = db
     
-    def normalize_domain(self, domain: str) -> Optional[str]:
+    @staticmethod
+    def normalize_domain(domain: str) -> Optional[str]:
         """
         Normalize a domain to eTLD+1 format.
         
+        Results are memoized in a bounded LRU shared by the whole process.
+        
         Args:
             domain: Raw domain string (can be URL, subdomain, etc.)
             
         Returns:
             Normalized domain string or None if invalid
         """
-        if not domain:
-            return None
+        return _normalize_domain(domain)
+    
+    @staticmethod
+    def normalize_domains(domains: Iterable[str]) -> List[Optional[str]]:
+        """
+        Normalize many domains at once.
         
-        # Remove protocol if present
-        if domain.startswith(('http://', 'https://')):
-            domain = domain.replace('http://', '').replace('https://', '')
+        Repeated inputs are served from the shared LRU, which matters for
+        uploads and lookups that see the same domains over and over.
         
-        # Remove path, query params, etc.
-        domain = domain.split('/')[0]
+        Args:
+            domains: Raw domain strings
+            
+        Returns:
+            Normalized domains (or None if invalid), in input order
+        """
+        return [_normalize_domain(domain) for domain in domains]
+    
+    @staticmethod
+    def warm_up() -> None:
+        """Load the public suffix snapshot so the first request doesn't pay for it."""
+        _normalize_domain("example.com")
+    
+    @staticmethod
+    def normalization_cache_info():
+        """Hit/miss counters of the normalization LRU."""
+        return _normalize_domain.cache_info()
+    
+    def get_domain_ids(self, domains: List[str]) -> Dict[str, int]:
+        """
+        Resolve existing domains without creating missing ones.
         
-        # Remove port if present
-        domain = domain.split(':')[0]
+        Args:
+            domains: List of normalized domain strings
+            
+        Returns:
+            Mapping of root_domain to domain ID for the domains that exist
+        """
+        if not domains:
+            return {}
         
-        # Extract eTLD+1 using tldextract
-        try:
-            extracted = tldextract.extract(domain)
-            if extracted.domain and extracted.suffix:
-                normalized = f"{extracted.domain}.{extracted.suffix}"
-                return normalized.lower()
-        except Exception:
-            pass
+        return dict(
+            self.db.query(Domain.root_domain, Domain.id).filter(
+                Domain.root_domain.in_(domains)
+            ).all()
+        )
+    
+    def get_or_create_domain_ids(self, domains: List[str]) -> Tuple[Dict[str, int], int]:
+        """
+        Resolve domains to IDs, inserting the missing ones in bulk.
         
-        return None
+        Uses one SELECT for the existing domains and one multi-row INSERT
+        (ON CONFLICT DO NOTHING, so concurrent ingests can't collide) for
+        the rest. The caller commits.
+        
+        Args:
+            domains: List of normalized domain strings
+            
+        Returns:
+            Tuple of (mapping of root_domain to domain ID, number of domains created)
+        """
+        domains = list(dict.fromkeys(domains))
+        domain_ids = self.get_domain_ids(domains)
+        
+        # Sorted so concurrent writers lock new keys in the same order and can't deadlock
+        missing_domains = sorted(d for d in domains if d not in domain_ids)
+        if missing_domains:
+            now = datetime.utcnow()
+            stmt = dialect_insert(self.db, Domain.__table__).on_conflict_do_nothing(
+                index_elements=['root_domain']
+            ).returning(Domain.root_domain)
+            # RETURNING leaves out domains a concurrent ingest inserted first
+            created = self.db.execute(stmt, [
+                {'root_domain': d, 'etld1': self.normalize_domain(d) or d, 'created_at': now}
+                for d in missing_domains
+            ]).scalars().all()
+            domain_ids.update(self.get_domain_ids(missing_domains))
+            known_domain_filter.add(missing_domains)
+            return domain_ids, len(created)
+        
+        return domain_ids, 0
     
     def get_or_create_domains(self, domains: List[str]) -> List[Domain]:
         """
@@ -68,9 +165,8 @@ class DomainService:
         domains_to_create = []
         for domain in domains:
             if domain not in existing_domain_map:
-                # Extract eTLD+1 for new domains
-                extracted = tldextract.extract(domain)
-                etld1 = f"{extracted.domain}.{extracted.suffix}" if extracted.domain and extracted.suffix else domain
+                # Extract eTLD+1 for new domains (already memoized from normalization)
+                etld1 = self.normalize_domain(domain) or domain
                 
                 new_domain = Domain(
                     root_domain=domain,
@@ -87,6 +183,8 @@ class DomainService:
             # Refresh to get IDs
             for domain in domains_to_create:
                 self.db.refresh(domain)
+            
+            known_domain_filter.add(d.root_domain for d in domains_to_create)
         
         # Return all domains (existing + newly created)
         result = list(existing_domain_map.values()) + domains_to_create
@@ -1,6 +1,6 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
-from typing import Dict, Optional, List
+from typing import Dict, Iterable, Optional, List
 from decimal import Decimal
 import requests
 from datetime import date, datetime, timedelta
@@ -45,6 +45,41 @@ class FXService:
         # If not in database, try to fetch from API
         return self._fetch_and_store_rate(currency, target_date)
     
+    def get_usd_rates(self, currencies: Iterable[str], target_date: date = None) -> Dict[str, Optional[Decimal]]:
+        """
+        Resolve the USD rates of several currencies at once.
+        
+        Stored rates come from a single query; each missing currency is
+        fetched from the API once. Codes that aren't three letters are not
+        looked up at all.
+        
+        Args:
+            currencies: Source currency codes, as given
+            target_date: Date for the rates (defaults to today)
+            
+        Returns:
+            Rate per given currency code, None where no rate is available
+        """
+        if not target_date:
+            target_date = date.today()
+        
+        currencies = set(currencies)
+        codes = {c.upper() for c in currencies if len(c) == 3 and c.isalpha()} - {'USD'}
+        
+        rates = {'USD': Decimal(1)}
+        if codes:
+            rates.update(self.db.query(FXRate.currency, FXRate.rate_to_usd).filter(
+                and_(
+                    FXRate.currency.in_(codes),
+                    FXRate.date == target_date
+                )
+            ).all())
+        
+        for code in codes - set(rates):
+            rates[code] = self._fetch_and_store_rate(code, target_date)
+        
+        return {currency: rates.get(currency.upper()) for currency in currencies}
+    
     def _fetch_and_store_rate(self, currency: str, target_date: date) -> Optional[Decimal]:
         """
         Fetch exchange rate from external API and store in database.
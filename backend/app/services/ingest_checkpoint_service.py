@@ -0,0 +1,210 @@
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import or_
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+import hashlib
+import logging
+
+from app.core.config import settings
+from app.models.ingest_checkpoint import IngestCheckpoint
+from app.models.offer import Offer
+from app.schemas.csv_upload import CSVUploadRequest
+from app.services.job_manager import Job, job_manager, worker_alive, worker_id
+
+logger = logging.getLogger(__name__)
+
+# Row errors kept in a checkpoint; a resumed run reports them for the rows it skips
+MAX_CHECKPOINT_ERRORS = 1000
+
+
+def request_hash(upload_request: CSVUploadRequest) -> str:
+    """SHA-256 of an upload request; the same file uploaded with another mapping is another ingest."""
+    return hashlib.sha256(upload_request.model_dump_json().encode()).hexdigest()
+
+
+class IngestCheckpointService:
+    """
+    Progress of single-file ingest jobs, saved after every committed chunk.
+
+    A checkpoint is keyed by the hash of the file and of its upload request.
+    Ingesting the same file again resumes an interrupted run (failed,
+    cancelled, or abandoned by a process that died) from its last committed
+    chunk, and skips a completed one unless the marketplace was written since.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def start(self, file_hash: str, upload_request: CSVUploadRequest, path: str, job: Job) -> IngestCheckpoint:
+        """
+        Get the checkpoint of an upload and claim it for a job, creating it if needed.
+
+        A completed checkpoint that is_done() is returned unclaimed; a completed
+        one that isn't starts over from the first chunk. A checkpoint already
+        claimed for the job (see resume_interrupted_ingests) is returned as is.
+
+        Args:
+            file_hash: SHA-256 of the upload file
+            upload_request: Marketplace, column mapping and defaults of the upload
+            path: Upload file of this run
+            job: Ingest job running it
+
+        Returns:
+            The checkpoint
+
+        Raises:
+            ValueError: If another live job is ingesting the file
+        """
+        key = request_hash(upload_request)
+        checkpoint = self._get(file_hash, key)
+        if checkpoint is None:
+            now = datetime.utcnow()
+            checkpoint = IngestCheckpoint(
+                file_hash=file_hash,
+                request_hash=key,
+                request=upload_request.model_dump_json(),
+                path=path,
+                status="running",
+                job_id=job.id,
+                owner_id=job.owner_id,
+                worker=worker_id(),
+                chunk_size=settings.ingest_chunk_size,
+                chunks_committed=0,
+                rows_committed=0,
+                seen_at=now,
+                created_at=now,
+                updated_at=now
+            )
+            self.db.add(checkpoint)
+            try:
+                self.db.commit()
+                return checkpoint
+            except IntegrityError:
+                # Created by a concurrent upload of the same file
+                self.db.rollback()
+                checkpoint = self._get(file_hash, key)
+
+        if checkpoint.job_id == job.id or self.is_done(checkpoint):
+            return checkpoint
+
+        claim: Dict[str, Any] = {}
+        if checkpoint.status == "completed":
+            # The marketplace was written since: ingest the file again
+            claim = {
+                'chunk_size': settings.ingest_chunk_size, 'chunks_committed': 0, 'rows_committed': 0,
+                'results': None, 'seen_at': datetime.utcnow(),
+            }
+        elif not self.is_abandoned(checkpoint):
+            raise ValueError(f"This file is already being ingested by job {checkpoint.job_id}")
+
+        if not self.claim(checkpoint, job, path, **claim):
+            raise ValueError("This file is already being ingested by another job")
+        if checkpoint.chunks_committed:
+            logger.info(f"Resuming ingest {checkpoint.id} after {checkpoint.rows_committed} rows "
+                        f"({checkpoint.chunks_committed} chunks)")
+        return checkpoint
+
+    def save(self, checkpoint: IngestCheckpoint, chunks: int, marketplace_id: int, results: Dict[str, Any]) -> None:
+        """Record that the first chunks of the upload are committed, with the running counts."""
+        self.db.query(IngestCheckpoint).filter(IngestCheckpoint.id == checkpoint.id).update({
+            'chunks_committed': chunks,
+            'rows_committed': results['total_rows'],
+            'marketplace_id': marketplace_id,
+            'results': self._stored_results(results),
+            'updated_at': datetime.utcnow(),
+        })
+        self.db.commit()
+
+    def finish(
+        self,
+        checkpoint: IngestCheckpoint,
+        status: str,
+        results: Optional[Dict[str, Any]] = None,
+        marketplace_id: Optional[int] = None,
+        error: Optional[str] = None
+    ) -> None:
+        """Record the end of a run: completed (with the final results), failed or cancelled."""
+        values: Dict[str, Any] = {'status': status, 'error': error, 'finished_at': datetime.utcnow()}
+        values['updated_at'] = values['finished_at']
+        if results is not None:
+            values['results'] = self._stored_results(results)
+        if marketplace_id is not None:
+            values['marketplace_id'] = marketplace_id
+        self.db.query(IngestCheckpoint).filter(IngestCheckpoint.id == checkpoint.id).update(values)
+        self.db.commit()
+
+    def is_done(self, checkpoint: IngestCheckpoint) -> bool:
+        """Whether the checkpoint's upload completed and ingesting it again would change nothing."""
+        if checkpoint.status != "completed":
+            return False
+        # Any later upload of the marketplace bumps last_seen_at or delists offers
+        written_since = self.db.query(Offer.id).filter(
+            Offer.marketplace_id == checkpoint.marketplace_id,
+            or_(Offer.last_seen_at > checkpoint.seen_at, Offer.delisted_at > checkpoint.finished_at)
+        ).first()
+        return written_since is None
+
+    def is_abandoned(self, checkpoint: IngestCheckpoint) -> bool:
+        """
+        Whether no live job is running a checkpoint.
+
+        The job is known to this process if it started it; a job of another
+        process on this host is gone with that process (see worker_alive). Others count as running
+        while they save a chunk at least every ingest_checkpoint_stale_seconds.
+        """
+        if checkpoint.status != "running":
+            return True
+
+        if checkpoint.worker == worker_id():
+            job = job_manager.get_local(checkpoint.job_id)
+            return job is None or job.finished
+
+        if worker_alive(checkpoint.worker) is False:
+            return True
+
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.ingest_checkpoint_stale_seconds)
+        return self.db.query(IngestCheckpoint.id).filter(
+            IngestCheckpoint.id == checkpoint.id,
+            IngestCheckpoint.updated_at < cutoff
+        ).first() is not None
+
+    def interrupted(self) -> List[IngestCheckpoint]:
+        """Running checkpoints whose job is gone, oldest first."""
+        running = (
+            self.db.query(IngestCheckpoint)
+            .filter(IngestCheckpoint.status == "running")
+            .order_by(IngestCheckpoint.created_at)
+            .all()
+        )
+        return [checkpoint for checkpoint in running if self.is_abandoned(checkpoint)]
+
+    def _get(self, file_hash: str, key: str) -> Optional[IngestCheckpoint]:
+        return self.db.query(IngestCheckpoint).filter(
+            IngestCheckpoint.file_hash == file_hash,
+            IngestCheckpoint.request_hash == key
+        ).first()
+
+    def claim(self, checkpoint: IngestCheckpoint, job: Job, path: str, **values: Any) -> bool:
+        """Take a checkpoint over for a job, unless another one claimed it since it was read."""
+        claimed = self.db.query(IngestCheckpoint).filter(
+            IngestCheckpoint.id == checkpoint.id,
+            IngestCheckpoint.job_id == checkpoint.job_id
+        ).update({
+            'status': "running",
+            'job_id': job.id,
+            'owner_id': job.owner_id,
+            'worker': worker_id(),
+            'path': path,
+            'error': None,
+            'finished_at': None,
+            'updated_at': datetime.utcnow(),
+            **values
+        }, synchronize_session=False)
+        self.db.commit()
+        self.db.refresh(checkpoint)
+        return claimed == 1
+
+    @staticmethod
+    def _stored_results(results: Dict[str, Any]) -> Dict[str, Any]:
+        return {**results, 'errors': results['errors'][:MAX_CHECKPOINT_ERRORS]}
@@ -0,0 +1,137 @@
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional
+from datetime import datetime
+import threading
+import time
+
+# Stages of an ingest, in pipeline order:
+# - parse: reading rows from the file
+# - normalize: validation, domain normalization and content hashes (prepare_frame)
+# - fx: USD conversion
+# - dedup: collapsing rows that repeat a domain (see CSVProcessingService._dedup)
+# - copy: loading the staging table (PostgreSQL COPY path only)
+# - domain_resolve: looking up and creating domains
+# - offer_upsert: touching unchanged offers and upserting the rest
+# - commit: committing each batch
+# - index_refresh: refreshing the offer index and lookup cache
+# - delist: delisting offers missing from the upload
+INGEST_STAGES = [
+    'parse', 'normalize', 'fx', 'dedup', 'copy', 'domain_resolve', 'offer_upsert', 'commit', 'index_refresh', 'delist'
+]
+
+
+class StageTimer:
+    """Wall time and rows per ingest stage of one upload."""
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = dict.fromkeys(INGEST_STAGES, 0.0)
+        self.rows: Dict[str, int] = dict.fromkeys(INGEST_STAGES, 0)
+
+    def add(self, stage: str, seconds: float, rows: int = 0) -> None:
+        self.seconds[stage] += seconds
+        self.rows[stage] += rows
+
+    @contextmanager
+    def stage(self, stage: str, rows: int = 0) -> Iterator[None]:
+        """Time the enclosed block as a stage that handled the given rows."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started, rows)
+
+    def frames(self, stage: str, frames: Iterable) -> Iterator:
+        """Iterate frames, timing each read (e.g. of the next file chunk) as a stage."""
+        frames = iter(frames)
+        while True:
+            started = time.perf_counter()
+            df = next(frames, None)
+            if df is None:
+                return
+            self.add(stage, time.perf_counter() - started, len(df))
+            yield df
+
+    def merge(self, other: Dict[str, Dict[str, float]]) -> None:
+        """Add the timings of another timer, given as its to_dict()."""
+        for stage in INGEST_STAGES:
+            self.add(stage, other['seconds'][stage], other['rows'][stage])
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        """Plain dict form, e.g. to send back from a worker process."""
+        return {'seconds': dict(self.seconds), 'rows': dict(self.rows)}
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Time, rows and rows/sec of every stage that ran."""
+        return {
+            stage: {
+                'time_ms': int(self.seconds[stage] * 1000),
+                'rows': self.rows[stage],
+                'rows_per_second': round(self.rows[stage] / self.seconds[stage], 1) if self.seconds[stage] > 0 else 0.0,
+            }
+            for stage in INGEST_STAGES
+            if self.seconds[stage] > 0 or self.rows[stage] > 0
+        }
+
+
+class IngestMetrics:
+    """
+    Process-wide ingest counters: completed uploads, rows and the time
+    spent per stage, summed since startup.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.started_at = datetime.utcnow()
+        self.uploads = 0
+        self.rows = 0
+        self.successful_imports = 0
+        self.failed_imports = 0
+        self.seconds = 0.0
+        self.timer = StageTimer()
+        self.last_upload: Optional[Dict[str, Any]] = None
+
+    def record(self, marketplace_id: int, results: Dict[str, Any], timer: StageTimer, elapsed: float) -> None:
+        """Add a finished upload (CSVProcessingService results and timings)."""
+        with self._lock:
+            self.uploads += 1
+            self.rows += results['total_rows']
+            self.successful_imports += results['successful_imports']
+            self.failed_imports += results['failed_imports']
+            self.seconds += elapsed
+            self.timer.merge(timer.to_dict())
+            self.last_upload = {
+                'marketplace_id': marketplace_id,
+                'finished_at': datetime.utcnow(),
+                'rows': results['total_rows'],
+                'time_ms': int(elapsed * 1000),
+                'stages': timer.summary(),
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the counters, with per-stage totals and their share of ingest time."""
+        with self._lock:
+            stages = self.timer.summary()
+            for stage, summary in stages.items():
+                summary['share'] = round(self.timer.seconds[stage] / self.seconds, 3) if self.seconds > 0 else 0.0
+            return {
+                'started_at': self.started_at,
+                'uploads': self.uploads,
+                'rows': self.rows,
+                'successful_imports': self.successful_imports,
+                'failed_imports': self.failed_imports,
+                'time_ms': int(self.seconds * 1000),
+                'rows_per_second': round(self.rows / self.seconds, 1) if self.seconds > 0 else 0.0,
+                'stages': stages,
+                'last_upload': self.last_upload,
+            }
+
+    def reset(self) -> None:
+        """Zero every counter."""
+        with self._lock:
+            self._reset()
+
+
+ingest_metrics = IngestMetrics()
@@ -0,0 +1,454 @@
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.orm import Session
+from sqlalchemy import or_
+from typing import Any, Callable, Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+from pydantic_core import to_jsonable_python
+import logging
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.background_job import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+
+def process_start_time(pid: int) -> Optional[str]:
+    """Start time of a process of this host, in clock ticks since boot; None if unknown (not Linux) or gone."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # Fields after the parenthesized command name, which may contain spaces
+    return stat.rpartition(")")[2].split()[19]
+
+
+def worker_id() -> str:
+    """
+    host:pid:start of this process, recorded with the jobs and checkpoints it runs.
+
+    The start time tells this process apart from a later one given the same
+    pid, e.g. pid 1 of a restarted container. It is left out where it is
+    unknown.
+    """
+    pid = os.getpid()
+    start = process_start_time(pid)
+    return f"{socket.gethostname()}:{pid}:{start}" if start else f"{socket.gethostname()}:{pid}"
+
+
+def worker_alive(worker: Optional[str]) -> Optional[bool]:
+    """
+    Whether the process a worker_id() names is still running.
+
+    Returns:
+        None if it ran on another host (or the ID can't be read); otherwise
+        whether its pid is alive and, if a start time was recorded, still
+        belongs to the process that started then
+    """
+    host, _, process = (worker or "").partition(":")
+    pid, _, start = process.partition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return None
+    if not pid_alive(int(pid)):
+        return False
+    return not start or process_start_time(int(pid)) in (start, None)
+
+
+def pid_alive(pid: int) -> bool:
+    """Whether a process of this host is still running."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, but belongs to another user
+        return True
+    return True
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Datetimes read back from a timezone-aware column, comparable with utcnow() again."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker function to stop a job that was cancelled."""
+
+
+class Job:
+    """State of one background job, updated by its worker thread."""
+
+    def __init__(
+        self,
+        kind: str,
+        owner_id: int,
+        total: int = 0,
+        summarize: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None
+    ):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.owner_id = owner_id
+        self.status = "queued"
+        self.total = total
+        self.processed = 0
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self.result: Dict[str, Any] = {}
+        # Cuts the result down to what is stored and reported (e.g. the first few row errors)
+        self.summarize = summarize
+        # Output file (or directory) written by the worker, removed when the job expires
+        self.result_path: Optional[str] = None
+        self.cancel_requested = False
+        # Set by JobManager.submit; progress is saved through it
+        self._manager: Optional["JobManager"] = None
+        self._synced_at = 0.0
+        # advance() may be called from several writer threads of one job
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_record(cls, record: BackgroundJob) -> "Job":
+        """Snapshot of a job from its stored state, e.g. one run by another process."""
+        job = cls(record.kind, record.owner_id, record.total)
+        job.id = record.id
+        job.status = record.status
+        job.processed = record.processed
+        job.created_at = naive_utc(record.created_at)
+        job.started_at = naive_utc(record.started_at)
+        job.finished_at = naive_utc(record.finished_at)
+        job.error = record.error
+        job.result = record.result or {}
+        job.result_path = record.result_path
+        job.cancel_requested = record.cancel_requested
+        return job
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def advance(self, count: int) -> None:
+        """Record that another count items have been processed."""
+        with self._lock:
+            self.processed += count
+        self._sync()
+
+    def check_cancelled(self) -> None:
+        """Raise JobCancelled if cancellation was requested; call between units of work."""
+        self._sync()
+        if self.cancel_requested:
+            raise JobCancelled()
+
+    def _sync(self) -> None:
+        """Save the progress and pick up a cancellation, at most once per job_sync_interval."""
+        if self._manager is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if now - self._synced_at < settings.job_sync_interval:
+                return
+            self._synced_at = now
+        self._manager.sync(self)
+
+    @property
+    def summary(self) -> Dict[str, Any]:
+        """The result as stored and reported."""
+        return self.summarize(self.result) if self.summarize else self.result
+
+    @property
+    def items_per_second(self) -> float:
+        if not self.started_at:
+            return 0.0
+        elapsed = ((self.finished_at or datetime.utcnow()) - self.started_at).total_seconds()
+        return round(self.processed / elapsed, 1) if elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "total": self.total,
+            "processed": self.processed,
+            "progress": round(self.processed / self.total, 4) if self.total else 0.0,
+            "items_per_second": self.items_per_second,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "result": self.summary,
+        }
+
+
+class JobManager:
+    """
+    Runs long jobs on a bounded worker pool and keeps their state in the
+    background_jobs table.
+
+    A job runs in the process that accepted it, which saves its progress
+    every job_sync_interval seconds; any process can report it or cancel
+    it. Result files are written to results_dir, which the worker
+    processes of one host share. Finished jobs (with their result files)
+    are dropped after job_retention_seconds.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = settings.job_max_workers,
+        retention_seconds: int = settings.job_retention_seconds,
+        results_dir: str = settings.job_results_dir,
+        session_factory: Callable[[], Session] = SessionLocal
+    ):
+        self.max_workers = max_workers
+        self.retention = timedelta(seconds=retention_seconds)
+        self.results_dir = results_dir
+        self.session_factory = session_factory
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Jobs run by this process; their state is fresher than the stored one
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, job: Job, fn: Callable[[Job], Dict[str, Any]]) -> Job:
+        """
+        Queue a job.
+
+        Args:
+            job: Job to track
+            fn: Worker function; receives the job, reports progress through
+                job.advance() and returns the result summary
+
+        Returns:
+            The queued job
+        """
+        self._purge_expired()
+        self._insert(job)
+        job._manager = self
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+            self._jobs[job.id] = job
+            self._executor.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job by ID, whichever process runs it."""
+        job = self.get_local(job_id)
+        if job is not None:
+            return job
+
+        db = self.session_factory()
+        try:
+            record = db.query(BackgroundJob).filter(BackgroundJob.id == job_id).first()
+            return Job.from_record(record) if record else None
+        finally:
+            db.close()
+
+    def get_local(self, job_id: str) -> Optional[Job]:
+        """Get a job run by this process."""
+        return self._jobs.get(job_id)
+
+    def cancel(self, job: Job) -> None:
+        """
+        Ask a job to stop.
+
+        A queued job is dropped before it starts; a running job stops the
+        next time its worker calls job.check_cancelled(), within
+        job_sync_interval seconds when another process runs it.
+        """
+        if job.finished:
+            return
+        job.cancel_requested = True
+        local = self.get_local(job.id)
+        if local is not None:
+            local.cancel_requested = True
+
+        db = self.session_factory()
+        try:
+            db.query(BackgroundJob).filter(
+                BackgroundJob.id == job.id,
+                BackgroundJob.status.in_(("queued", "running"))
+            ).update({"cancel_requested": True}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def sync(self, job: Job) -> None:
+        """
+        Save a running job's progress and read whether it was cancelled.
+
+        Errors are logged, not raised: the job keeps running and the next
+        sync tries again.
+        """
+        db = self.session_factory()
+        try:
+            db.query(BackgroundJob).filter(BackgroundJob.id == job.id).update(
+                self._state(job), synchronize_session=False
+            )
+            cancel_requested = db.query(BackgroundJob.cancel_requested).filter(BackgroundJob.id == job.id).scalar()
+            db.commit()
+            if cancel_requested:
+                job.cancel_requested = True
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Failed to save the progress of job {job.id}: {e}")
+        finally:
+            db.close()
+
+    def fail_interrupted(self) -> int:
+        """
+        Mark the unfinished jobs of dead processes on this host as failed.
+
+        A process is dead when its pid is gone or now belongs to a process
+        started later (see worker_alive). Call at startup, before any job is
+        submitted: this process runs no job yet, so its own worker ID counts
+        as dead too. Ingests are resumed from their checkpoints as new jobs.
+
+        Returns:
+            Number of jobs marked failed
+        """
+        db = self.session_factory()
+        try:
+            unfinished = db.query(BackgroundJob.id, BackgroundJob.worker).filter(
+                BackgroundJob.status.in_(("queued", "running"))
+            ).all()
+            interrupted = [
+                job_id for job_id, worker in unfinished
+                if worker == worker_id() or worker_alive(worker) is False
+            ]
+
+            if interrupted:
+                now = datetime.utcnow()
+                db.query(BackgroundJob).filter(BackgroundJob.id.in_(interrupted)).update({
+                    "status": "failed",
+                    "error": "Interrupted: the process running the job stopped",
+                    "finished_at": now,
+                    "updated_at": now,
+                }, synchronize_session=False)
+                db.commit()
+            return len(interrupted)
+        finally:
+            db.close()
+
+    def result_path(self, job: Job, extension: str) -> str:
+        """Path of the output file for a job."""
+        os.makedirs(self.results_dir, exist_ok=True)
+        return os.path.join(self.results_dir, f"{job.kind}-{job.id}.{extension}")
+
+    def shutdown(self) -> None:
+        """Stop accepting jobs; running jobs are abandoned with the process."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _run(self, job: Job, fn: Callable[[Job], Dict[str, Any]]) -> None:
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        status = "failed"
+        try:
+            job.check_cancelled()
+            job.result = fn(job) or {}
+            status = "completed"
+        except JobCancelled:
+            logger.info(f"Job {job.id} ({job.kind}) cancelled")
+            status = "cancelled"
+        except Exception as e:
+            logger.exception(f"Job {job.id} ({job.kind}) failed")
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.utcnow()
+            # Saved before it is set, so a job seen finished has its final state stored
+            self._save(job, status)
+            job.status = status
+
+    def _state(self, job: Job, status: Optional[str] = None) -> Dict[str, Any]:
+        """Column values of a job's current state, or of its final one given its status."""
+        return {
+            "status": status or job.status,
+            "total": job.total,
+            "processed": job.processed,
+            "error": job.error,
+            "result": to_jsonable_python(job.summary),
+            "result_path": job.result_path,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+            "updated_at": datetime.utcnow(),
+        }
+
+    def _insert(self, job: Job) -> None:
+        db = self.session_factory()
+        try:
+            db.add(BackgroundJob(
+                id=job.id,
+                kind=job.kind,
+                owner_id=job.owner_id,
+                cancel_requested=job.cancel_requested,
+                worker=worker_id(),
+                created_at=job.created_at,
+                **self._state(job)
+            ))
+            db.commit()
+        finally:
+            db.close()
+
+    def _save(self, job: Job, status: str) -> None:
+        """Save a finished job with its final status; retried once, since its state is final."""
+        for attempt in range(2):
+            db = self.session_factory()
+            try:
+                db.query(BackgroundJob).filter(BackgroundJob.id == job.id).update(
+                    self._state(job, status), synchronize_session=False
+                )
+                db.commit()
+                return
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Failed to save job {job.id} (attempt {attempt + 1}): {e}")
+            finally:
+                db.close()
+
+    def _purge_expired(self) -> None:
+        cutoff = datetime.utcnow() - self.retention
+        with self._lock:
+            for job in [job for job in self._jobs.values() if job.finished and job.finished_at < cutoff]:
+                del self._jobs[job.id]
+
+        # Also jobs whose process died without finishing them, once nothing was saved for as long
+        db = self.session_factory()
+        try:
+            expired = db.query(BackgroundJob.id, BackgroundJob.result_path).filter(
+                or_(BackgroundJob.finished_at < cutoff, BackgroundJob.updated_at < cutoff)
+            ).all()
+            if not expired:
+                return
+            db.query(BackgroundJob).filter(
+                BackgroundJob.id.in_([job_id for job_id, _ in expired])
+            ).delete(synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Failed to purge expired jobs: {e}")
+            return
+        finally:
+            db.close()
+
+        for job_id, result_path in expired:
+            if result_path and os.path.exists(result_path):
+                try:
+                    if os.path.isdir(result_path):
+                        shutil.rmtree(result_path)
+                    else:
+                        os.remove(result_path)
+                except OSError as e:
+                    logger.warning(f"Failed to remove result file of job {job_id}: {e}")
+
+
+job_manager = JobManager()
@@ -0,0 +1,182 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import threading
+
+from app.core.config import settings
+from app.services.offer_index import IndexedOffer
+
+# (offer, is_best_price) pairs for one domain, ranked with the request's filters
+OfferBundle = Tuple[Tuple[IndexedOffer, bool], ...]
+FilterKey = Tuple[Tuple[str, ...], Optional[float], Optional[float]]
+CacheKey = Tuple[str, FilterKey]
+
+
+class LookupCache:
+    """
+    Bounded LRU cache of per-domain offer bundles for the lookup endpoint.
+
+    Entries are keyed by normalized domain plus the marketplace and price
+    filters, and sized by the number of offers they hold so memory stays
+    bounded no matter how large individual bundles are. Only domains that
+    exist in the database are cached, so every entry can be invalidated by
+    domain id or marketplace id when ingest or admin changes touch them.
+    """
+
+    def __init__(self, max_offers: int = settings.lookup_cache_max_offers):
+        self.max_offers = max_offers
+        self._entries: "OrderedDict[CacheKey, Tuple[int, OfferBundle]]" = OrderedDict()
+        self._keys_by_domain_id: Dict[int, Set[CacheKey]] = {}
+        self._keys_by_marketplace_id: Dict[int, Set[CacheKey]] = {}
+        self._marketplace_filtered_keys: Set[CacheKey] = set()
+        self._size = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def filter_key(
+        marketplaces: Optional[List[str]],
+        min_price_usd: Optional[float],
+        max_price_usd: Optional[float]
+    ) -> FilterKey:
+        """Canonical form of the lookup filters (empty filters mean no filter)."""
+        return (
+            tuple(sorted(set(marketplaces))) if marketplaces else (),
+            min_price_usd or None,
+            max_price_usd or None,
+        )
+
+    @property
+    def generation(self) -> int:
+        """
+        Bumped on every invalidation.
+
+        Read it before querying the database and pass it to put(), so a
+        bundle read before a concurrent invalidation is never cached.
+        """
+        return self._generation
+
+    def get(self, domain: str, filter_key: FilterKey) -> Optional[OfferBundle]:
+        """Get a cached bundle, or None on a miss."""
+        key = (domain, filter_key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(
+        self,
+        domain: str,
+        domain_id: int,
+        filter_key: FilterKey,
+        bundle: OfferBundle,
+        generation: int
+    ) -> None:
+        """Cache a bundle read from the database at the given generation."""
+        weight = self._weight(bundle)
+        if weight > self.max_offers:
+            return
+
+        key = (domain, filter_key)
+        with self._lock:
+            if generation != self._generation:
+                # Something was invalidated while the bundle was being read
+                return
+
+            self._remove(key)
+            self._entries[key] = (domain_id, bundle)
+            self._size += weight
+            self._keys_by_domain_id.setdefault(domain_id, set()).add(key)
+            for marketplace_id in {offer.marketplace_id for offer, _ in bundle}:
+                self._keys_by_marketplace_id.setdefault(marketplace_id, set()).add(key)
+            if filter_key[0]:
+                self._marketplace_filtered_keys.add(key)
+
+            while self._size > self.max_offers:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate_domains(self, domain_ids: Iterable[int]) -> None:
+        """Drop every entry for the given domains."""
+        with self._lock:
+            self._generation += 1
+            for domain_id in set(domain_ids):
+                for key in list(self._keys_by_domain_id.get(domain_id, ())):
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def invalidate_marketplace(self, marketplace_id: int) -> None:
+        """
+        Drop every entry that holds an offer from a marketplace.
+
+        Entries filtered by marketplace slug are dropped too, since a renamed
+        or deleted marketplace can change which offers those filters match.
+        """
+        with self._lock:
+            self._generation += 1
+            keys = self._keys_by_marketplace_id.get(marketplace_id, set()) | self._marketplace_filtered_keys
+            for key in list(keys):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._keys_by_domain_id.clear()
+            self._keys_by_marketplace_id.clear()
+            self._marketplace_filtered_keys.clear()
+            self._size = 0
+
+    def stats(self) -> Dict:
+        """Get size and hit-rate information for the admin dashboard."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "offers": self._size - len(self._entries),
+            "size": self._size,
+            "max_size": self.max_offers,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    @staticmethod
+    def _weight(bundle: OfferBundle) -> int:
+        # Empty bundles still cost a slot
+        return 1 + len(bundle)
+
+    def _remove(self, key: CacheKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+
+        domain_id, bundle = entry
+        self._size -= self._weight(bundle)
+        self._discard(self._keys_by_domain_id, domain_id, key)
+        for offer, _ in bundle:
+            self._discard(self._keys_by_marketplace_id, offer.marketplace_id, key)
+        self._marketplace_filtered_keys.discard(key)
+
+    @staticmethod
+    def _discard(keys_by_id: Dict[int, Set[CacheKey]], id_: int, key: CacheKey) -> None:
+        keys = keys_by_id.get(id_)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del keys_by_id[id_]
+
+
+lookup_cache = LookupCache()
@@ -1,8 +1,12 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Optional
+from sqlalchemy import func, or_
+from typing import Dict, List, Optional
 from datetime import datetime
+from app.core.database import dialect_insert
 from app.models.marketplace import Marketplace
+from app.services.offer_index import offer_index
+from app.services.lookup_cache import lookup_cache
+from app.services.cache_sync import cache_sync
 
 
 class MarketplaceService:
@@ -17,7 +21,7 @@ class MarketplaceService:
             name: Marketplace name
             slug: Marketplace slug
             region: Marketplace region (optional)
-            
+        
         Returns:
             Marketplace object
         """
@@ -52,6 +56,50 @@ class MarketplaceService:
         
         return marketplace
     
+    def get_or_create_marketplaces(self, names: Dict[str, str]) -> Dict[str, Marketplace]:
+        """
+        Get or create many marketplaces at once, e.g. the vendors of a
+        multi-marketplace upload.
+        
+        Existing marketplaces are matched by slug, then by name, and are not
+        renamed. Missing ones are created in one INSERT ... ON CONFLICT DO
+        NOTHING, so concurrent uploads creating the same marketplace don't fail.
+        
+        Args:
+            names: Marketplace name per slug
+        
+        Returns:
+            Marketplace per slug
+        """
+        if not names:
+            return {}
+        
+        marketplaces = self._find_marketplaces(names)
+        missing = {slug: name for slug, name in names.items() if slug not in marketplaces}
+        if missing:
+            now = datetime.utcnow()
+            stmt = dialect_insert(self.db, Marketplace.__table__).on_conflict_do_nothing()
+            self.db.execute(stmt, [{'name': name, 'slug': slug, 'created_at': now} for slug, name in missing.items()])
+            self.db.commit()
+            marketplaces = self._find_marketplaces(names)
+        
+        return marketplaces
+    
+    def _find_marketplaces(self, names: Dict[str, str]) -> Dict[str, Marketplace]:
+        """Existing marketplaces per slug, matched by slug or else by name, in one query."""
+        found = self.db.query(Marketplace).filter(
+            or_(Marketplace.slug.in_(list(names)), Marketplace.name.in_(list(names.values())))
+        ).all()
+        by_slug = {marketplace.slug: marketplace for marketplace in found}
+        by_name = {marketplace.name: marketplace for marketplace in found}
+        
+        marketplaces = {}
+        for slug, name in names.items():
+            marketplace = by_slug.get(slug) or by_name.get(name)
+            if marketplace:
+                marketplaces[slug] = marketplace
+        return marketplaces
+    
     def get_marketplace_by_id(self, marketplace_id: int) -> Optional[Marketplace]:
         """Get marketplace by ID."""
         return self.db.query(Marketplace).filter(Marketplace.id == marketplace_id).first()
@@ -75,7 +123,10 @@ class MarketplaceService:
             return False
         
         self.db.delete(marketplace)
+        cache_sync.record_marketplace(self.db, marketplace_id)
         self.db.commit()
+        offer_index.refresh_marketplace(self.db, marketplace_id)
+        lookup_cache.invalidate_marketplace(marketplace_id)
         return True
     
     def get_marketplace_stats(self, marketplace_id: int) -> dict:
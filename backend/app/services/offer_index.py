@@ -0,0 +1,170 @@
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from datetime import datetime
+import threading
+
+from app.models.domain import Domain
+from app.models.marketplace import Marketplace
+from app.models.offer import Offer
+
+
+class IndexedOffer(NamedTuple):
+    """The subset of an offer needed to build an OfferResult."""
+    domain_id: int
+    marketplace_id: int
+    marketplace: str
+    marketplace_slug: str
+    price_amount: float
+    price_currency: str
+    price_usd: Optional[float]
+    listing_url: Optional[str]
+    includes_content: bool
+    dofollow: bool
+    last_seen_at: datetime
+
+
+def offer_rows_query(db: Session):
+    """Column-only query joining listed (not delisted) offers to their domain and marketplace."""
+    return db.query(
+        Domain.root_domain,
+        Offer.domain_id,
+        Offer.marketplace_id,
+        Marketplace.name,
+        Marketplace.slug,
+        Offer.price_amount,
+        Offer.price_currency,
+        Offer.price_usd,
+        Offer.listing_url,
+        Offer.includes_content,
+        Offer.dofollow,
+        Offer.last_seen_at,
+    ).join(Domain, Offer.domain_id == Domain.id).join(
+        Marketplace, Offer.marketplace_id == Marketplace.id
+    ).filter(Offer.delisted_at.is_(None))
+
+
+def to_indexed_offer(row) -> IndexedOffer:
+    """Convert a row from offer_rows_query into an IndexedOffer."""
+    return IndexedOffer(
+        domain_id=row.domain_id,
+        marketplace_id=row.marketplace_id,
+        marketplace=row.name,
+        marketplace_slug=row.slug,
+        price_amount=float(row.price_amount) if row.price_amount else 0.0,
+        price_currency=row.price_currency,
+        price_usd=float(row.price_usd) if row.price_usd else None,
+        listing_url=row.listing_url,
+        includes_content=row.includes_content,
+        dofollow=row.dofollow,
+        last_seen_at=row.last_seen_at,
+    )
+
+
+class OfferIndex:
+    """
+    Process-local, read-optimized map of root_domain -> offers.
+
+    The index is built once at startup and refreshed per domain after
+    ingest or admin changes, so lookups never need to touch the ORM.
+    Readers see either the old or the new tuple for a domain; writers
+    replace whole entries under a lock.
+    """
+
+    def __init__(self):
+        self._offers: Dict[str, Tuple[IndexedOffer, ...]] = {}
+        self._domain_names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self.ready = False
+        self.built_at: Optional[datetime] = None
+
+    def build(self, db: Session, batch_size: int = 10000) -> int:
+        """
+        Build the index from scratch.
+
+        Args:
+            db: Database session
+            batch_size: Number of rows to fetch per round trip
+
+        Returns:
+            Number of offers indexed
+        """
+        offers: Dict[str, List[IndexedOffer]] = {}
+        domain_names: Dict[int, str] = {}
+        count = 0
+
+        for row in offer_rows_query(db).yield_per(batch_size):
+            offers.setdefault(row.root_domain, []).append(to_indexed_offer(row))
+            domain_names[row.domain_id] = row.root_domain
+            count += 1
+
+        with self._lock:
+            self._offers = {domain: tuple(items) for domain, items in offers.items()}
+            self._domain_names = domain_names
+            self.built_at = datetime.utcnow()
+            self.ready = True
+
+        return count
+
+    def refresh_domains(self, db: Session, domain_ids: Iterable[int]) -> None:
+        """Reload the offers of the given domains from the database."""
+        domain_ids = list(set(domain_ids))
+        if not domain_ids or not self.ready:
+            return
+
+        names = dict(
+            db.query(Domain.id, Domain.root_domain).filter(Domain.id.in_(domain_ids)).all()
+        )
+        offers: Dict[str, List[IndexedOffer]] = {}
+        for row in offer_rows_query(db).filter(Offer.domain_id.in_(domain_ids)):
+            offers.setdefault(row.root_domain, []).append(to_indexed_offer(row))
+
+        with self._lock:
+            for domain_id in domain_ids:
+                # Domain may have been renamed or deleted since it was indexed
+                old_name = self._domain_names.pop(domain_id, None)
+                if old_name is not None:
+                    self._offers.pop(old_name, None)
+
+                name = names.get(domain_id)
+                if name and name in offers:
+                    self._offers[name] = tuple(offers[name])
+                    self._domain_names[domain_id] = name
+
+    def refresh_marketplace(self, db: Session, marketplace_id: int, batch_size: int = 5000) -> None:
+        """
+        Reload every domain that currently lists an offer on a marketplace.
+
+        Args:
+            db: Database session
+            marketplace_id: Marketplace whose domains to reload
+            batch_size: Number of domains per refresh, keeping the IN lists
+                below the database's bound parameter limit
+        """
+        if not self.ready:
+            return
+
+        with self._lock:
+            domain_ids = sorted({
+                offer.domain_id
+                for items in self._offers.values()
+                for offer in items
+                if offer.marketplace_id == marketplace_id
+            })
+        for start_idx in range(0, len(domain_ids), batch_size):
+            self.refresh_domains(db, domain_ids[start_idx:start_idx + batch_size])
+
+    def get_offers(self, root_domain: str) -> Tuple[IndexedOffer, ...]:
+        """Get all indexed offers for a normalized domain."""
+        return self._offers.get(root_domain, ())
+
+    def stats(self) -> Dict:
+        """Get index size information."""
+        return {
+            "ready": self.ready,
+            "built_at": self.built_at,
+            "domains": len(self._offers),
+            "offers": sum(len(items) for items in self._offers.values()),
+        }
+
+
+offer_index = OfferIndex()
@@ -1,11 +1,14 @@
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, and_, or_
-from typing import List, Dict, Optional
+from sqlalchemy import func, and_, or_, case, true, insert, update, Select
+from typing import List, Dict, Optional, Tuple
 from decimal import Decimal
 from datetime import datetime
 
+from app.core.database import dialect_insert
 from app.models.offer import Offer
 from app.models.marketplace import Marketplace
+from app.models.price_history import PriceHistory
+from app.services.offer_index import offer_rows_query
 
 
 class OfferService:
@@ -23,14 +26,14 @@ class OfferService:
         Args:
             domain_ids: List of domain IDs to search
             filters: Optional filters (marketplace_slugs, min_price_usd, max_price_usd)
-            
+        
         Returns:
             List of Offer objects with marketplace relationship loaded
         """
         query = self.db.query(Offer).options(
             joinedload(Offer.marketplace),
             joinedload(Offer.domain)
-        ).filter(Offer.domain_id.in_(domain_ids))
+        ).filter(Offer.domain_id.in_(domain_ids), Offer.delisted_at.is_(None))
         
         # Apply filters
         if filters:
@@ -47,6 +50,97 @@ class OfferService:
         
         return query.all()
     
+    def _ranked_offer_rows(self, domain_ids: List[int], filters: Dict = None):
+        """
+        Build a subquery of offer rows with each domain's best USD price.
+        
+        The best price is computed with MIN(price_usd) OVER (PARTITION BY domain_id)
+        after filters are applied, ignoring zero prices.
+        """
+        best_price_usd = func.min(func.nullif(Offer.price_usd, 0)).over(
+            partition_by=Offer.domain_id
+        )
+        query = offer_rows_query(self.db).add_columns(
+            best_price_usd.label('best_price_usd')
+        ).filter(Offer.domain_id.in_(domain_ids))
+        
+        if filters:
+            if 'marketplace_slugs' in filters:
+                query = query.filter(Marketplace.slug.in_(filters['marketplace_slugs']))
+            
+            if 'min_price_usd' in filters:
+                query = query.filter(Offer.price_usd >= filters['min_price_usd'])
+            
+            if 'max_price_usd' in filters:
+                query = query.filter(Offer.price_usd <= filters['max_price_usd'])
+        
+        return query.subquery()
+    
+    def _offer_rows_query(
+        self,
+        domain_ids: List[int],
+        filters: Dict = None,
+        best_price_only: bool = False,
+        order_by_domain: bool = False
+    ):
+        """Select ranked offer rows, optionally keeping only each domain's winners."""
+        ranked = self._ranked_offer_rows(domain_ids, filters)
+        
+        if best_price_only:
+            query = self.db.query(ranked, true().label('is_best_price')).filter(
+                ranked.c.price_usd == ranked.c.best_price_usd
+            )
+        else:
+            is_best_price = case(
+                (ranked.c.price_usd == ranked.c.best_price_usd, True),
+                else_=False
+            )
+            query = self.db.query(ranked, is_best_price.label('is_best_price'))
+        
+        if order_by_domain:
+            query = query.order_by(ranked.c.domain_id)
+        return query
+    
+    def get_offer_rows_for_domains(
+        self,
+        domain_ids: List[int],
+        filters: Dict = None,
+        best_price_only: bool = False
+    ) -> List:
+        """
+        Get lightweight offer rows for specific domains with best-price flags.
+        
+        Unlike get_offers_for_domains this selects plain columns, so no ORM
+        objects or relationship joins are built.
+        
+        Args:
+            domain_ids: List of domain IDs to search
+            filters: Optional filters (marketplace_slugs, min_price_usd, max_price_usd)
+            best_price_only: Only return each domain's lowest-priced offers
+        
+        Returns:
+            List of rows with root_domain, marketplace name/slug, offer fields
+            and is_best_price
+        """
+        if best_price_only:
+            return self.get_best_offers_by_domain(domain_ids, filters)
+        
+        return self._offer_rows_query(domain_ids, filters).all()
+    
+    def offer_rows_statement(
+        self,
+        domain_ids: List[int],
+        filters: Dict = None,
+        best_price_only: bool = False
+    ) -> Select:
+        """
+        Core SELECT of the offer rows, ordered by domain, for callers that
+        stream it themselves (e.g. AsyncSession.stream).
+        """
+        return self._offer_rows_query(
+            domain_ids, filters, best_price_only, order_by_domain=True
+        ).statement
+    
     def get_offers_by_marketplace(self, marketplace_id: int) -> List[Offer]:
         """Get all offers for a specific marketplace."""
         return self.db.query(Offer).filter(
@@ -78,6 +172,8 @@ class OfferService:
         
         for key, value in update_data.items():
             setattr(offer, key, value)
+        # No longer matches the feed row it was hashed from
+        offer.content_hash = None
         
         # Update last_seen_at timestamp
         offer.last_seen_at = datetime.utcnow()
@@ -86,6 +182,169 @@ class OfferService:
         self.db.refresh(offer)
         return offer
     
+    def bulk_upsert_offers(
+        self,
+        marketplace_id: int,
+        offers: List[Dict],
+        seen_at: Optional[datetime] = None,
+        record_price_history: bool = False
+    ) -> Tuple[int, int, int]:
+        """
+        Insert or update many offers of one marketplace in a single statement.
+        
+        Uses INSERT ... ON CONFLICT (domain_id, marketplace_id) DO UPDATE;
+        first_seen_at is only set on insert and written offers are listed
+        again (delisted_at cleared). Each domain_id may appear only once in
+        offers. The caller commits.
+        
+        Args:
+            marketplace_id: Marketplace the offers belong to
+            offers: Offer values (domain_id, price_amount, price_currency,
+                price_usd, listing_url, includes_content, dofollow and
+                optionally content_hash)
+            seen_at: Timestamp for first/last_seen_at (defaults to now)
+            record_price_history: Append the price each existing offer had
+                (as of its last_seen_at) to price_history if the new price or
+                currency differs, in one multi-row insert
+        
+        Returns:
+            Tuple of (new offers, updated offers, price changes recorded)
+        """
+        if not offers:
+            return 0, 0, 0
+        
+        domain_ids = [offer['domain_id'] for offer in offers]
+        existing = self.db.query(
+            Offer.id, Offer.domain_id, Offer.price_amount, Offer.price_currency, Offer.price_usd, Offer.last_seen_at
+        ).filter(
+            Offer.marketplace_id == marketplace_id,
+            Offer.domain_id.in_(domain_ids)
+        ).all()
+        
+        price_history = []
+        if record_price_history and existing:
+            incoming = {offer['domain_id']: offer for offer in offers}
+            price_history = [
+                {
+                    'offer_id': row.id, 'price_amount': row.price_amount, 'price_currency': row.price_currency,
+                    'price_usd': row.price_usd, 'seen_at': row.last_seen_at
+                }
+                for row in existing
+                if self._price_changed(row, incoming[row.domain_id])
+            ]
+            if price_history:
+                self.db.execute(insert(PriceHistory.__table__), price_history)
+        
+        now = seen_at or datetime.utcnow()
+        rows = [
+            {
+                'content_hash': None, **offer, 'marketplace_id': marketplace_id,
+                'first_seen_at': now, 'last_seen_at': now, 'delisted_at': None
+            }
+            for offer in offers
+        ]
+        
+        stmt = dialect_insert(self.db, Offer.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['domain_id', 'marketplace_id'],
+            set_={
+                column: getattr(stmt.excluded, column)
+                for column in (
+                    'price_amount', 'price_currency', 'price_usd', 'listing_url',
+                    'includes_content', 'dofollow', 'last_seen_at', 'content_hash', 'delisted_at'
+                )
+            }
+        )
+        self.db.execute(stmt, rows)
+        
+        return len(rows) - len(existing), len(existing), len(price_history)
+    
+    @staticmethod
+    def _price_changed(stored, offer: Dict) -> bool:
+        """Whether an incoming offer's price differs from the stored one (at the column's 2 decimals)."""
+        return (
+            stored.price_currency != offer['price_currency']
+            or round(float(stored.price_amount), 2) != round(float(offer['price_amount']), 2)
+        )
+    
+    def touch_unchanged_offers(self, marketplace_id: int, content_hashes: Dict[int, int], seen_at: datetime) -> List[int]:
+        """
+        Mark listed offers whose content hash hasn't changed as seen.
+        
+        Unchanged offers only get their last_seen_at bumped, in one UPDATE;
+        everything else is left for bulk_upsert_offers. The caller commits.
+        
+        Args:
+            marketplace_id: Marketplace the offers belong to
+            content_hashes: Content hash of the uploaded row per domain ID
+            seen_at: New last_seen_at
+        
+        Returns:
+            IDs of the domains whose offers were unchanged
+        """
+        if not content_hashes:
+            return []
+        
+        stored = self.db.query(Offer.domain_id, Offer.content_hash).filter(
+            Offer.marketplace_id == marketplace_id,
+            Offer.domain_id.in_(list(content_hashes)),
+            Offer.delisted_at.is_(None)
+        ).all()
+        unchanged = [
+            domain_id for domain_id, content_hash in stored
+            if content_hash is not None and content_hash == content_hashes[domain_id]
+        ]
+        
+        if unchanged:
+            self.db.execute(
+                update(Offer).where(
+                    Offer.marketplace_id == marketplace_id,
+                    Offer.domain_id.in_(unchanged)
+                ).values(last_seen_at=seen_at).execution_options(synchronize_session=False)
+            )
+        
+        return unchanged
+    
+    def delist_missing_offers(self, marketplace_id: int, seen_at: datetime) -> List[int]:
+        """
+        Flag the marketplace's offers not seen since seen_at as delisted.
+        
+        One UPDATE over the marketplace; meant to run after a full upload
+        that marked every offer it contains with seen_at. The caller commits.
+        
+        Args:
+            marketplace_id: Marketplace the upload was for
+            seen_at: Start of the upload (its last_seen_at)
+        
+        Returns:
+            IDs of the domains whose offers were delisted
+        """
+        return self.db.execute(
+            update(Offer).where(
+                Offer.marketplace_id == marketplace_id,
+                Offer.delisted_at.is_(None),
+                or_(Offer.last_seen_at < seen_at, Offer.last_seen_at.is_(None))
+            ).values(delisted_at=datetime.utcnow()).returning(Offer.domain_id).execution_options(
+                synchronize_session=False
+            )
+        ).scalars().all()
+    
+    def count_seen_offers(self, seen_at: datetime, marketplace_id: Optional[int] = None) -> int:
+        """
+        Count the offers an upload wrote or touched.
+        
+        Args:
+            seen_at: Start of the upload (its last_seen_at)
+            marketplace_id: Only count this marketplace's offers
+        
+        Returns:
+            Number of distinct offers with that last_seen_at
+        """
+        query = self.db.query(func.count(Offer.id)).filter(Offer.last_seen_at == seen_at)
+        if marketplace_id is not None:
+            query = query.filter(Offer.marketplace_id == marketplace_id)
+        return query.scalar()
+    
     def get_total_offers(self) -> int:
         """Get total number of offers in database."""
         return self.db.query(func.count(Offer.id)).scalar()
@@ -147,34 +406,19 @@ class OfferService:
         ).filter(
             and_(
                 Offer.price_usd >= min_price,
-                Offer.price_usd <= max_price
+                Offer.price_usd <= max_price,
+                Offer.delisted_at.is_(None)
             )
         ).all()
     
-    def get_best_offers_by_domain(self, domain_ids: List[int]) -> List[Offer]:
-        """Get the best (lowest USD price) offer for each domain."""
-        # This is a complex query that finds the minimum price per domain
-        # and then gets the corresponding offers
-        subquery = self.db.query(
-            Offer.domain_id,
-            func.min(Offer.price_usd).label('min_price')
-        ).filter(
-            and_(
-                Offer.domain_id.in_(domain_ids),
-                Offer.price_usd.isnot(None)
-            )
-        ).group_by(Offer.domain_id).subquery()
+    def get_best_offers_by_domain(self, domain_ids: List[int], filters: Dict = None) -> List:
+        """
+        Get the best (lowest USD price) offer rows for each domain.
         
-        return self.db.query(Offer).options(
-            joinedload(Offer.marketplace),
-            joinedload(Offer.domain)
-        ).join(
-            subquery,
-            and_(
-                Offer.domain_id == subquery.c.domain_id,
-                Offer.price_usd == subquery.c.min_price
-            )
-        ).all()
+        Non-best rows are discarded inside the database, so only the winners
+        are transferred. Ties all count as best.
+        """
+        return self._offer_rows_query(domain_ids, filters, best_price_only=True).all()
     
     def get_offer_by_domain_and_marketplace(self, domain_id: int, marketplace_id: int) -> Optional[Offer]:
         """Get offer by domain and marketplace combination."""
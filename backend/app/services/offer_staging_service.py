@@ -0,0 +1,179 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+from datetime import datetime
+import io
+
+import pandas as pd
+
+from app.core.config import settings
+from app.services.domain_bloom_filter import known_domain_filter
+from app.services.ingest_metrics import StageTimer
+
+# Columns of the staging table, in COPY order
+STAGING_COLUMNS = [
+    'file_row', 'domain', 'price_amount', 'price_currency', 'price_usd', 'listing_url', 'includes_content', 'dofollow',
+    'content_hash'
+]
+
+# Temporary tables are never WAL-logged (like UNLOGGED tables) and are
+# private to the connection, so concurrent ingests can't see each other's rows
+CREATE_STAGING_TABLE = """
+    CREATE TEMPORARY TABLE offer_staging (
+        file_row BIGINT NOT NULL,
+        domain VARCHAR(255) NOT NULL,
+        price_amount NUMERIC(10, 2) NOT NULL,
+        price_currency VARCHAR(3) NOT NULL,
+        price_usd NUMERIC(10, 2),
+        listing_url TEXT,
+        includes_content BOOLEAN NOT NULL,
+        dofollow BOOLEAN NOT NULL,
+        content_hash BIGINT NOT NULL
+    ) ON COMMIT DROP
+"""
+
+# Rows are inserted in key order so index pages are filled one after another
+INSERT_DOMAINS = """
+    INSERT INTO domains (root_domain, etld1, created_at)
+    SELECT DISTINCT domain, domain, :now FROM offer_staging
+    ORDER BY domain
+    ON CONFLICT (root_domain) DO NOTHING
+    RETURNING root_domain
+"""
+
+# The last row of the file wins when a domain repeats
+LATEST_STAGED = "SELECT DISTINCT ON (domain) * FROM offer_staging ORDER BY domain, file_row DESC"
+
+# Listed offers whose content hash matches are only marked as seen
+TOUCH_UNCHANGED_OFFERS = f"""
+    UPDATE offers o SET last_seen_at = :seen_at
+    FROM ({LATEST_STAGED}) s
+    JOIN domains d ON d.root_domain = s.domain
+    WHERE o.domain_id = d.id AND o.marketplace_id = :marketplace_id
+      AND o.content_hash = s.content_hash AND o.delisted_at IS NULL
+    RETURNING o.domain_id
+"""
+
+# The price each existing offer had as of its last_seen_at, for offers whose
+# price or currency is about to change; runs before the upsert overwrites them
+RECORD_PRICE_CHANGES = f"""
+    INSERT INTO price_history (offer_id, price_amount, price_currency, price_usd, seen_at)
+    SELECT o.id, o.price_amount, o.price_currency, o.price_usd, o.last_seen_at
+    FROM ({LATEST_STAGED}) s
+    JOIN domains d ON d.root_domain = s.domain
+    JOIN offers o ON o.domain_id = d.id AND o.marketplace_id = :marketplace_id
+    WHERE o.price_amount <> s.price_amount OR o.price_currency <> s.price_currency
+"""
+
+# The WHERE on DO UPDATE skips the offers touched above; RETURNING only
+# reports rows that were inserted or actually rewritten
+UPSERT_OFFERS = f"""
+    INSERT INTO offers (
+        domain_id, marketplace_id, listing_url, price_amount, price_currency, price_usd,
+        includes_content, dofollow, content_hash, first_seen_at, last_seen_at
+    )
+    SELECT d.id, :marketplace_id, s.listing_url, s.price_amount, s.price_currency, s.price_usd,
+           s.includes_content, s.dofollow, s.content_hash, :seen_at, :seen_at
+    FROM ({LATEST_STAGED}) s
+    JOIN domains d ON d.root_domain = s.domain
+    ORDER BY d.id
+    ON CONFLICT (domain_id, marketplace_id) DO UPDATE SET
+        price_amount = EXCLUDED.price_amount,
+        price_currency = EXCLUDED.price_currency,
+        price_usd = EXCLUDED.price_usd,
+        listing_url = EXCLUDED.listing_url,
+        includes_content = EXCLUDED.includes_content,
+        dofollow = EXCLUDED.dofollow,
+        content_hash = EXCLUDED.content_hash,
+        last_seen_at = EXCLUDED.last_seen_at,
+        delisted_at = NULL
+    WHERE offers.content_hash IS DISTINCT FROM EXCLUDED.content_hash OR offers.delisted_at IS NOT NULL
+    RETURNING domain_id, (xmax = 0) AS inserted
+"""
+
+
+class OfferStagingService:
+    """
+    PostgreSQL fast path for large ingests.
+
+    Rows are COPYed into a temporary staging table and merged into domains
+    and offers with two set-based statements, instead of going through
+    multi-row INSERTs from Python.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def is_supported(db: Session) -> bool:
+        """Whether the session's database can use the COPY path (PostgreSQL via psycopg2)."""
+        dialect = db.get_bind().dialect
+        return settings.ingest_copy_enabled and dialect.name == "postgresql" and dialect.driver == "psycopg2"
+
+    def merge_offers(
+        self,
+        marketplace_id: int,
+        clean: pd.DataFrame,
+        seen_at: Optional[datetime] = None,
+        timer: Optional[StageTimer] = None,
+        record_price_history: bool = False
+    ) -> Tuple[List[int], int, int, int, int, int]:
+        """
+        Stage prepared rows with COPY and merge them into domains and offers.
+        
+        Offers whose content hash is unchanged only get last_seen_at bumped;
+        the others are inserted or rewritten (and listed again). Runs in the
+        session's current transaction; the caller commits, which also drops
+        the staging table.
+        
+        Args:
+            marketplace_id: Marketplace the offers belong to
+            clean: Prepared rows (prepare_frame output with price_usd and
+                content_hash)
+            seen_at: Timestamp for first/last_seen_at (defaults to now)
+            timer: Stage timer to add the copy, domain_resolve and
+                offer_upsert times to
+            record_price_history: Append the old price of offers whose price
+                or currency changes to price_history, in one INSERT ... SELECT
+        
+        Returns:
+            Tuple of (IDs of the domains written or touched, new domains,
+            new offers, updated offers, unchanged offers, price changes
+            recorded)
+        """
+        now = datetime.utcnow()
+        seen_at = seen_at or now
+        timer = timer or StageTimer()
+        
+        with timer.stage('copy', len(clean)):
+            self.db.execute(text(CREATE_STAGING_TABLE))
+            
+            buffer = io.StringIO()
+            clean.rename(columns={'row': 'file_row'})[STAGING_COLUMNS].to_csv(
+                buffer, index=False, header=False
+            )
+            buffer.seek(0)
+            cursor = self.db.connection().connection.cursor()
+            try:
+                cursor.copy_expert(f"COPY offer_staging ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+            finally:
+                cursor.close()
+            self.db.execute(text("ANALYZE offer_staging"))
+        
+        with timer.stage('domain_resolve', len(clean)):
+            new_domains = self.db.execute(text(INSERT_DOMAINS), {'now': now}).scalars().all()
+            known_domain_filter.add(new_domains)
+        
+        with timer.stage('offer_upsert', len(clean)):
+            params = {'marketplace_id': marketplace_id, 'seen_at': seen_at}
+            touched = self.db.execute(text(TOUCH_UNCHANGED_OFFERS), params).scalars().all()
+            price_changes = (
+                self.db.execute(text(RECORD_PRICE_CHANGES), params).rowcount if record_price_history else 0
+            )
+            written = self.db.execute(text(UPSERT_OFFERS), params).all()
+        new_offers = sum(1 for _, inserted in written if inserted)
+        
+        return (
+            touched + [domain_id for domain_id, _ in written], len(new_domains), new_offers,
+            len(written) - new_offers, len(touched), price_changes
+        )
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Batch ingest benchmark
+
+Writes a set of synthetic marketplace exports and loads them into an empty
+database two ways:
+
+- sequential: one CSVProcessingService per file, one file after the other
+  (what uploading them one by one does)
+- batch: BatchIngestService with each of the given worker counts
+
+The database is a scratch database: all tables are dropped and recreated
+before every run. Use PostgreSQL; on SQLite the batch has a single writer.
+
+Usage (from backend/):
+    DEBUG=true python benchmarks/ingest_batch.py \
+        --database-url postgresql://postgres@localhost/ingest_bench \
+        --files 24 --marketplaces 8 --rows 200000 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+MAPPING = {"domain_column": "Domain", "price_column": "Price", "currency_column": "Currency", "url_column": "URL"}
+SUFFIXES = np.array(["com", "net", "org", "co.uk", "de", "io"])
+
+
+def write_csv(path: str, rows: int, seed: int) -> None:
+    """Raw URLs with www. and mixed suffixes, so normalization has real work to do."""
+    rng = np.random.default_rng(seed)
+    hosts = "site" + pd.Series(rng.integers(0, rows * 4, rows)).astype(str) + "." + SUFFIXES[rng.integers(0, len(SUFFIXES), rows)]
+    pd.DataFrame({
+        "Domain": "https://www." + hosts + "/",
+        "Price": rng.integers(10, 900, rows),
+        "Currency": "USD",
+        "URL": "https://" + hosts + "/buy",
+    }).to_csv(path, index=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--database-url", required=True, help="Scratch database (tables are dropped)")
+    parser.add_argument("--files", type=int, default=24, help="Number of files")
+    parser.add_argument("--marketplaces", type=int, default=8, help="Marketplaces the files are spread over")
+    parser.add_argument("--rows", type=int, default=200000, help="Rows per file")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="Worker counts of the batch runs")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["OFFER_INDEX_ENABLED"] = "false"
+
+    from app.core.database import Base, SessionLocal, engine
+    from app.models import Domain, Marketplace, Offer  # noqa: F401 (registers the tables)
+    from app.schemas.csv_upload import CSVUploadRequest
+    from app.services.batch_ingest_service import BatchIngestService
+    from app.services.csv_processing_service import CSVProcessingService, read_upload
+
+    print(f"{os.cpu_count()} CPUs, {args.files} files x {args.rows} rows over {args.marketplaces} marketplaces")
+    print(f"{'run':<14} {'time':>8} {'rows/s':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        files = []
+        for index in range(args.files):
+            path = os.path.join(tmp, f"export-{index}.csv")
+            write_csv(path, args.rows, seed=index)
+            slug = f"marketplace-{index % args.marketplaces}"
+            files.append((path, CSVUploadRequest(marketplace_name=slug, marketplace_slug=slug, column_mapping=MAPPING)))
+        total_rows = args.files * args.rows
+
+        runs = [("sequential", None)] + [(f"batch x{workers}", workers) for workers in args.workers]
+        for name, workers in runs:
+            Base.metadata.drop_all(engine)
+            Base.metadata.create_all(engine)
+
+            started = time.perf_counter()
+            if workers is None:
+                for path, upload_request in files:
+                    db = SessionLocal()
+                    CSVProcessingService(db, upload_request, read_upload(path, upload_request.column_mapping)).process()
+                    db.close()
+            else:
+                BatchIngestService(files, workers=workers, writers=args.marketplaces).process()
+            elapsed = time.perf_counter() - started
+            print(f"{name:<14} {elapsed:>7.1f}s {total_rows / elapsed:>10,.0f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
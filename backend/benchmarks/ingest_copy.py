@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+PostgreSQL COPY ingest benchmark
+
+Writes synthetic CSV feeds and ingests each one twice (first load, then
+the same file again, whose offers are all unchanged) through CSVProcessingService, with the
+COPY + staging-table path and with batched upserts.
+
+The database is a scratch PostgreSQL database: all tables are dropped and
+recreated before every run.
+
+Usage (from backend/):
+    DEBUG=true python benchmarks/ingest_copy.py \
+        --database-url postgresql://postgres@localhost/ingest_bench \
+        --rows 1000000 5000000 10000000 --batched-max 1000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+MAPPING = {"domain_column": "Domain", "price_column": "Price", "currency_column": "Currency", "url_column": "URL"}
+WRITE_CHUNK = 1_000_000
+
+
+def write_csv(path: str, rows: int, rows_per_domain: int = 2, seed: int = 42) -> None:
+    """
+    rows_per_domain rows per distinct domain on average; 2 is a feed that
+    lists several packages per site, 1 a feed with one offer per site.
+    """
+    rng = np.random.default_rng(seed)
+    for start in range(0, rows, WRITE_CHUNK):
+        count = min(WRITE_CHUNK, rows - start)
+        if rows_per_domain == 1:
+            hosts = pd.Series(np.arange(start, start + count)).astype(str)
+        else:
+            hosts = pd.Series(rng.integers(0, rows // rows_per_domain + 1, count)).astype(str)
+        pd.DataFrame({
+            "Domain": "https://www.site" + hosts + ".com/",
+            "Price": rng.integers(10, 900, count),
+            "Currency": "USD",
+            "URL": "https://site" + hosts + ".com/buy",
+        }).to_csv(path, mode="a", header=start == 0, index=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--database-url", required=True, help="Scratch PostgreSQL database (tables are dropped)")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000000, 5000000, 10000000], help="Feed sizes in rows")
+    parser.add_argument("--batched-max", type=int, default=1000000, help="Largest feed also run through batched upserts")
+    parser.add_argument("--rows-per-domain", type=int, default=2, help="Average rows per distinct domain in the feed")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["OFFER_INDEX_ENABLED"] = "false"
+
+    from app.core.config import settings
+    from app.core.database import Base, SessionLocal, engine
+    from app.models import Domain, Marketplace, Offer  # noqa: F401 (registers the tables)
+    from app.schemas.csv_upload import CSVUploadRequest
+    from app.services.csv_processing_service import CSVProcessingService, read_csv_chunks
+
+    request = CSVUploadRequest(marketplace_name="Benchmark", marketplace_slug="benchmark", column_mapping=MAPPING)
+
+    print(f"{'rows':>10} {'path':<8} {'run':<7} {'time':>8} {'rows/s':>10}  new/updated/unchanged offers")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f"feed-{rows}.csv")
+            write_csv(path, rows, args.rows_per_domain)
+
+            for copy_enabled in (True, False):
+                if not copy_enabled and rows > args.batched_max:
+                    continue
+                settings.ingest_copy_enabled = copy_enabled
+                Base.metadata.drop_all(engine)
+                Base.metadata.create_all(engine)
+
+                for run in ("load", "update"):
+                    db = SessionLocal()
+                    started = time.perf_counter()
+                    results = CSVProcessingService(db, request, read_csv_chunks(path, request.column_mapping)).process()
+                    elapsed = time.perf_counter() - started
+                    db.close()
+                    print(
+                        f"{rows:>10} {'copy' if copy_enabled else 'batched':<8} {run:<7} {elapsed:>7.1f}s "
+                        f"{rows / elapsed:>10,.0f}  {results['new_offers']}/{results['updated_offers']}/{results['unchanged_offers']}",
+                        flush=True
+                    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Duplicate row ingest benchmark
+
+Loads a synthetic feed in which a share of the rows repeat a domain of the
+file (spelled differently, at another price) once with each dedup policy,
+and reports the time of the dedup stage next to the whole ingest. Every run
+starts from an empty database; all tables are dropped and recreated.
+
+Usage (from backend/):
+    DEBUG=true python benchmarks/ingest_dedup.py \
+        --database-url postgresql://postgres@localhost/ingest_bench \
+        --rows 200000 --duplicates 0.1 0.5
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+MAPPING = {"domain_column": "Domain", "price_column": "Price", "currency_column": "Currency", "url_column": "URL"}
+POLICIES = ["last_wins", "first_wins", "lowest_price"]
+
+
+def write_csv(path: str, rows: int, duplicates: float, seed: int = 42) -> None:
+    """duplicates * rows of the rows repeat an earlier or later domain, as www. URLs."""
+    rng = np.random.default_rng(seed)
+    unique = rows - int(rows * duplicates)
+    hosts = pd.Series(np.concatenate([np.arange(unique), rng.integers(0, unique, rows - unique)])).astype(str)
+    prefixes = pd.Series(np.where(np.arange(rows) < unique, "", "https://www."))
+    pd.DataFrame({
+        "Domain": prefixes + "site" + hosts + ".com",
+        "Price": rng.integers(10, 900, rows),
+        "Currency": "USD",
+        "URL": "https://site" + hosts + ".com/buy",
+    }).sample(frac=1, random_state=seed).to_csv(path, index=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--database-url", required=True, help="Scratch database (tables are dropped)")
+    parser.add_argument("--rows", type=int, default=200000, help="Feed size in rows")
+    parser.add_argument("--duplicates", type=float, nargs="+", default=[0.1, 0.5], help="Shares of repeated rows")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["OFFER_INDEX_ENABLED"] = "false"
+
+    from app.core.database import Base, SessionLocal, engine
+    from app.models import Domain, Marketplace, Offer  # noqa: F401 (registers the tables)
+    from app.schemas.csv_upload import CSVUploadRequest
+    from app.services.csv_processing_service import CSVProcessingService, read_csv_chunks
+
+    print(f"{args.rows} rows")
+    print(f"{'policy':<13} {'duplicates':>10} {'collapsed':>10} {'dedup':>8} {'dedup rows/s':>13} {'ingest':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for duplicates in args.duplicates:
+            path = os.path.join(tmp, f"feed-{duplicates}.csv")
+            write_csv(path, args.rows, duplicates)
+
+            for policy in POLICIES:
+                Base.metadata.drop_all(engine)
+                Base.metadata.create_all(engine)
+                request = CSVUploadRequest(
+                    marketplace_name="Benchmark", marketplace_slug="benchmark", column_mapping=MAPPING,
+                    dedup_policy=policy
+                )
+
+                db = SessionLocal()
+                started = time.perf_counter()
+                results = CSVProcessingService(db, request, read_csv_chunks(path, request.column_mapping)).process()
+                elapsed = time.perf_counter() - started
+                db.close()
+
+                dedup = results['stages']['dedup']
+                print(
+                    f"{policy:<13} {duplicates:>10.0%} {results['duplicate_rows']:>10} "
+                    f"{dedup['time_ms'] / 1000:>7.2f}s {dedup['rows_per_second']:>13,.0f} {elapsed:>7.2f}s",
+                    flush=True
+                )
+
+
+if __name__ == "__main__":
+    main()
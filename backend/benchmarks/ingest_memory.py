@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+CSV ingest memory benchmark
+
+Writes synthetic CSV uploads of increasing size and reads and validates
+each one two ways, in a fresh process per run so peak RSS is not shared:
+
+- whole: pd.read_csv of the full file, then prepare_frame
+- chunked: read_csv_chunks (mapped columns, string dtypes), prepare_frame
+  per chunk
+
+Database writes are not part of the runs; they happen one batch at a time
+in both cases.
+
+Usage (from backend/):
+    DEBUG=true python benchmarks/ingest_memory.py --rows 250000 1000000 2000000
+"""
+
+import argparse
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+SUFFIXES = ["com", "net", "org", "co.uk", "de", "io"]
+MAPPING = {
+    "domain_column": "Domain", "price_column": "Price", "currency_column": "Currency",
+    "url_column": "URL", "dofollow_column": "Dofollow",
+}
+
+
+def write_csv(path: str, rows: int, seed: int = 42) -> None:
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        # Unmapped columns are part of real feeds too; the chunked reader skips them
+        f.write("Domain,Price,Currency,URL,Dofollow,Category,Notes\n")
+        for i in range(rows):
+            host = f"site{rng.randint(0, rows)}.{rng.choice(SUFFIXES)}"
+            f.write(
+                f"https://www.{host}/,{rng.randint(10, 900)},{rng.choice(['USD', 'EUR'])},"
+                f"https://{host}/buy,{rng.choice(['True', 'False'])},News,row {i} notes\n"
+            )
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(mode: str, path: str) -> None:
+    """Read and validate one file, then print rows, peak RSS and time."""
+    import pandas as pd
+    from app.schemas.csv_upload import CSVUploadRequest
+    from app.services.csv_processing_service import prepare_frame, read_csv_chunks
+    from app.services.domain_service import DomainService
+
+    request = CSVUploadRequest(marketplace_name="Benchmark", marketplace_slug="benchmark", column_mapping=MAPPING)
+    DomainService.warm_up()
+    baseline = peak_rss_mb()
+
+    started = time.perf_counter()
+    frames = [pd.read_csv(path)] if mode == "whole" else read_csv_chunks(path, request.column_mapping)
+    clean_rows = 0
+    for df in frames:
+        clean, _ = prepare_frame(df, request)
+        clean_rows += len(clean)
+    elapsed = time.perf_counter() - started
+    print(f"{clean_rows} {baseline:.1f} {peak_rss_mb():.1f} {elapsed:.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[250000, 1000000, 2000000], help="File sizes in rows")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    print(f"{'rows':>10} {'file MB':>8} {'mode':<8} {'base MB':>8} {'peak MB':>8} {'time':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f"upload-{rows}.csv")
+            write_csv(path, rows)
+            file_mb = os.path.getsize(path) / 1024 / 1024
+            for mode in ("whole", "chunked"):
+                output = subprocess.run(
+                    [sys.executable, __file__, "--child", mode, path],
+                    check=True, capture_output=True, text=True
+                ).stdout.split()
+                clean_rows, baseline, peak, elapsed = output[-4:]
+                print(f"{rows:>10} {file_mb:>8.1f} {mode:<8} {baseline:>8} {peak:>8} {elapsed:>6}s")
+
+
+if __name__ == "__main__":
+    main()
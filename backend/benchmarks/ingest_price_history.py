@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Price history ingest benchmark
+
+Loads a synthetic feed, then re-ingests it with a share of the prices
+changed, once with price history recording on and once with it off, and
+reports the overhead of recording. Every run starts from a freshly loaded
+database; only the re-ingest is timed.
+
+On PostgreSQL both the COPY path and batched upserts are measured, on
+SQLite only batched upserts. All tables are dropped and recreated.
+
+Usage (from backend/):
+    DEBUG=true python benchmarks/ingest_price_history.py \
+        --database-url postgresql://postgres@localhost/ingest_bench \
+        --rows 100000 --changed 0.1 1.0
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+MAPPING = {"domain_column": "Domain", "price_column": "Price", "currency_column": "Currency", "url_column": "URL"}
+
+
+def write_csv(path: str, rows: int, changed: float = 0.0, seed: int = 42) -> None:
+    """One row per domain; the first changed * rows rows get a different price."""
+    rng = np.random.default_rng(seed)
+    hosts = pd.Series(np.arange(rows)).astype(str)
+    prices = rng.integers(10, 900, rows)
+    prices[:int(rows * changed)] += 5
+    pd.DataFrame({
+        "Domain": "https://www.site" + hosts + ".com/",
+        "Price": prices,
+        "Currency": "USD",
+        "URL": "https://site" + hosts + ".com/buy",
+    }).to_csv(path, index=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--database-url", required=True, help="Scratch database (tables are dropped)")
+    parser.add_argument("--rows", type=int, default=100000, help="Feed size in rows")
+    parser.add_argument("--changed", type=float, nargs="+", default=[0.1, 1.0], help="Shares of prices changed")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per configuration; the median is reported")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["OFFER_INDEX_ENABLED"] = "false"
+
+    from app.core.config import settings
+    from app.core.database import Base, SessionLocal, engine
+    from app.models import Domain, Marketplace, Offer, PriceHistory  # noqa: F401 (registers the tables)
+    from app.schemas.csv_upload import CSVUploadRequest
+    from app.services.csv_processing_service import CSVProcessingService, read_csv_chunks
+
+    request = CSVUploadRequest(marketplace_name="Benchmark", marketplace_slug="benchmark", column_mapping=MAPPING)
+
+    def ingest(path: str):
+        db = SessionLocal()
+        started = time.perf_counter()
+        results = CSVProcessingService(db, request, read_csv_chunks(path, request.column_mapping)).process()
+        elapsed = time.perf_counter() - started
+        db.close()
+        return elapsed, results
+
+    paths = [True, False] if engine.dialect.name == "postgresql" else [False]
+    print(f"{args.rows} rows, median of {args.repeat} re-ingests")
+    print(f"{'path':<8} {'changed':>8} {'history off':>12} {'history on':>11} {'overhead':>9} {'recorded':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        base_path = os.path.join(tmp, "feed.csv")
+        write_csv(base_path, args.rows)
+
+        for copy_enabled in paths:
+            settings.ingest_copy_enabled = copy_enabled
+            for changed in args.changed:
+                changed_path = os.path.join(tmp, f"feed-{changed}.csv")
+                write_csv(changed_path, args.rows, changed)
+
+                times = {}
+                recorded = 0
+                for history in (False, True):
+                    runs = []
+                    for _ in range(args.repeat):
+                        Base.metadata.drop_all(engine)
+                        Base.metadata.create_all(engine)
+                        settings.ingest_price_history = history
+                        ingest(base_path)
+                        elapsed, results = ingest(changed_path)
+                        runs.append(elapsed)
+                        recorded = results['price_changes']
+                    times[history] = statistics.median(runs)
+
+                overhead = times[True] / times[False] - 1
+                print(
+                    f"{'copy' if copy_enabled else 'batched':<8} {changed:>8.0%} {times[False]:>11.2f}s "
+                    f"{times[True]:>10.2f}s {overhead:>9.1%} {recorded:>9}",
+                    flush=True
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+XLSX ingest benchmark
+
+Writes a synthetic XLSX upload (and the same rows as CSV) and reads and
+validates it three ways, in a fresh process per run so peak RSS is not
+shared:
+
+- read_excel: pd.read_excel of the whole sheet, then prepare_frame
+- streaming: read_xlsx_chunks (openpyxl read-only, mapped columns only),
+  prepare_frame per chunk
+- csv: read_csv_chunks on the CSV copy, for reference
+
+Database writes are not part of the runs.
+
+Usage (from backend/):
+    DEBUG=true python benchmarks/ingest_xlsx.py --rows 200000
+"""
+
+import argparse
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+SUFFIXES = ["com", "net", "org", "co.uk", "de", "io"]
+HEADER = ["Domain", "Price", "Currency", "URL", "Dofollow", "Category", "Notes"]
+MAPPING = {
+    "domain_column": "Domain", "price_column": "Price", "currency_column": "Currency",
+    "url_column": "URL", "dofollow_column": "Dofollow",
+}
+
+
+def write_files(xlsx_path: str, csv_path: str, rows: int, seed: int = 42) -> None:
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(HEADER)
+    with open(csv_path, "w") as f:
+        f.write(",".join(HEADER) + "\n")
+        for i in range(rows):
+            host = f"site{rng.randint(0, rows)}.{rng.choice(SUFFIXES)}"
+            # Unmapped columns are part of real exports too; the streaming reader skips them
+            row = [
+                f"https://www.{host}/", rng.randint(10, 900), rng.choice(["USD", "EUR"]),
+                f"https://{host}/buy", rng.choice([True, False]), "News", f"row {i} notes"
+            ]
+            sheet.append(row)
+            f.write(",".join(str(value) for value in row) + "\n")
+    workbook.save(xlsx_path)
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(mode: str, path: str) -> None:
+    """Read and validate one file, then print rows, peak RSS and time."""
+    import pandas as pd
+    from app.schemas.csv_upload import CSVUploadRequest
+    from app.services.csv_processing_service import prepare_frame, read_csv_chunks, read_xlsx_chunks
+    from app.services.domain_service import DomainService
+
+    request = CSVUploadRequest(marketplace_name="Benchmark", marketplace_slug="benchmark", column_mapping=MAPPING)
+    DomainService.warm_up()
+    baseline = peak_rss_mb()
+
+    started = time.perf_counter()
+    if mode == "read_excel":
+        frames = [pd.read_excel(path)]
+    elif mode == "streaming":
+        frames = read_xlsx_chunks(path, request.column_mapping)
+    else:
+        frames = read_csv_chunks(path, request.column_mapping)
+    clean_rows = 0
+    for df in frames:
+        clean, _ = prepare_frame(df, request)
+        clean_rows += len(clean)
+    elapsed = time.perf_counter() - started
+    print(f"{clean_rows} {baseline:.1f} {peak_rss_mb():.1f} {elapsed:.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[200000], help="Sheet sizes in rows")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    print(f"{'rows':>10} {'file MB':>8} {'mode':<11} {'clean':>8} {'base MB':>8} {'peak MB':>8} {'time':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            xlsx_path = os.path.join(tmp, f"upload-{rows}.xlsx")
+            csv_path = os.path.join(tmp, f"upload-{rows}.csv")
+            write_files(xlsx_path, csv_path, rows)
+            for mode, path in (("read_excel", xlsx_path), ("streaming", xlsx_path), ("csv", csv_path)):
+                output = subprocess.run(
+                    [sys.executable, __file__, "--child", mode, path],
+                    check=True, capture_output=True, text=True
+                ).stdout.split()
+                clean_rows, baseline, peak, elapsed = output[-4:]
+                file_mb = os.path.getsize(path) / 1024 / 1024
+                print(f"{rows:>10} {file_mb:>8.1f} {mode:<11} {clean_rows:>8} {baseline:>8} {peak:>8} {elapsed:>6}s")
+
+
+if __name__ == "__main__":
+    main()
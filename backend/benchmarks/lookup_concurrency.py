@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Concurrent lookup throughput benchmark
+
+Fires POST /lookup/ requests at a running API with a fixed number of
+requests in flight and reports throughput and latency percentiles. Run it
+against two builds (e.g. before/after a change) with the same database to
+compare them.
+
+Usage:
+    python benchmarks/lookup_concurrency.py --token <JWT> \
+        --url http://localhost:8000/api/v1 --concurrency 50 --requests 500
+
+The JWT must belong to a user on the unlimited plan, otherwise the free
+search limit kicks in after three requests.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import httpx
+
+
+async def run(args) -> None:
+    headers = {"Authorization": f"Bearer {args.token}"}
+    if args.domains_file:
+        with open(args.domains_file) as f:
+            pool = [line.strip() for line in f if line.strip()]
+    else:
+        pool = [f"example{i}.com" for i in range(10000)]
+
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for _ in range(args.requests):
+        queue.put_nowait(random.sample(pool, min(args.domains, len(pool))))
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors
+        while not queue.empty():
+            domains = queue.get_nowait()
+            start = time.perf_counter()
+            response = await client.post(f"{args.url}/lookup/", json={"domains": domains}, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"requests:     {len(latencies)} ({errors} errors)")
+    print(f"concurrency:  {args.concurrency}")
+    print(f"elapsed:      {elapsed:.2f}s")
+    print(f"throughput:   {len(latencies) / elapsed:.1f} req/s")
+    print(f"latency p50:  {statistics.median(latencies) * 1000:.1f}ms")
+    print(f"latency p95:  {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent POST /lookup/ throughput")
+    parser.add_argument("--url", default="http://localhost:8000/api/v1")
+    parser.add_argument("--token", required=True, help="JWT of an unlimited-plan user")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--domains", type=int, default=100, help="Domains per request")
+    parser.add_argument("--domains-file", help="File with one domain per line to sample from")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Lookup response format benchmark
+
+Sends the same POST /lookup/ request with the default response format and
+with format=columnar, and reports median latency, payload size and gzip
+size (level 1, nginx's default gzip_comp_level) for each. It also checks
+that both formats carry the same offers.
+
+Usage:
+    python benchmarks/lookup_formats.py --token <JWT> \
+        --url http://localhost:8000/api/v1 --domains 1000 --rounds 10
+
+The JWT must belong to a user on the unlimited plan, otherwise the free
+search limit kicks in after three requests.
+"""
+
+import argparse
+import gzip
+import json
+import random
+import statistics
+import time
+
+import httpx
+
+
+def columnar_to_rows(payload):
+    """Expand a columnar response back into per-offer tuples for comparison."""
+    offers = payload["offers"]
+    rows = []
+    for i, domain in enumerate(offers["domain"]):
+        marketplace = offers["marketplace"][i]
+        rows.append((
+            domain,
+            payload["marketplace_slugs"][marketplace],
+            offers["price_usd"][i],
+            offers["is_best_price"][i],
+        ))
+    return sorted(rows, key=repr)
+
+
+def json_to_rows(payload):
+    return sorted(
+        ((r["domain"], r["marketplace_slug"], r["price_usd"], r["is_best_price"]) for r in payload["results"]),
+        key=repr
+    )
+
+
+def measure(client, url, body, headers, params, rounds):
+    latencies = []
+    content = b""
+    for _ in range(rounds):
+        start = time.perf_counter()
+        response = client.post(url, json=body, headers=headers, params=params)
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+        content = response.content
+    return statistics.median(latencies), content
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare lookup response formats")
+    parser.add_argument("--url", default="http://localhost:8000/api/v1", help="API base URL")
+    parser.add_argument("--token", required=True, help="JWT of an unlimited-plan user")
+    parser.add_argument("--domains", type=int, default=1000, help="Domains per request (max 1000)")
+    parser.add_argument("--rounds", type=int, default=10, help="Requests per format")
+    parser.add_argument("--domains-file", help="File with one domain per line to sample from")
+    args = parser.parse_args()
+
+    if args.domains_file:
+        with open(args.domains_file) as f:
+            pool = [line.strip() for line in f if line.strip()]
+    else:
+        pool = [f"example{i}.com" for i in range(10000)]
+
+    body = {"domains": random.sample(pool, min(args.domains, len(pool)))}
+    headers = {"Authorization": f"Bearer {args.token}"}
+    url = f"{args.url}/lookup/"
+
+    with httpx.Client(timeout=120) as client:
+        # Warm up caches so both formats are measured on the same footing
+        client.post(url, json=body, headers=headers).raise_for_status()
+        json_latency, json_content = measure(client, url, body, headers, {}, args.rounds)
+        columnar_latency, columnar_content = measure(client, url, body, headers, {"format": "columnar"}, args.rounds)
+
+    json_payload = json.loads(json_content)
+    columnar_payload = json.loads(columnar_content)
+    assert json_to_rows(json_payload) == columnar_to_rows(columnar_payload), "formats disagree"
+
+    print(f"domains: {len(body['domains'])}, offers: {json_payload['total_offers_found']}")
+    print(f"{'format':<10} {'p50 latency':>12} {'bytes':>12} {'gzip bytes':>12}")
+    for name, latency, content in (
+        ("json", json_latency, json_content),
+        ("columnar", columnar_latency, columnar_content),
+    ):
+        print(f"{name:<10} {latency * 1000:>10.1f}ms {len(content):>12,} {len(gzip.compress(content, 1)):>12,}")
+
+
+if __name__ == "__main__":
+    main()
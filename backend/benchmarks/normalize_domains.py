@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Domain normalization microbenchmark
+
+Normalizes a synthetic list of raw domains (URLs, subdomains, ports, mixed
+case, repeats) three ways:
+
+- per input: one suffix-list extraction per string, as before memoization
+- batch, cold: DomainService.normalize_domains with an empty LRU
+- batch, warm: the same call again, served from the LRU
+
+Usage (from backend/):
+    DEBUG=true python benchmarks/normalize_domains.py --inputs 100000 --distinct 20000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.services.domain_service import DomainService, _normalize_domain, _suffix_extractor  # noqa: E402
+
+SUFFIXES = ["com", "net", "org", "co.uk", "com.au", "de", "io", "blogspot.com"]
+PREFIXES = ["", "www.", "blog.", "shop.", "https://", "http://www.", "https://news."]
+PATHS = ["", "/", "/page", "/a/b?c=d", ":8080/x"]
+
+
+def make_inputs(count: int, distinct: int, seed: int = 42):
+    rng = random.Random(seed)
+    hosts = [f"site{i}.{rng.choice(SUFFIXES)}" for i in range(distinct)]
+    inputs = []
+    for _ in range(count):
+        raw = f"{rng.choice(PREFIXES)}{rng.choice(hosts)}{rng.choice(PATHS)}"
+        inputs.append(raw.upper() if rng.random() < 0.1 else raw)
+    return inputs
+
+
+def per_input(domains):
+    """Normalization without memoization (one extraction per input)."""
+    results = []
+    for domain in domains:
+        if domain.startswith(('http://', 'https://')):
+            domain = domain.replace('http://', '').replace('https://', '')
+        domain = domain.split('/')[0].split(':')[0]
+        extracted = _suffix_extractor(domain)
+        results.append(
+            f"{extracted.domain}.{extracted.suffix}".lower()
+            if extracted.domain and extracted.suffix else None
+        )
+    return results
+
+
+def timed(label, fn, inputs):
+    started = time.perf_counter()
+    results = fn(inputs)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<14} {elapsed:8.3f}s  {len(inputs) / elapsed:>12,.0f} inputs/s")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--inputs", type=int, default=100000, help="Number of raw domains to normalize")
+    parser.add_argument("--distinct", type=int, default=20000, help="Number of distinct hosts behind them")
+    args = parser.parse_args()
+
+    inputs = make_inputs(args.inputs, args.distinct)
+    DomainService.warm_up()
+    print(f"inputs: {len(inputs)} ({len(set(inputs))} distinct strings, {args.distinct} hosts)")
+
+    expected = timed("per input", per_input, inputs)
+    _normalize_domain.cache_clear()
+    cold = timed("batch, cold", DomainService.normalize_domains, inputs)
+    warm = timed("batch, warm", DomainService.normalize_domains, inputs)
+    assert cold == warm == expected, "normalization results differ"
+
+    print(DomainService.normalization_cache_info())
+
+
+if __name__ == "__main__":
+    main()
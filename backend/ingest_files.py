@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Batch Ingest Script
+
+Loads many marketplace exports at once straight into the configured
+DATABASE_URL, e.g. when onboarding a new shop or backfilling: no upload
+size limit and no request timeouts. Files are streamed in chunks, parsed in
+parallel worker processes and written per marketplace (see
+BatchIngestService).
+
+Usage:
+    python ingest_files.py manifest.json [--workers 4] [--writers 4]
+    python ingest_files.py --request request.json exports/ more.csv [--error-report errors.txt]
+
+The manifest is a JSON array with one entry per file: the file path
+(relative to the manifest) plus the same fields as a CSV upload request:
+
+    [
+      {
+        "file": "exports/whitepress.csv",
+        "marketplace_name": "WhitePress",
+        "marketplace_slug": "whitepress",
+        "column_mapping": {"domain_column": "Domain", "price_column": "Price"}
+      }
+    ]
+
+With --request, every file given is ingested with the one upload request
+in that JSON file. As with uploads, nothing is delisted unless a request
+sets "delist_missing": true, i.e. its files are the marketplace's full
+feed. A directory, in a manifest entry or on the command line, stands for
+the CSV, XLSX and XLS files in it, in name order (so a later file wins
+when a domain repeats).
+
+Every error is written to the error report (by default
+ingest-errors-<time>.txt, only if there are errors); the summary shows the
+first few.
+
+Running API servers need no restart or rebuild afterwards: the offers
+written are recorded in cache_invalidations, and every server applies them
+to its offer index, known-domain filter and lookup cache within
+CACHE_SYNC_INTERVAL seconds (see CacheSync).
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+from typing import List, Tuple
+
+from app.core.config import settings
+from app.core.database import engine
+from app.schemas.csv_upload import CSVUploadRequest
+from app.services.batch_ingest_service import BatchIngestService
+
+# Errors printed after the summary
+MAX_PRINTED_ERRORS = 20
+# Files of a directory that are ingested
+UPLOAD_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+
+
+def expand_path(path: str) -> List[str]:
+    """A file, or the upload files of a directory (not its subdirectories) in name order."""
+    if os.path.isdir(path):
+        files = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith(UPLOAD_EXTENSIONS) and os.path.isfile(os.path.join(path, name))
+        )
+        if not files:
+            raise ValueError(f"No CSV, XLSX or XLS files in {path}")
+        return files
+    if not os.path.isfile(path):
+        raise ValueError(f"File not found: {path}")
+    return [path]
+
+
+def load_manifest(path: str) -> List[Tuple[str, CSVUploadRequest]]:
+    """Read a manifest into (file path, upload request) pairs."""
+    with open(path) as f:
+        entries = json.load(f)
+    if not isinstance(entries, list):
+        raise ValueError("The manifest must be a JSON array")
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    files = []
+    for entry in entries:
+        entry = dict(entry)
+        file_paths = expand_path(os.path.join(base_dir, entry.pop("file")))
+        upload_request = CSVUploadRequest(**entry)
+        files.extend((file_path, upload_request) for file_path in file_paths)
+    return files
+
+
+def load_request(path: str, paths: List[str]) -> List[Tuple[str, CSVUploadRequest]]:
+    """Pair the given files and directories with the upload request in a JSON file."""
+    with open(path) as f:
+        upload_request = CSVUploadRequest(**json.load(f))
+    return [(file_path, upload_request) for path in paths for file_path in expand_path(path)]
+
+
+def write_error_report(path: str, errors: List[str]) -> None:
+    """Write every error, one per line."""
+    with open(path, "w") as f:
+        for error in errors:
+            f.write(f"{error}\n")
+
+
+def print_summary(summary: dict, input_bytes: int = 0) -> None:
+    """Print the per-marketplace results and the aggregate throughput."""
+    print()
+    print("📊 Batch ingest summary")
+    print("=" * 50)
+    print(f"{'marketplace':>12} {'rows':>10} {'new':>8} {'updated':>8} {'unchanged':>9} {'delisted':>8} {'rows/s':>9}")
+    # An upload grouped by its marketplace column lists its marketplaces
+    rows = [row for marketplace in summary["marketplaces"] for row in marketplace["marketplaces"] or [marketplace]]
+    for marketplace in rows:
+        print(
+            f"{marketplace['marketplace_id']:>12} {marketplace['total_rows_processed']:>10} "
+            f"{marketplace['new_offers_added']:>8} {marketplace['updated_offers']:>8} "
+            f"{marketplace['unchanged_offers']:>9} {marketplace['delisted_offers']:>8} "
+            f"{marketplace['rows_per_second']:>9,.0f}"
+        )
+    print()
+    print(f"   Files: {summary['files']} ({summary['workers']} workers, {summary['writers']} writers)")
+    print(f"   Rows: {summary['total_rows_processed']} ({summary['successful_imports']} imported, "
+          f"{summary['failed_imports']} failed, {summary['duplicate_rows']} duplicates)")
+    print(f"   Time: {summary['processing_time_ms'] / 1000:.1f}s ({summary['rows_per_second']:,.0f} rows/s)")
+    if input_bytes and summary['processing_time_ms']:
+        megabytes = input_bytes / 1024 / 1024
+        print(f"   Input: {megabytes:,.1f}MB ({megabytes / (summary['processing_time_ms'] / 1000):,.1f}MB/s)")
+
+    # Parse and normalize are summed over the worker processes
+    print()
+    print(f"{'stage':>14} {'time':>9} {'rows':>10} {'rows/s':>10}")
+    for stage, timing in summary["stages"].items():
+        print(f"{stage:>14} {timing['time_ms'] / 1000:>8.1f}s {timing['rows']:>10} {timing['rows_per_second']:>10,.0f}")
+
+    errors = summary["errors"]
+    if errors:
+        print()
+        print(f"⚠️  {len(errors)} errors:")
+        for error in errors[:MAX_PRINTED_ERRORS]:
+            print(f"   - {error}")
+        if len(errors) > MAX_PRINTED_ERRORS:
+            print(f"   ... and {len(errors) - MAX_PRINTED_ERRORS} more")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Ingest many marketplace files at once")
+    parser.add_argument("paths", nargs="+", help="JSON manifest, or with --request: files and directories to ingest")
+    parser.add_argument("--request", help="JSON upload request (marketplace, column mapping, defaults) for every file")
+    parser.add_argument("--workers", type=int, default=settings.ingest_workers, help="Processes parsing the files")
+    parser.add_argument("--writers", type=int, default=settings.ingest_writers, help="Marketplaces written concurrently")
+    parser.add_argument("--error-report", help="File to write every error to (default: ingest-errors-<time>.txt)")
+    args = parser.parse_args()
+    if not args.request and len(args.paths) != 1:
+        parser.error("give one manifest, or --request with the files and directories to ingest")
+    logging.basicConfig(level=settings.log_level, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    try:
+        files = load_request(args.request, args.paths) if args.request else load_manifest(args.paths[0])
+        print(f"🚀 Ingesting {len(files)} files into {engine.url.render_as_string(hide_password=True)}...")
+        summary = BatchIngestService(files, workers=args.workers, writers=args.writers).process()
+    except KeyboardInterrupt:
+        print("\n❌ Operation cancelled by user")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Fatal error: {e}")
+        sys.exit(1)
+
+    print_summary(summary, sum(os.path.getsize(path) for path, _ in files))
+    print(f"   Running servers pick up the changes within {settings.cache_sync_interval:g}s")
+    if summary["errors"]:
+        report = args.error_report or f"ingest-errors-{datetime.now():%Y%m%d-%H%M%S}.txt"
+        write_error_report(report, summary["errors"])
+        print(f"   Error report: {report}")
+    sys.exit(1 if summary["failed_imports"] else 0)
+
+
+if __name__ == "__main__":
+    main()
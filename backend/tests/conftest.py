@@ -0,0 +1,73 @@
+import os
+import sys
+import tempfile
+
+# Settings are read at import time: point the app at a scratch SQLite database first
+_DB_DIR = tempfile.mkdtemp(prefix="backlink-checker-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+os.environ["JOB_RESULTS_DIR"] = os.path.join(_DB_DIR, "jobs")
+os.environ.setdefault("DEBUG", "true")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-" * 3)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from app.core.database import Base, SessionLocal, engine
+from app.models import Domain, Marketplace, Offer
+from app.services.cache_sync import cache_sync
+from app.services.domain_bloom_filter import known_domain_filter
+from app.services.lookup_cache import lookup_cache
+from app.services.offer_index import offer_index
+
+
+@pytest.fixture
+def db():
+    """Session on an empty database; the in-memory lookup structures are reset afterwards."""
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        known_domain_filter._filter = None
+        offer_index.ready = False
+        lookup_cache.clear()
+        cache_sync._applied.clear()
+
+
+def add_offers(db, slug, prices):
+    """Create a marketplace (if needed) with one listed offer per domain in prices."""
+    marketplace = db.query(Marketplace).filter(Marketplace.slug == slug).first()
+    if marketplace is None:
+        marketplace = Marketplace(name=slug.title(), slug=slug, created_at=datetime.utcnow())
+        db.add(marketplace)
+        db.flush()
+    for root_domain, price in prices.items():
+        domain = db.query(Domain).filter(Domain.root_domain == root_domain).first()
+        if domain is None:
+            domain = Domain(root_domain=root_domain, etld1=root_domain)
+            db.add(domain)
+            db.flush()
+        db.add(Offer(
+            domain_id=domain.id, marketplace_id=marketplace.id, price_amount=price, price_currency="USD",
+            price_usd=price, includes_content=False, dofollow=True, last_seen_at=datetime(2020, 1, 1)
+        ))
+    db.commit()
+    return marketplace
+
+
+def listed_offers(db):
+    """(marketplace slug, domain, price) of every listed offer."""
+    return sorted(
+        (offer.marketplace.slug, offer.domain.root_domain, float(offer.price_amount))
+        for offer in db.query(Offer).filter(Offer.delisted_at.is_(None))
+    )
+
+
+def write_csv(path, rows, columns=("Domain", "Price")):
+    pd.DataFrame(rows, columns=list(columns)).to_csv(path, index=False)
+    return str(path)
@@ -0,0 +1,36 @@
+from app.schemas.csv_upload import CSVUploadRequest
+from app.services.batch_ingest_service import BatchIngestService
+
+from .conftest import add_offers, listed_offers, write_csv
+
+MAPPING = {"domain_column": "Domain", "price_column": "Price"}
+GROUPED_MAPPING = dict(MAPPING, marketplace_column="Vendor")
+
+
+def test_batch_delists_marketplace_of_plain_file_across_grouped_file(db, tmp_path):
+    add_offers(db, "x", {"z.com": 9})
+    add_offers(db, "agg", {"y.com": 9})
+    grouped = write_csv(
+        tmp_path / "grouped.csv", [("a.com", 1, "X"), ("b.com", 2, "X"), ("c.com", 3, "")],
+        columns=("Domain", "Price", "Vendor")
+    )
+    plain = write_csv(tmp_path / "plain.csv", [("d.com", 4)])
+    files = [
+        (plain, CSVUploadRequest(
+            marketplace_name="X", marketplace_slug="x", column_mapping=MAPPING, delist_missing=True
+        )),
+        (grouped, CSVUploadRequest(
+            marketplace_name="Agg", marketplace_slug="agg", column_mapping=GROUPED_MAPPING, delist_missing=True
+        )),
+    ]
+
+    summary = BatchIngestService(files, workers=2, writers=4).process()
+
+    assert summary["errors"] == []
+    offers = listed_offers(db)
+    # X's full feed is the plain file plus its rows of the grouped one
+    assert ("x", "a.com", 1.0) in offers
+    assert ("x", "d.com", 4.0) in offers
+    assert ("x", "z.com", 9.0) not in offers
+    # The grouped file names no marketplace to delist
+    assert ("agg", "y.com", 9.0) in offers
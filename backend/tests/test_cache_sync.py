@@ -0,0 +1,27 @@
+from app.api.v1.endpoints.lookup import _resolve_domain_ids
+from app.models import Domain
+from app.services.cache_sync import CacheSync, cache_sync
+from app.services.domain_bloom_filter import known_domain_filter
+from app.services.offer_index import offer_index
+
+from .conftest import add_offers
+
+
+def test_synced_lookup_finds_domain_created_by_another_process(db):
+    cache_sync.prime()
+    known_domain_filter.load(db)
+    offer_index.build(db)
+
+    # Ingested by another process after this one built its filter and index
+    add_offers(db, "x", {"fresh.com": 10})
+    domain_id = db.query(Domain.id).filter(Domain.root_domain == "fresh.com").scalar()
+    CacheSync().record_domains(db, [domain_id])
+    db.commit()
+    assert not known_domain_filter.might_contain("fresh.com")
+
+    # Lookups trust the filter until the sync thread applies the change
+    assert _resolve_domain_ids(db, ["fresh.com", "unknown.com"]) == {}
+    assert cache_sync.sync(db) == 1
+    assert _resolve_domain_ids(db, ["fresh.com", "unknown.com"]) == {"fresh.com": domain_id}
+    assert known_domain_filter.might_contain("fresh.com")
+    assert [offer.price_usd for offer in offer_index.get_offers("fresh.com")] == [10]
@@ -0,0 +1,262 @@
+import hashlib
+import shutil
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from app.api.v1.endpoints import ingest
+from app.core.config import settings
+from app.models import Marketplace, Offer
+from app.models.fx_rate import FXRate
+from app.models.price_history import PriceHistory
+from app.schemas.csv_upload import ColumnMapping, CSVUploadRequest
+from app.services.csv_processing_service import CSVProcessingService, prepare_frame, read_upload, read_xlsx_chunks
+from app.services.fx_service import FXService
+from app.services.ingest_checkpoint_service import IngestCheckpointService
+from app.services.job_manager import Job
+
+from .conftest import add_offers, listed_offers, write_csv
+
+MAPPING = {"domain_column": "Domain", "price_column": "Price"}
+GROUPED_MAPPING = dict(MAPPING, marketplace_column="Vendor")
+
+
+def upload_request(slug="feed", mapping=MAPPING, **options):
+    return CSVUploadRequest(marketplace_name=slug.title(), marketplace_slug=slug, column_mapping=mapping, **options)
+
+
+def test_failed_batch_is_not_counted_as_imported(db, monkeypatch):
+    monkeypatch.setattr(settings, "ingest_batch_size", 2)
+    frame = pd.DataFrame({"Domain": ["a.com", "b.com", "c.com", "d.com", "e.com"], "Price": [1, 2, 3, 4, 5]})
+    service = CSVProcessingService(db, upload_request(), iter([frame]))
+    write_batch = service._write_batch
+    calls = []
+
+    def failing_write_batch(batch):
+        calls.append(len(batch))
+        if len(calls) == 2:
+            raise RuntimeError("write failed")
+        return write_batch(batch)
+
+    monkeypatch.setattr(service, "_write_batch", failing_write_batch)
+    results = service.process()
+
+    assert calls == [2, 2, 1]
+    assert results["total_rows"] == 5
+    assert results["successful_imports"] == 3
+    assert results["failed_imports"] == 2
+    assert [domain for _, domain, _ in listed_offers(db)] == ["a.com", "b.com", "e.com"]
+
+
+
+def test_fx_rates_are_resolved_once_per_upload(db, monkeypatch):
+    db.add(FXRate(date=date.today(), currency="EUR", rate_to_usd=Decimal("1.5"), created_at=datetime.utcnow()))
+    db.commit()
+    fetched = []
+    monkeypatch.setattr(FXService, "_fetch_and_store_rate", lambda self, currency, target_date: fetched.append(currency))
+    chunks = [
+        pd.DataFrame({"Domain": ["a.com", "b.com", "c.com"], "Price": ["10", "20", "30"], "Currency": ["eur", "xyz", None]}),
+        pd.DataFrame({"Domain": ["d.com", "e.com"], "Price": ["40", "50"], "Currency": ["EUR", "XYZ"]}, index=[3, 4]),
+    ]
+    mapping = dict(MAPPING, currency_column="Currency")
+
+    results = CSVProcessingService(db, upload_request(mapping=mapping), iter(chunks)).process()
+
+    assert fetched == ["XYZ"]
+    assert results["successful_imports"] == 5
+    # Imported without a USD price, and reported
+    assert results["unresolved_currencies"] == {"XYZ": 2}
+    prices = {offer.domain.root_domain: offer.price_usd for offer in db.query(Offer)}
+    assert prices == {"a.com": 15, "b.com": None, "c.com": 30, "d.com": 60, "e.com": None}
+
+
+def upload(db, rows, **options):
+    frame = pd.DataFrame(rows, columns=["Domain", "Price"])
+    return CSVProcessingService(db, upload_request(**options), frame).process()
+
+
+def test_reupload_rewrites_only_changed_offers(db):
+    upload(db, [("a.com", 10), ("b.com", 20), ("c.com", 30)])
+
+    results = upload(db, [("a.com", 10), ("b.com", 25), ("d.com", 40)], delist_missing=True)
+
+    assert (results["new_offers"], results["updated_offers"], results["unchanged_offers"]) == (1, 1, 1)
+    assert results["delisted_offers"] == 1
+    assert listed_offers(db) == [("feed", "a.com", 10.0), ("feed", "b.com", 25.0), ("feed", "d.com", 40.0)]
+
+    # A delisted offer is listed again by a later upload that contains it
+    results = upload(db, [("c.com", 30)])
+    assert (results["updated_offers"], results["delisted_offers"]) == (1, 0)
+    assert ("feed", "c.com", 30.0) in listed_offers(db)
+
+
+def test_reupload_with_decimal_prices_keeps_unchanged_offers(db):
+    upload(db, [("a.com", "10"), ("b.com", "20")])
+
+    # One decimal price makes the whole chunk parse as floats
+    results = upload(db, [("a.com", "10"), ("b.com", "20.5")])
+
+    assert (results["updated_offers"], results["unchanged_offers"]) == (1, 1)
+
+
+def test_upload_delists_nothing_by_default(db):
+    upload(db, [("a.com", 10), ("b.com", 20)])
+
+    results = upload(db, [("a.com", 10)])
+
+    assert (results["unchanged_offers"], results["delisted_offers"]) == (1, 0)
+    assert [domain for _, domain, _ in listed_offers(db)] == ["a.com", "b.com"]
+
+
+def test_xlsx_upload_is_read_in_chunks(tmp_path):
+    path = str(tmp_path / "feed.xlsx")
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["Domain", "Notes", "Price", "Dofollow"])
+    sheet.append(["a.com", "x", 10, True])
+    sheet.append([None, "only a note", None, None])
+    sheet.append(["b.com", None, 12.5, False])
+    sheet.append(["c.com", None, "15", None])
+    workbook.save(path)
+    mapping = ColumnMapping(domain_column="Domain", price_column="Price", dofollow_column="Dofollow")
+
+    chunks = list(read_xlsx_chunks(path, mapping, chunk_size=2))
+
+    # The row without mapped values is left out; rows keep their position in the sheet
+    assert [list(chunk.index) for chunk in chunks] == [[0, 2], [3]]
+    frame = pd.concat(chunks)
+    assert list(frame.columns) == ["Domain", "Price", "Dofollow"]
+    # Text columns come back as strings, like read_csv gives them
+    assert frame["Price"].map(type).tolist() == [str, str, str]
+    assert pd.to_numeric(frame["Price"]).tolist() == [10, 12.5, 15]
+    assert frame["Dofollow"].tolist()[:2] == [True, False]
+
+    clean, errors = prepare_frame(chunks[0], upload_request())
+    assert clean[["row", "domain", "price_amount"]].values.tolist() == [[1, "a.com", 10.0], [3, "b.com", 12.5]]
+    assert errors.empty
+
+
+def test_xlsx_upload_without_price_column(tmp_path):
+    path = str(tmp_path / "feed.xlsx")
+    workbook = Workbook()
+    workbook.active.append(["Domain", "Cost"])
+    workbook.save(path)
+
+    with pytest.raises(ValueError, match="Price"):
+        read_xlsx_chunks(path, ColumnMapping(**MAPPING))
+
+
+
+def test_price_changes_are_recorded_in_price_history(db, monkeypatch):
+    upload(db, [("a.com", 10), ("b.com", 20), ("c.com", 30)])
+    first_seen = {offer.domain.root_domain: offer.last_seen_at for offer in db.query(Offer)}
+
+    # Prices are stored with 2 decimals, so a sub-cent change is no price change
+    results = upload(db, [("a.com", 12), ("b.com", 20), ("c.com", 30.001)])
+
+    assert (results["updated_offers"], results["unchanged_offers"], results["price_changes"]) == (2, 1, 1)
+    (history,) = db.query(PriceHistory).all()
+    assert (history.offer.domain.root_domain, float(history.price_amount), history.price_currency) == ("a.com", 10, "USD")
+    # Dated with the last time the old price was seen
+    assert history.seen_at == first_seen["a.com"]
+
+    monkeypatch.setattr(settings, "ingest_price_history", False)
+    results = upload(db, [("a.com", 14)])
+    assert (results["updated_offers"], results["price_changes"]) == (1, 0)
+    assert db.query(PriceHistory).count() == 1
+
+
+ROWS = [("a.com", 5, "X"), ("b.com", 2, "X"), ("a.com", 1, "X"), ("c.com", 3, "Y"), ("b.com", 9, "X"), ("c.com", 1, "Y")]
+
+
+def run_ingest(tmp_path, request, source):
+    """Run an ingest job synchronously on a copy of the source file, like the upload endpoint spools it."""
+    path = tmp_path / f"spool-{len(list(tmp_path.iterdir()))}.csv"
+    shutil.copy(source, path)
+    file_hash = hashlib.sha256(open(source, "rb").read()).hexdigest()
+    return ingest._run_ingest_job(Job("ingest", 1), request, str(path), file_hash)
+
+
+@pytest.mark.parametrize("mapping", [MAPPING, GROUPED_MAPPING], ids=["plain", "grouped"])
+@pytest.mark.parametrize("policy, expected_prices", [
+    ("first_wins", {"a.com": 5, "b.com": 2, "c.com": 3}),
+    ("last_wins", {"a.com": 1, "b.com": 9, "c.com": 1}),
+    ("lowest_price", {"a.com": 1, "b.com": 2, "c.com": 1}),
+])
+def test_resumed_ingest_keeps_dedup_policy(db, tmp_path, monkeypatch, mapping, policy, expected_prices):
+    monkeypatch.setattr(settings, "ingest_checkpoints_enabled", True)
+    monkeypatch.setattr(settings, "ingest_chunk_size", 2)
+    source = write_csv(tmp_path / "feed.csv", ROWS, columns=("Domain", "Price", "Vendor"))
+    request = upload_request("agg", mapping, dedup_policy=policy)
+
+    # Interrupt the ingest once its first chunk is committed
+    save = IngestCheckpointService.save
+
+    def interrupted_save(self, checkpoint, chunks, marketplace_id, results):
+        save(self, checkpoint, chunks, marketplace_id, results)
+        if chunks == 1:
+            raise RuntimeError("interrupted")
+
+    monkeypatch.setattr(IngestCheckpointService, "save", interrupted_save)
+    with pytest.raises(RuntimeError):
+        run_ingest(tmp_path, request, source)
+    monkeypatch.setattr(IngestCheckpointService, "save", save)
+
+    response = run_ingest(tmp_path, request, source)
+
+    assert {domain: price for _, domain, price in listed_offers(db)} == expected_prices
+    # A later row replacing an offer written before makes that one the duplicate
+    assert response["successful_imports"] == 3
+    assert response["duplicate_rows"] == 3
+
+
+@pytest.mark.parametrize("mapping", [MAPPING, GROUPED_MAPPING], ids=["plain", "grouped"])
+def test_last_wins_counts_repeated_domains_without_tracking_them(db, mapping):
+    chunks = [pd.DataFrame(ROWS[start:start + 2], columns=["Domain", "Price", "Vendor"]) for start in range(0, 6, 2)]
+    service = CSVProcessingService(db, upload_request("agg", mapping, dedup_policy="last_wins"), iter(chunks))
+
+    results = service.process()
+
+    assert (results["successful_imports"], results["duplicate_rows"]) == (3, 3)
+    assert all(not writer.kept for writer in [service, *service.writers.values()])
+
+
+def test_grouped_upload_delists_only_named_marketplaces(db, tmp_path):
+    add_offers(db, "x", {"z.com": 9})
+    add_offers(db, "agg", {"y.com": 9})
+    rows = [("a.com", 1, "X"), ("b.com", 2, "X"), ("c.com", 3, "")]
+    path = write_csv(tmp_path / "feed.csv", rows, columns=("Domain", "Price", "Vendor"))
+
+    results = CSVProcessingService(
+        db, upload_request("agg", GROUPED_MAPPING, delist_missing=True), pd.read_csv(path)
+    ).process()
+    assert results["delisted_offers"] == 0
+    assert ("agg", "y.com", 9.0) in listed_offers(db)
+    assert ("x", "z.com", 9.0) in listed_offers(db)
+
+    results = CSVProcessingService(
+        db, upload_request("agg", GROUPED_MAPPING, delist_missing=True, delist_marketplaces=["agg"]), pd.read_csv(path)
+    ).process()
+    assert results["delisted_offers"] == 1
+    assert ("agg", "y.com", 9.0) not in listed_offers(db)
+    assert ("x", "z.com", 9.0) in listed_offers(db)
+    assert [(m["marketplace_id"], m["successful_imports"]) for m in results["marketplaces"]] == [
+        (db.query(Marketplace.id).filter(Marketplace.slug == slug).scalar(), count) for slug, count in [("x", 2), ("agg", 1)]
+    ]
+
+
+def test_resumed_seen_at_is_naive_utc(db, tmp_path):
+    path = write_csv(tmp_path / "feed.csv", [("a.com", 1)])
+    request = upload_request()
+    checkpoint = IngestCheckpointService(db).start("hash", request, path, Job("ingest", 1))
+    service = CSVProcessingService(db, request, read_upload(path, request.column_mapping))
+    # As PostgreSQL returns a timestamptz column
+    checkpoint.seen_at = datetime(2024, 5, 1, 14, 30, tzinfo=timezone(timedelta(hours=2)))
+
+    service.process(checkpoint=checkpoint)
+
+    assert service.seen_at == datetime(2024, 5, 1, 12, 30)
+    assert db.query(Offer.last_seen_at).scalar() == datetime(2024, 5, 1, 12, 30)
@@ -0,0 +1,72 @@
+import os
+import socket
+import threading
+import time
+from datetime import datetime
+
+from app.core.config import settings
+from app.models.background_job import BackgroundJob
+from app.services.job_manager import Job, JobManager, process_start_time, worker_id
+
+
+def wait_until_finished(manager, job, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not manager.get(job.id).finished:
+        assert time.monotonic() < deadline, "job did not finish"
+        time.sleep(0.01)
+    return manager.get(job.id)
+
+
+def test_cancel_stops_a_running_job(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "job_sync_interval", 0)
+    manager = JobManager(max_workers=1, results_dir=str(tmp_path))
+    started = threading.Event()
+
+    def work(job):
+        started.set()
+        while True:
+            job.advance(1)
+            job.check_cancelled()
+            time.sleep(0.01)
+
+    job = manager.submit(Job("ingest", 1), work)
+    assert started.wait(5)
+    # As another process would: through the stored job
+    manager.cancel(Job.from_record(db.query(BackgroundJob).filter(BackgroundJob.id == job.id).one()))
+
+    job = wait_until_finished(manager, job)
+    manager.shutdown()
+    assert job.status == "cancelled"
+    assert job.processed > 0
+    db.expire_all()
+    assert db.query(BackgroundJob.status).filter(BackgroundJob.id == job.id).scalar() == "cancelled"
+
+
+def test_fail_interrupted_marks_jobs_of_dead_processes(db, tmp_path):
+    host = socket.gethostname()
+    parent = os.getppid()
+    workers = {
+        "own": worker_id(),
+        "reused_pid": f"{host}:{parent}:1",
+        "live": f"{host}:{parent}:{process_start_time(parent)}",
+        "live_without_start": f"{host}:{parent}",
+        "other_host": f"{host}-other:{parent}:1",
+    }
+    for name, worker in workers.items():
+        db.add(BackgroundJob(
+            id=name, kind="ingest", owner_id=1, status="running", worker=worker, created_at=datetime.utcnow()
+        ))
+    db.add(BackgroundJob(
+        id="finished", kind="ingest", owner_id=1, status="completed", worker=workers["own"],
+        created_at=datetime.utcnow()
+    ))
+    db.commit()
+
+    assert JobManager(results_dir=str(tmp_path)).fail_interrupted() == 2
+
+    db.expire_all()
+    statuses = dict(db.query(BackgroundJob.id, BackgroundJob.status))
+    assert statuses == {
+        "own": "failed", "reused_pid": "failed", "live": "running", "live_without_start": "running",
+        "other_host": "running", "finished": "completed",
+    }
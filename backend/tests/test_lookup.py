@@ -0,0 +1,132 @@
+import json
+
+import pandas as pd
+import pytest
+from fastapi import Depends
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.api.v1.endpoints.auth import get_current_user_async
+from app.api.v1.endpoints.lookup import COLUMNAR_FIELDS
+from app.core.database import get_async_db
+from app.main import app
+from app.models import User
+from app.models.user import UserSearch
+from app.schemas.csv_upload import CSVUploadRequest
+from app.services.csv_processing_service import CSVProcessingService
+from app.services.lookup_cache import LookupCache, lookup_cache
+from app.services.offer_index import offer_index
+
+from .conftest import add_offers
+
+
+@pytest.fixture
+def client(db):
+    """API client signed in as an unlimited user; startup hooks don't run."""
+    db.add(User(email="agency@example.com", plan_type="unlimited"))
+    db.commit()
+
+    async def current_user(session=Depends(get_async_db)):
+        return (await session.execute(select(User))).scalar_one()
+
+    app.dependency_overrides[get_current_user_async] = current_user
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_stream_emits_one_line_per_domain(db, client):
+    add_offers(db, "x", {"a.com": 10, "b.com": 7})
+    add_offers(db, "y", {"a.com": 5})
+
+    response = client.post("/api/v1/lookup/stream", json={"domains": ["www.a.com", "b.com", "unknown.com", "a.com"]})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = {line["domain"]: line for line in map(json.loads, response.text.splitlines())}
+    assert sorted(lines) == ["a.com", "b.com", "unknown.com"]
+    assert lines["a.com"]["best_price_usd"] == 5
+    assert sorted((o["marketplace_slug"], o["is_best_price"]) for o in lines["a.com"]["offers"]) == [
+        ("x", False), ("y", True)
+    ]
+    assert [o["price_usd"] for o in lines["b.com"]["offers"]] == [7]
+    assert lines["unknown.com"] == {"domain": "unknown.com", "offers": [], "best_price_usd": None}
+    # Usage is recorded once, after the last line
+    assert [search.results_count for search in db.query(UserSearch)] == [3]
+
+
+def test_stream_best_price_only(db, client):
+    add_offers(db, "x", {"a.com": 10})
+    add_offers(db, "y", {"a.com": 5})
+
+    response = client.post("/api/v1/lookup/stream", json={"domains": ["a.com"], "best_price_only": True})
+
+    (line,) = map(json.loads, response.text.splitlines())
+    assert [(o["marketplace_slug"], o["price_usd"]) for o in line["offers"]] == [("y", 5)]
+
+
+def test_indexed_lookups_go_through_the_cache(db, client):
+    add_offers(db, "x", {"a.com": 10})
+    add_offers(db, "y", {"a.com": 5})
+    offer_index.build(db)
+    request = {"domains": ["a.com"], "best_price_only": True}
+    misses, hits = lookup_cache.misses, lookup_cache.hits
+
+    first = client.post("/api/v1/lookup/", json=request).json()
+    second = client.post("/api/v1/lookup/", json=dict(request, best_price_only=False)).json()
+
+    assert [o["price_usd"] for o in first["results"]] == [5]
+    assert sorted(o["price_usd"] for o in second["results"]) == [5, 10]
+    assert (lookup_cache.misses - misses, lookup_cache.hits - hits) == (1, 1)
+
+    # An ingest refreshes the index and drops the domain's entries
+    frame = pd.DataFrame({"Domain": ["a.com"], "Price": [3]})
+    CSVProcessingService(db, CSVUploadRequest(
+        marketplace_name="X", marketplace_slug="x", column_mapping={"domain_column": "Domain", "price_column": "Price"}
+    ), frame).process()
+
+    third = client.post("/api/v1/lookup/", json=request).json()
+    assert [(o["marketplace_slug"], o["price_usd"]) for o in third["results"]] == [("x", 3)]
+
+
+def test_stream_reads_and_fills_the_cache(db, client):
+    add_offers(db, "x", {"a.com": 10, "b.com": 7})
+    offer_index.build(db)
+    client.post("/api/v1/lookup/", json={"domains": ["a.com"]})
+    offer_index.ready = False
+    hits = lookup_cache.hits
+
+    response = client.post("/api/v1/lookup/stream", json={"domains": ["a.com", "b.com"]})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    # The cached domain comes first, without a query
+    assert [line["domain"] for line in lines] == ["a.com", "b.com"]
+    assert lookup_cache.hits - hits == 1
+    assert [offer.price_usd for offer, _ in lookup_cache.get("b.com", LookupCache.filter_key(None, None, None))] == [7]
+
+
+def test_columnar_format_encodes_marketplaces_once(db, client):
+    add_offers(db, "x", {"a.com": 10, "b.com": 7})
+    add_offers(db, "y", {"a.com": 5})
+
+    body = client.post("/api/v1/lookup/?format=columnar", json={"domains": ["b.com", "a.com", "unknown.com"]}).json()
+    rows = list(zip(*(body["offers"][field] for field in ("domain", "marketplace", "price_usd", "is_best_price"))))
+
+    # Offers follow the order of the searched domains
+    assert [row[0] for row in rows] == ["b.com", "a.com", "a.com"]
+    assert sorted((domain, body["marketplace_slugs"][index], price, best) for domain, index, price, best in rows) == [
+        ("a.com", "x", 10, False), ("a.com", "y", 5, True), ("b.com", "x", 7, True)
+    ]
+    assert sorted(body["marketplace_slugs"]) == ["x", "y"]
+    assert body["marketplaces"] == [slug.title() for slug in body["marketplace_slugs"]]
+    assert len(set(map(len, body["offers"].values()))) == 1
+    assert (body["total_domains_searched"], body["domains_with_offers"], body["total_offers_found"]) == (3, 2, 3)
+
+
+def test_columnar_format_without_offers(db, client):
+    body = client.post("/api/v1/lookup/?format=columnar", json={"domains": ["unknown.com"]}).json()
+
+    assert body["marketplaces"] == []
+    assert body["offers"] == {field: [] for field in COLUMNAR_FIELDS}
+    assert body["total_offers_found"] == 0
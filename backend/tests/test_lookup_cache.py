@@ -0,0 +1,61 @@
+from datetime import datetime
+
+from app.services.lookup_cache import LookupCache
+from app.services.offer_index import IndexedOffer
+
+NO_FILTERS = LookupCache.filter_key(None, None, None)
+
+
+def bundle(domain_id, marketplace_id, price):
+    offer = IndexedOffer(
+        domain_id=domain_id, marketplace_id=marketplace_id, marketplace="M", marketplace_slug="m",
+        price_amount=price, price_currency="USD", price_usd=price, listing_url=None,
+        includes_content=False, dofollow=True, last_seen_at=datetime(2020, 1, 1)
+    )
+    return ((offer, True),)
+
+
+def test_bundle_read_before_an_invalidation_is_not_cached():
+    cache = LookupCache(max_offers=100)
+    generation = cache.generation
+    cache.invalidate_domains([2])
+
+    cache.put("a.com", 1, NO_FILTERS, bundle(1, 1, 10), generation)
+    assert cache.get("a.com", NO_FILTERS) is None
+
+    cache.put("a.com", 1, NO_FILTERS, bundle(1, 1, 10), cache.generation)
+    assert cache.get("a.com", NO_FILTERS) == bundle(1, 1, 10)
+
+
+def test_invalidation_drops_entries_of_the_domain_or_marketplace():
+    cache = LookupCache(max_offers=100)
+    marketplace_filter = LookupCache.filter_key(["z", "m"], None, None)
+    cache.put("a.com", 1, NO_FILTERS, bundle(1, 1, 10), cache.generation)
+    cache.put("a.com", 1, LookupCache.filter_key(None, 5, None), bundle(1, 1, 10), cache.generation)
+    cache.put("b.com", 2, NO_FILTERS, bundle(2, 2, 10), cache.generation)
+    cache.put("c.com", 3, marketplace_filter, (), cache.generation)
+
+    cache.invalidate_domains([1])
+    assert cache.get("a.com", NO_FILTERS) is None
+    assert cache.get("a.com", LookupCache.filter_key(None, 5.0, None)) is None
+    assert cache.get("b.com", NO_FILTERS) is not None
+
+    # Entries filtered by marketplace go too: a renamed marketplace can change what they match
+    cache.invalidate_marketplace(2)
+    assert cache.get("b.com", NO_FILTERS) is None
+    assert cache.get("c.com", LookupCache.filter_key(["m", "z"], None, None)) is None
+    assert cache.stats()["invalidations"] == 4
+
+
+def test_least_recently_used_entries_are_evicted_by_offer_count():
+    cache = LookupCache(max_offers=4)
+    cache.put("a.com", 1, NO_FILTERS, bundle(1, 1, 10), cache.generation)
+    cache.put("b.com", 2, NO_FILTERS, bundle(2, 1, 10), cache.generation)
+    cache.get("a.com", NO_FILTERS)
+
+    cache.put("c.com", 3, NO_FILTERS, bundle(3, 1, 10), cache.generation)
+
+    assert cache.get("b.com", NO_FILTERS) is None
+    assert cache.get("a.com", NO_FILTERS) is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size"] == 4
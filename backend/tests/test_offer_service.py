@@ -0,0 +1,43 @@
+from app.models import Domain
+from app.services.offer_service import OfferService
+
+from .conftest import add_offers
+
+
+def domain_ids(db, *names):
+    return [db.query(Domain.id).filter(Domain.root_domain == name).scalar() for name in names]
+
+
+def ranked(rows):
+    return sorted((row.root_domain, row.slug, float(row.price_usd), row.is_best_price) for row in rows)
+
+
+def test_best_prices_are_ranked_per_domain(db):
+    add_offers(db, "x", {"a.com": 10, "b.com": 7})
+    add_offers(db, "y", {"a.com": 5, "b.com": 7})
+    add_offers(db, "z", {"a.com": 8})
+
+    rows = OfferService(db).get_offer_rows_for_domains(domain_ids(db, "a.com", "b.com"))
+
+    assert ranked(rows) == [
+        ("a.com", "x", 10.0, False),
+        ("a.com", "y", 5.0, True),
+        ("a.com", "z", 8.0, False),
+        # Ties all count as best
+        ("b.com", "x", 7.0, True),
+        ("b.com", "y", 7.0, True),
+    ]
+
+
+def test_best_price_is_ranked_after_filters(db):
+    add_offers(db, "x", {"a.com": 10})
+    add_offers(db, "y", {"a.com": 5})
+    add_offers(db, "z", {"a.com": 8})
+    ids = domain_ids(db, "a.com")
+    service = OfferService(db)
+
+    rows = service.get_offer_rows_for_domains(ids, {"marketplace_slugs": ["x", "z"]})
+    assert ranked(rows) == [("a.com", "x", 10.0, False), ("a.com", "z", 8.0, True)]
+
+    rows = service.get_offer_rows_for_domains(ids, {"min_price_usd": 6}, best_price_only=True)
+    assert ranked(rows) == [("a.com", "z", 8.0, True)]
@@ -3,8 +3,8 @@ import { useMutation } from 'react-query'
 import { Upload, FileText, Settings, CheckCircle, AlertCircle } from 'lucide-react'
 import { useDropzone } from 'react-dropzone'
 import Papa from 'papaparse'
-import { uploadCSV } from '../services/api'
-import { CSVUploadRequest, ColumnMapping } from '../types'
+import { uploadCSV, cancelIngestJob } from '../services/api'
+import { CSVUploadRequest, ColumnMapping, IngestJob } from '../types'
 
 export function CSVUpload() {
   const [file, setFile] = useState<File | null>(null)
@@ -12,6 +12,7 @@ export function CSVUpload() {
   const [previewData, setPreviewData] = useState<any[]>([])
   const [uploadProgress, setUploadProgress] = useState(0)
   const [isProcessing, setIsProcessing] = useState(false)
+  const [ingestJob, setIngestJob] = useState<IngestJob | null>(null)
   const [marketplaceData, setMarketplaceData] = useState({
     name: '',
     slug: '',
@@ -31,6 +32,7 @@ export function CSVUpload() {
     content: false,
     dofollow: true,
   })
+  const [delistMissing, setDelistMissing] = useState(false)
   const [bulkMarketplace, setBulkMarketplace] = useState({
     enabled: false,
     name: '',
@@ -44,11 +46,12 @@ export function CSVUpload() {
       if (percentage === 100) {
         setIsProcessing(true)
       }
-    }), {
+    }, setIngestJob), {
     onSuccess: (data) => {
       console.log('Upload successful:', data)
       setIsProcessing(false)
       setUploadProgress(0)
+      setIngestJob(null)
       // Reset form
       setFile(null)
       setCsvHeaders([])
@@ -58,6 +61,7 @@ export function CSVUpload() {
       console.error('Upload failed:', error)
       setIsProcessing(false)
       setUploadProgress(0)
+      setIngestJob(null)
       if (error.response) {
         console.error('Response data:', error.response.data)
         console.error('Response status:', error.response.status)
@@ -140,6 +144,9 @@ export function CSVUpload() {
       currency_default: defaults.currency,
       content_default: defaults.content,
       dofollow_default: defaults.dofollow,
+      delist_missing: delistMissing,
+      // A file grouped by marketplace is only the full feed of the upload's own marketplace
+      delist_marketplaces: cleanColumnMapping.marketplace_column && delistMissing ? [finalMarketplaceSlug] : undefined,
     }
 
     // Validate required fields
@@ -458,6 +465,18 @@ export function CSVUpload() {
                 </label>
               </div>
             </div>
+            
+            <label className="flex items-center mt-4">
+              <input
+                type="checkbox"
+                checked={delistMissing}
+                onChange={(e) => setDelistMissing(e.target.checked)}
+                className="rounded border-gray-300 text-primary-600 focus:ring-primary-500"
+              />
+              <span className="ml-2 text-sm text-gray-700">
+                Full feed: delist this marketplace's offers that aren't in the file
+              </span>
+            </label>
           </div>
         )}
 
@@ -505,10 +524,25 @@ export function CSVUpload() {
                 <div className="space-y-3">
                   <div className="flex items-center justify-between">
                     <span className="text-sm font-medium text-blue-900">
-                      {isProcessing ? 'Processing CSV...' : `Uploading... ${uploadProgress}%`}
+                      {isProcessing
+                        ? ingestJob && ingestJob.total > 0
+                          ? `Processing rows... ${ingestJob.processed.toLocaleString()} / ${ingestJob.total.toLocaleString()}`
+                          : 'Processing CSV...'
+                        : `Uploading... ${uploadProgress}%`}
                     </span>
                     {isProcessing && (
-                      <div className="animate-spin rounded-full h-4 w-4 border-b-2 border-blue-600"></div>
+                      <div className="flex items-center space-x-3">
+                        {ingestJob && (
+                          <button
+                            type="button"
+                            onClick={() => cancelIngestJob(ingestJob.id)}
+                            className="text-xs font-medium text-blue-700 hover:text-blue-900 underline"
+                          >
+                            Cancel
+                          </button>
+                        )}
+                        <div className="animate-spin rounded-full h-4 w-4 border-b-2 border-blue-600"></div>
+                      </div>
                     )}
                   </div>
                   
@@ -517,7 +551,9 @@ export function CSVUpload() {
                     <div 
                       className="bg-blue-600 h-2 rounded-full transition-all duration-300 ease-out"
                       style={{ 
-                        width: isProcessing ? '100%' : `${uploadProgress}%` 
+                        width: isProcessing
+                          ? `${ingestJob && ingestJob.total > 0 ? Math.round(ingestJob.progress * 100) : 100}%`
+                          : `${uploadProgress}%` 
                       }}
                     ></div>
                   </div>
@@ -525,7 +561,9 @@ export function CSVUpload() {
                   {/* Status Text */}
                   <p className="text-xs text-blue-700">
                     {isProcessing 
-                      ? 'File uploaded successfully. Processing rows in batches...'
+                      ? ingestJob && ingestJob.items_per_second > 0
+                        ? `File uploaded successfully. Processing ${ingestJob.items_per_second.toLocaleString()} rows/s, ${ingestJob.result.error_count ?? 0} row errors so far...`
+                        : 'File uploaded successfully. Processing rows in batches...'
                       : 'Uploading file to server...'
                     }
                   </p>
@@ -564,9 +602,37 @@ export function CSVUpload() {
               <div className="ml-3">
                 <h3 className="text-sm font-medium text-green-800">Upload successful!</h3>
                 <div className="mt-2 text-sm text-green-700">
+                  {mutation.data.already_imported && (
+                    <p>This file was already imported; nothing changed</p>
+                  )}
+                  {mutation.data.resumed_rows > 0 && (
+                    <p>Resumed an interrupted upload after {mutation.data.resumed_rows} rows</p>
+                  )}
                   <p>Processed {mutation.data.total_rows_processed} rows</p>
+                  {mutation.data.duplicate_rows > 0 && (
+                    <p>Collapsed {mutation.data.duplicate_rows} rows repeating a domain</p>
+                  )}
                   <p>Added {mutation.data.new_offers_added} new offers</p>
                   <p>Updated {mutation.data.updated_offers} existing offers</p>
+                  {mutation.data.price_changes > 0 && (
+                    <p>Recorded {mutation.data.price_changes} price changes</p>
+                  )}
+                  <p>{mutation.data.unchanged_offers} offers unchanged</p>
+                  {mutation.data.delisted_offers > 0 && (
+                    <p>Delisted {mutation.data.delisted_offers} offers missing from the file</p>
+                  )}
+                  {Object.entries(mutation.data.unresolved_currencies || {}).map(([currency, rows]) => (
+                    <p key={currency} className="text-yellow-700">
+                      No exchange rate for {currency}: {rows} rows imported without a USD price
+                    </p>
+                  ))}
+                  {(mutation.data.marketplaces || []).map((marketplace) => (
+                    <p key={marketplace.marketplace_id}>
+                      Marketplace #{marketplace.marketplace_id}: {marketplace.total_rows_processed} rows,{' '}
+                      {marketplace.new_offers_added} new, {marketplace.updated_offers} updated,{' '}
+                      {marketplace.unchanged_offers} unchanged, {marketplace.delisted_offers} delisted
+                    </p>
+                  ))}
                 </div>
               </div>
             </div>
@@ -579,7 +645,11 @@ export function CSVUpload() {
               <AlertCircle className="h-5 w-5 text-red-600" />
               <div className="ml-3">
                 <h3 className="text-sm font-medium text-red-800">Upload failed</h3>
-                <p className="text-sm text-red-700 mt-1">Please check your file and try again.</p>
+                <p className="text-sm text-red-700 mt-1">
+                  {mutation.error instanceof Error && !(mutation.error as any).response
+                    ? mutation.error.message
+                    : 'Please check your file and try again.'}
+                </p>
               </div>
             </div>
           </div>
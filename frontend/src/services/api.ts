@@ -4,6 +4,7 @@ import {
   DomainLookupResponse,
   CSVUploadRequest,
   CSVUploadResponse,
+  IngestJob,
   Marketplace,
   Stats,
 } from '../types'
@@ -39,16 +40,30 @@ export const getLookupStats = async (): Promise<Stats> => {
 }
 
 // CSV Upload API
+const INGEST_POLL_INTERVAL_MS = 1000
+
+export const getIngestJob = async (jobId: string): Promise<IngestJob> => {
+  const response = await api.get<IngestJob>(`/ingest/jobs/${jobId}`)
+  return response.data
+}
+
+export const cancelIngestJob = async (jobId: string): Promise<IngestJob> => {
+  const response = await api.delete<IngestJob>(`/ingest/jobs/${jobId}`)
+  return response.data
+}
+
+// Uploads the file, then polls the ingest job until it finishes
 export const uploadCSV = async (
   file: File,
   request: Omit<CSVUploadRequest, 'file'>,
-  onUploadProgress?: (progressEvent: { loaded: number; total: number }) => void
+  onUploadProgress?: (progressEvent: { loaded: number; total: number }) => void,
+  onJobProgress?: (job: IngestJob) => void
 ): Promise<CSVUploadResponse> => {
   const formData = new FormData()
   formData.append('file', file)
   formData.append('data', JSON.stringify(request))
 
-  const response = await api.post<CSVUploadResponse>('/ingest/csv', formData, {
+  const response = await api.post<IngestJob>('/ingest/csv', formData, {
     headers: {
       'Content-Type': 'multipart/form-data',
     },
@@ -61,7 +76,19 @@ export const uploadCSV = async (
       }
     } : undefined,
   })
-  return response.data
+
+  let job = response.data
+  onJobProgress?.(job)
+  while (job.status === 'queued' || job.status === 'running') {
+    await new Promise((resolve) => setTimeout(resolve, INGEST_POLL_INTERVAL_MS))
+    job = await getIngestJob(job.id)
+    onJobProgress?.(job)
+  }
+
+  if (job.status !== 'completed') {
+    throw new Error(job.status === 'cancelled' ? 'Upload cancelled' : job.error || 'Processing failed')
+  }
+  return job.result as CSVUploadResponse
 }
 
 // Marketplace API
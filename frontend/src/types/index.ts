@@ -37,6 +37,9 @@ export interface CSVUploadRequest {
   currency_default: string
   content_default: boolean
   dofollow_default: boolean
+  delist_missing?: boolean
+  delist_marketplaces?: string[]
+  dedup_policy?: 'last_wins' | 'first_wins' | 'lowest_price'
 }
 
 export interface ColumnMapping {
@@ -49,6 +52,12 @@ export interface ColumnMapping {
   marketplace_column?: string
 }
 
+export interface StageTiming {
+  time_ms: number
+  rows: number
+  rows_per_second: number
+}
+
 export interface CSVUploadResponse {
   marketplace_id: number
   total_rows_processed: number
@@ -57,10 +66,35 @@ export interface CSVUploadResponse {
   new_domains_added: number
   new_offers_added: number
   updated_offers: number
+  unchanged_offers: number
+  delisted_offers: number
+  price_changes: number
+  duplicate_rows: number
   processing_time_ms: number
+  rows_per_second: number
+  unresolved_currencies: Record<string, number>
+  resumed_rows: number
+  already_imported: boolean
+  stages: Record<string, StageTiming>
+  marketplaces: CSVUploadResponse[]
   errors: string[]
 }
 
+export interface IngestJob {
+  id: string
+  kind: string
+  status: 'queued' | 'running' | 'completed' | 'failed' | 'cancelled'
+  total: number
+  processed: number
+  progress: number
+  items_per_second: number
+  created_at: string
+  started_at?: string
+  finished_at?: string
+  error?: string
+  result: Partial<CSVUploadResponse> & { error_count?: number }
+}
+
 export interface Marketplace {
   id: number
   name: string